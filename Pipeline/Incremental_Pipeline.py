@@ -0,0 +1,38 @@
+from zenml.config import DockerSettings
+from zenml.integrations.constants import MLFLOW
+from zenml import pipeline
+from Src.Model_Training import prepare_delta_step, incremental_train_model
+
+docker_settings = DockerSettings(required_integrations=[MLFLOW])
+
+DELTA_PATH = "Artifacts/New_Listings.csv"
+
+
+# Daily refresh: the served Processing_pipeline and booster are reused, only the new listings
+# are processed and boosted on, and the holdout is the Test split written by the last full training.
+# The steps are not cached as they depend on the served model and pipeline, not only on their inputs
+@pipeline(
+    name="incremental_train_pipeline",
+    enable_cache=False,
+    settings={"docker": docker_settings},
+)
+def incremental_train_pipeline(
+    delta_path: str = DELTA_PATH, holdout_name: str = "Test"
+):
+    """
+    Args:
+        delta_path: csv/parquet file of the new listings (with their price)
+        holdout_name: artifact the updated model is checked on
+    return:
+        None
+    """
+    X_delta, X_holdout, y_delta, y_holdout = prepare_delta_step(
+        delta_path, holdout_name=holdout_name
+    )
+    regressor = incremental_train_model(
+        X_delta=X_delta, X_holdout=X_holdout, y_delta=y_delta, y_holdout=y_holdout
+    )
+
+
+if __name__ == "__main__":
+    incremental_train_pipeline(delta_path=DELTA_PATH)
@@ -1,40 +1,162 @@
 from zenml.config import DockerSettings
 from zenml.integrations.constants import MLFLOW
-from zenml import pipeline
+from zenml import pipeline, step
+import os
 from Src.Data_Ingestion import ingest_data
+from Src.Data_Cleaning import RAW_LISTINGS, clean_listings
 from Src.Data_Processing import process_data_step
 from Src.Model_Training import train_model
 from Src.Evaluation import evaluation
+from Src.Sector_Aggregates import Sector_Aggregates_Class, SECTOR_AGGREGATES_PATH
+from Src.Price_Grid import refresh_price_grid
+from Src.Artifact_Store import resolve_artifact_path, write_artifact
+from Src.Utilities import save_object
+from Src.Model_Info.Model_Configuration import ModelNameConfig
+from Src.Pipeline_Cache import (
+    file_fingerprint,
+    config_fingerprint,
+    source_fingerprint,
+    report_cache_usage,
+)
+from sklearn.base import RegressorMixin
+from sklearn.pipeline import Pipeline
+import pandas as pd
 
 docker_settings = DockerSettings(required_integrations=[MLFLOW])
 
+DATA_PATH = "/home/yuvraj/Documents/AI/AI_Projects/Find_Home.AI/Notebook_And_Dataset/Cleaned_datasets/Combined_Cleandata_V4.csv"
+LATLONG_NAME = "latlong"
+
+# Modules every cached step calls into, whose source is part of the step's cache key
+STEP_SOURCES = {
+    "ingest_data": ["Src.Data_Ingestion", "Src.Deduplication", "Src.Artifact_Store"],
+    "process_data_step": ["Src.Data_Processing", "Src.Utilities"],
+    "train_model": [
+        "Src.Model_Training",
+        "Src.Model_Info.Model_Tuning",
+        "Src.Model_Info.Model_Configuration",
+        "Src.Utilities",
+    ],
+    "evaluation": ["Src.Evaluation"],
+    "build_sector_aggregates": ["Src.Sector_Aggregates", "Src.Artifact_Store"],
+}
+
+
+# Src.Sector_Aggregates is also imported by the price page, so it is kept free of zenml
+@step
+def build_sector_aggregates(
+    latlong_name: str, data_hash: str, code_hash: str
+) -> pd.DataFrame:
+    aggregates_obj = Sector_Aggregates_Class()
+    return aggregates_obj.build_sector_aggregates(
+        aggregates_obj.read_listings(latlong_name)
+    )
+
+
+# Not cached: the cached steps skip their own writes on a hit, so the files the application and the
+# incremental training read are always written here from the step outputs
+@step(enable_cache=False)
+def export_artifacts(
+    Train_df: pd.DataFrame,
+    Test_df: pd.DataFrame,
+    processing_pipeline: Pipeline,
+    model: RegressorMixin,
+    sector_aggregates: pd.DataFrame,
+) -> None:
+    model_config_obj = ModelNameConfig()
+    write_artifact(Train_df, "Train")
+    write_artifact(Test_df, "Test")
+    save_object(
+        file_path=model_config_obj.pipeline_storage_path, obj=processing_pipeline
+    )
+    save_object(file_path=model_config_obj.model_storage_path, obj=model)
+    os.makedirs(os.path.dirname(SECTOR_AGGREGATES_PATH), exist_ok=True)
+    sector_aggregates.to_parquet(SECTOR_AGGREGATES_PATH)
+    # The price page only reads the grid: it is rebuilt here when the served booster or pipeline changed
+    refresh_price_grid()
 
+
+# Steps are cached by ZenML on their code, parameters and input artifacts. The hashes of the input files,
+# of ModelNameConfig and of the modules each step calls into are computed here and passed as step
+# parameters, so a change of any of them invalidates the steps depending on it while unchanged upstream
+# steps are skipped
 @pipeline(
-    name="train_pipeline", enable_cache=False, settings={"docker": docker_settings}
+    name="train_pipeline", enable_cache=True, settings={"docker": docker_settings}
 )
-def train_pipeline():
+def train_pipeline(
+    data_path: str = DATA_PATH,
+    clean_raw: bool = False,
+    deduplicate: bool = False,
+):
     """
     Args:
-        step_1: DataClass,
-        step_2: DataClass,
-        step_3: DataClass
+        data_path: path of the cleaned dataset
+        clean_raw: clean the raw scrapes (RAW_LISTINGS) into the Cleaned_* artifacts before the ingestion.
+            The ingestion still reads data_path: the feature engineering turning the cleaned scrapes into
+            that dataset lives in the notebooks, so the cleaned artifacts are only written for them
+        deduplicate: merge the near-duplicate listings before the train test split
     return:
         None
     """
+    code_hashes = {
+        name: source_fingerprint(modules) for name, modules in STEP_SOURCES.items()
+    }
+
+    cleaning_steps = []
+    if clean_raw:
+        for name, (raw_path, property_type) in RAW_LISTINGS.items():
+            if not os.path.exists(raw_path):
+                continue
+            step_id = "clean_listings_" + name
+            clean_listings(raw_path, property_type, name, id=step_id)
+            cleaning_steps.append(step_id)
+
     Train_df, Test_df = ingest_data(
-        "/home/yuvraj/Documents/AI/AI_Projects/Find_Home.AI/Notebook_And_Dataset/Cleaned_datasets/Combined_Cleandata_V4.csv"
+        data_path,
+        data_hash=file_fingerprint(data_path),
+        code_hash=code_hashes["ingest_data"],
+        deduplicate=deduplicate,
+        after=cleaning_steps or None,
     )
-    X_train, X_test, y_train, y_test = process_data_step(
-        Train_df=Train_df, Test_df=Test_df
+    X_train, X_test, y_train, y_test, processing_pipeline = process_data_step(
+        Train_df=Train_df,
+        Test_df=Test_df,
+        code_hash=code_hashes["process_data_step"],
     )
 
     regressor = train_model(
-        X_train=X_train, X_test=X_test, y_train=y_train, y_test=y_test
+        X_train=X_train,
+        X_test=X_test,
+        y_train=y_train,
+        y_test=y_test,
+        config_hash=config_fingerprint(ModelNameConfig()),
+        code_hash=code_hashes["train_model"],
+    )
+    R2_score, MAE, Fold_Report = evaluation(
+        model=regressor,
+        X_train=X_train,
+        X_test=X_test,
+        y_train=y_train,
+        y_test=y_test,
+        code_hash=code_hashes["evaluation"],
     )
-    R2_score, MAE = evaluation(
-        model=regressor, X_train=X_train, X_test=X_test, y_train=y_train, y_test=y_test
+
+    # Per sector statistics used by the price map
+    sector_aggregates = build_sector_aggregates(
+        LATLONG_NAME,
+        data_hash=file_fingerprint(resolve_artifact_path(LATLONG_NAME)),
+        code_hash=code_hashes["build_sector_aggregates"],
+    )
+
+    export_artifacts(
+        Train_df=Train_df,
+        Test_df=Test_df,
+        processing_pipeline=processing_pipeline,
+        model=regressor,
+        sector_aggregates=sector_aggregates,
     )
 
 
 if __name__ == "__main__":
-    train_pipeline()
+    train_pipeline(data_path=DATA_PATH)
+    print(report_cache_usage("train_pipeline"))
@@ -0,0 +1,81 @@
+import os
+import sys
+import pandas as pd
+from Src.Exception import CustomException
+from Src.Artifact_Store import read_artifact, resolve_artifact_path
+from Src.Model_Registry import file_checksum, stat_key
+
+
+# Columns summarised by the pie and bar charts of the Data Analysis page
+PIE_COLUMNS = ["luxury_category", "floor_category", "Property_Type", "agePossession"]
+BAR_COLUMNS = ["bedRoom", "bathroom", "balcony", "furnishing_type"]
+
+_version_cache = {}
+
+
+def file_version(path):
+    """
+    This function will return the sha256 of a file (None if it does not exist). The checksum is only
+    recomputed when the file's (mtime, size) changes, so calling it on every rerun is cheap
+    """
+    if not os.path.exists(path):
+        return None
+    key = (os.path.abspath(path), stat_key(path))
+    if key not in _version_cache:
+        # One entry per file: the stale entry of a changed file is dropped
+        for old_key in [k for k in _version_cache if k[0] == key[0]]:
+            del _version_cache[old_key]
+        _version_cache[key] = file_checksum(path)
+    return _version_cache[key]
+
+
+def data_version(name="Data"):
+    """
+    This function will return the sha256 of the data artifact behind the analysis page
+    """
+    return file_version(resolve_artifact_path(name))
+
+
+def load_analysis_data(name="Data"):
+    df = read_artifact(name)
+    df = df.drop(["store room"], axis=1)
+    df["sector"] = df["sector"].astype(object)
+    return df
+
+
+def compute_summary_tables(df, min_sector_listings=40):
+    """
+    This function will compute every summary table drawn by the Data Analysis page in one pass over the data
+    :param df: analysis DataFrame
+    :param min_sector_listings: sectors with fewer listings are left out of the sector / property type heatmap
+    :return: dict of summary tables, plus the shape and the first rows of the data
+    """
+    try:
+        tables = {}
+
+        sector_counts = df["sector"].value_counts()
+        tables["sector_counts"] = sector_counts.rename_axis("sector").reset_index(
+            name="count"
+        )
+
+        for col in PIE_COLUMNS + BAR_COLUMNS:
+            tables[col + "_counts"] = (
+                df[col].value_counts().rename_axis(col).reset_index(name="count")
+            )
+
+        # Mean price per (sector, property type) from a single groupby, same values as pivot_table(aggfunc='mean')
+        sectors_to_keep = sector_counts[sector_counts > min_sector_listings].index
+        filtered_df = df[df["sector"].isin(sectors_to_keep)]
+        tables["sector_type_price"] = (
+            filtered_df.groupby(["sector", "Property_Type"], observed=True)["price"]
+            .mean()
+            .unstack()
+            .T
+        )
+
+        tables["shape"] = df.shape
+        tables["head"] = df.head(8)
+        return tables
+
+    except Exception as e:
+        raise CustomException(e, sys)
@@ -0,0 +1,151 @@
+import os
+import sys
+import time
+import multiprocessing
+import pandas as pd
+from Src.Exception import CustomException
+
+
+ARTIFACTS_DIR = "Artifacts"
+
+# Low cardinality text columns stored with a categorical dtype (dictionary encoded in parquet)
+CATEGORICAL_COLUMNS = [
+    "Property_Type",
+    "sector",
+    "balcony",
+    "agePossession",
+    "luxury_category",
+    "floor_category",
+]
+
+
+def to_columnar(df):
+    """
+    This function will convert the known categorical columns of a DataFrame to the category dtype
+    """
+    df = df.copy()
+    for col in CATEGORICAL_COLUMNS:
+        if col in df.columns:
+            df[col] = df[col].astype("category")
+    return df
+
+
+def artifact_path(name, extension, directory=ARTIFACTS_DIR):
+    return os.path.join(directory, "{0}.{1}".format(name, extension))
+
+
+def write_artifact(df, name, directory=ARTIFACTS_DIR):
+    """
+    This function will store a DataFrame as a typed parquet artifact
+    :param df: DataFrame
+    :param name: artifact name (e.g. "Train")
+    :return: path of the parquet file
+    """
+    try:
+        path = artifact_path(name, "parquet", directory)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        to_columnar(df).to_parquet(path, index=False)
+        return path
+
+    except Exception as e:
+        raise CustomException(e, sys)
+
+
+def resolve_artifact_path(name, directory=ARTIFACTS_DIR):
+    """
+    This function will return the path of the file read_artifact loads for the given name. When both a
+    parquet and a csv file exist the newer one is used: the csv left behind by the conversion is ignored,
+    and a csv rewritten afterwards (e.g. by a notebook) is not shadowed by the older parquet file
+    """
+    parquet_path = artifact_path(name, "parquet", directory)
+    csv_path = artifact_path(name, "csv", directory)
+    if not os.path.exists(parquet_path):
+        return csv_path
+    if os.path.exists(csv_path) and os.path.getmtime(csv_path) > os.path.getmtime(
+        parquet_path
+    ):
+        return csv_path
+    return parquet_path
+
+
+def read_artifact(name, directory=ARTIFACTS_DIR, columns=None):
+    """
+    This function will load an artifact from its parquet file, falling back to the csv file
+    for artifacts which have not been converted yet (or whose csv file is newer)
+    :param name: artifact name (e.g. "Data")
+    :param columns: optional subset of columns to read
+    :return: DataFrame
+    """
+    try:
+        path = resolve_artifact_path(name, directory)
+        if path.endswith(".parquet"):
+            return pd.read_parquet(path, columns=columns)
+        return to_columnar(pd.read_csv(path, usecols=columns))
+
+    except Exception as e:
+        raise CustomException(e, sys)
+
+
+def convert_csv_artifacts(
+    names=("Train", "Test", "Data", "latlong"), directory=ARTIFACTS_DIR
+):
+    """
+    This function will write a parquet copy of every given csv artifact
+    :return: list of parquet paths
+    """
+    parquet_paths = []
+    for name in names:
+        df = pd.read_csv(artifact_path(name, "csv", directory))
+        parquet_paths.append(write_artifact(df, name, directory))
+    return parquet_paths
+
+
+def _measure_load(task):
+    import resource
+
+    name, extension, directory = task
+    start = time.perf_counter()
+    if extension == "csv":
+        pd.read_csv(artifact_path(name, "csv", directory))
+    else:
+        pd.read_parquet(artifact_path(name, "parquet", directory))
+    load_time_ms = (time.perf_counter() - start) * 1000
+    # ru_maxrss is reported in KB on Linux
+    peak_rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    return load_time_ms, peak_rss_mb
+
+
+def benchmark_artifact_formats(name, directory=ARTIFACTS_DIR, repeats=3):
+    """
+    This function will compare the load time and peak RSS of the csv and parquet versions of an artifact.
+    Every measurement runs in a fresh process so that the RSS of one load does not leak into the next
+    :return: DataFrame
+    """
+    context = multiprocessing.get_context("spawn")
+    rows = []
+    for extension in ("csv", "parquet"):
+        with context.Pool(processes=1, maxtasksperchild=1) as pool:
+            results = pool.map(
+                _measure_load, [(name, extension, directory)] * repeats, chunksize=1
+            )
+        load_times = [load_time for load_time, _ in results]
+        peak_rss = [rss for _, rss in results]
+        file_size = os.path.getsize(artifact_path(name, extension, directory))
+        rows.append(
+            {
+                "artifact": name,
+                "format": extension,
+                "file_size_mb": file_size / 1e6,
+                "mean_load_time_ms": sum(load_times) / len(load_times),
+                "min_load_time_ms": min(load_times),
+                "peak_rss_mb": max(peak_rss),
+            }
+        )
+    return pd.DataFrame(rows)
+
+
+# USE THE BELOW-MENTIONED CODE TO CONVERT THE CSV ARTIFACTS AND BENCHMARK THEM
+if __name__ == "__main__":
+    convert_csv_artifacts()
+    for artifact_name in ("Data", "latlong"):
+        print(benchmark_artifact_formats(artifact_name))
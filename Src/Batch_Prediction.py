@@ -0,0 +1,178 @@
+import os
+import sys
+import pickle
+import numpy as np
+import pandas as pd
+import xgboost as xgb
+from Src.Exception import CustomException
+
+
+# Column order expected by the regression pipeline (same as create_input_features in the price page)
+FEATURE_COLUMNS = [
+    "balcony",
+    "agePossession",
+    "luxury_category",
+    "floor_category",
+    "Property_Type",
+    "sector",
+    "built_up_area",
+    "bedRoom",
+    "bathroom",
+    "servant room",
+    "furnishing_type",
+]
+
+PREDICTION_COLUMN = "predicted_price"
+
+# UI labels which are mapped to the values used while training the pipeline
+property_type_dict = {"Flat": "flat", "Independent House": "Independent_house"}
+servant_room_options = {"No": 0.0, "Yes": 1.0}
+furnishing_type_options = {
+    "Unfurnished": 0.0,
+    "Semi Furnished": 1.0,
+    "Fully furnished": 2.0,
+}
+
+
+def normalise_balcony(balcony):
+    """
+    '3+ Balconies' -> '3+', 'No Balcony' -> '0', 2.0 -> '2' (the categories of the balcony encoder)
+    """
+    token = balcony.astype(str).str.strip().str.split().str.get(0)
+    token = token.str.replace(r"^(\d+)\.0$", r"\1", regex=True)
+    return token.mask(token == "No", "0")
+
+
+class Batch_Prediction_Class:
+    def __init__(
+        self,
+        pipeline_path="Notebook_And_Dataset/Model Building/Pipeline.pkl",
+        model_path="Artifacts/xgboost_regressor_model.bin",
+        reg_pipeline=None,
+        model=None,
+    ):
+        """
+        Already loaded pipeline/booster objects can be passed in (e.g. from a cache), otherwise
+        they are loaded once from the given paths and reused for every batch
+        """
+        try:
+            if reg_pipeline is None:
+                with open(pipeline_path, "rb") as file:
+                    reg_pipeline = pickle.load(file)
+            if model is None:
+                model = xgb.Booster(model_file=model_path)
+
+            self.reg_pipeline = reg_pipeline
+            self.model = model
+
+        except Exception as e:
+            raise CustomException(e, sys)
+
+    @staticmethod
+    def read_listings(source):
+        """
+        This method will take a csv/parquet file path or a DataFrame and return a DataFrame of listings
+        :param source: file path or DataFrame
+        :return: DataFrame
+        """
+        if isinstance(source, pd.DataFrame):
+            return source
+
+        extension = os.path.splitext(str(source))[1].lower()
+        if extension == ".csv":
+            return pd.read_csv(source)
+        elif extension in (".parquet", ".pq"):
+            return pd.read_parquet(source)
+        else:
+            raise ValueError("Unsupported listings file format: {0}".format(extension))
+
+    @staticmethod
+    def prepare_features(listings_df):
+        """
+        This method will normalise the listing columns to the representation used by the regression
+        pipeline (numeric sector, lowercase property type, numeric servant room/furnishing) and
+        return them in the pipeline's column order
+        :param listings_df: DataFrame of listings
+        :return: DataFrame
+        """
+        missing_columns = [
+            col for col in FEATURE_COLUMNS if col not in listings_df.columns
+        ]
+        if missing_columns:
+            raise ValueError(
+                "Listings are missing the columns: {0}".format(missing_columns)
+            )
+
+        features_df = listings_df[FEATURE_COLUMNS].copy()
+
+        # "sector 7" -> 7.0, numeric sectors are kept as they are
+        sector = features_df["sector"].astype(str).str.extract(r"(\d+(?:\.\d+)?)")[0]
+        features_df["sector"] = sector.astype(float)
+
+        features_df["Property_Type"] = features_df["Property_Type"].replace(
+            property_type_dict
+        )
+        features_df["servant room"] = (
+            features_df["servant room"].replace(servant_room_options).astype(float)
+        )
+        features_df["furnishing_type"] = (
+            features_df["furnishing_type"]
+            .replace(furnishing_type_options)
+            .astype(float)
+        )
+        features_df["balcony"] = normalise_balcony(features_df["balcony"])
+        for col in ["built_up_area", "bedRoom", "bathroom"]:
+            features_df[col] = features_df[col].astype(float)
+
+        return features_df
+
+    def predict_frame(self, features_df):
+        """
+        This method will run the pipeline transform and the booster once over the whole frame
+        :param features_df: DataFrame in the pipeline's column order
+        :return: 1d numpy array of predictions
+        """
+        Input = self.reg_pipeline.transform(features_df)
+        return self.model.predict(xgb.DMatrix(Input))
+
+    def predict_batch(self, source, chunk_size=50000):
+        """
+        This method will take a csv/parquet file path or a DataFrame of listings, score them in chunks
+        of chunk_size rows and return the listings with an added prediction column
+        :param source: file path or DataFrame
+        :param chunk_size: number of rows transformed and scored per call
+        :return: DataFrame
+        """
+        try:
+            listings_df = self.read_listings(source)
+            features_df = self.prepare_features(listings_df)
+
+            predictions = np.empty(len(features_df), dtype=np.float32)
+            for start in range(0, len(features_df), chunk_size):
+                chunk = features_df.iloc[start : start + chunk_size]
+                predictions[start : start + len(chunk)] = self.predict_frame(chunk)
+
+            result_df = listings_df.copy()
+            result_df[PREDICTION_COLUMN] = predictions
+            return result_df
+
+        except Exception as e:
+            raise CustomException(e, sys)
+
+
+# USE THE BELOW-MENTIONED CODE TO REPRICE A FILE OF LISTINGS
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Batch price prediction")
+    parser.add_argument("input", help="csv/parquet file with the listings")
+    parser.add_argument("output", help="csv/parquet file to write the predictions to")
+    parser.add_argument("--chunk-size", type=int, default=50000)
+    args = parser.parse_args()
+
+    batch_obj = Batch_Prediction_Class()
+    predictions_df = batch_obj.predict_batch(args.input, chunk_size=args.chunk_size)
+    if args.output.endswith((".parquet", ".pq")):
+        predictions_df.to_parquet(args.output, index=False)
+    else:
+        predictions_df.to_csv(args.output, index=False)
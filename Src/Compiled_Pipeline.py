@@ -0,0 +1,358 @@
+import time
+import pickle
+import numpy as np
+from sklearn.compose import ColumnTransformer
+from sklearn.preprocessing import (
+    OrdinalEncoder,
+    OneHotEncoder,
+    MinMaxScaler,
+    FunctionTransformer,
+)
+
+
+def _is_missing(value):
+    return value is None or (isinstance(value, float) and value != value)
+
+
+class _Lookup_Op:
+    """
+    Maps every input column through a lookup table (one output column per input column)
+    """
+
+    def __init__(self, tables, unknown_values, missing_values):
+        self.tables = tables
+        self.unknown_values = unknown_values
+        self.missing_values = missing_values
+
+    def __call__(self, X):
+        out = np.empty(X.shape, dtype=np.float64)
+        for j, (table, unknown, missing) in enumerate(
+            zip(self.tables, self.unknown_values, self.missing_values)
+        ):
+            out[:, j] = [
+                missing if _is_missing(value) else table.get(value, unknown)
+                for value in X[:, j]
+            ]
+        return out
+
+    def output_names(self, names):
+        return list(names)
+
+
+class _One_Hot_Op:
+    """
+    Maps one input column to the indicator columns of its kept (not dropped) categories
+    """
+
+    def __init__(self, categories, drop_idx):
+        kept = [i for i in range(len(categories)) if i != drop_idx]
+        self.positions = {categories[i]: k for k, i in enumerate(kept)}
+        self.categories = [categories[i] for i in kept]
+        self.width = len(kept)
+
+    def __call__(self, X):
+        out = np.zeros((X.shape[0], self.width), dtype=np.float64)
+        for i, value in enumerate(X[:, 0]):
+            k = self.positions.get(value)
+            if k is not None:
+                out[i, k] = 1.0
+        return out
+
+    def output_names(self, names):
+        return ["{0}_{1}".format(names[0], category) for category in self.categories]
+
+
+class _Ufunc_Op:
+    def __init__(self, ufunc):
+        self.ufunc = ufunc
+
+    def __call__(self, X):
+        return self.ufunc(X.astype(np.float64))
+
+
+class _Min_Max_Op:
+    def __init__(self, scale, offset, clip, feature_range):
+        self.scale = scale
+        self.offset = offset
+        self.clip = clip
+        self.feature_range = feature_range
+
+    def __call__(self, X):
+        # Same operations (and order) as MinMaxScaler.transform, so the result is bit-identical
+        out = X.astype(np.float64)
+        out *= self.scale
+        out += self.offset
+        if self.clip:
+            np.clip(out, self.feature_range[0], self.feature_range[1], out=out)
+        return out
+
+
+def _passthrough(X):
+    return X.astype(np.float64)
+
+
+def _compile_transformer(transformer):
+    if transformer == "passthrough":
+        return _passthrough
+
+    if isinstance(transformer, OrdinalEncoder):
+        if transformer.handle_unknown != "use_encoded_value":
+            raise NotImplementedError("OrdinalEncoder without use_encoded_value")
+        tables = [
+            {category: float(code) for code, category in enumerate(categories)}
+            for categories in transformer.categories_
+        ]
+        n = len(tables)
+        return _Lookup_Op(
+            tables,
+            [float(transformer.unknown_value)] * n,
+            [float(transformer.encoded_missing_value)] * n,
+        )
+
+    if isinstance(transformer, OneHotEncoder):
+        if getattr(transformer, "_infrequent_enabled", False):
+            raise NotImplementedError("OneHotEncoder with infrequent categories")
+        if len(transformer.categories_) != 1:
+            raise NotImplementedError("OneHotEncoder over several columns")
+        drop_idx = None if transformer.drop_idx_ is None else transformer.drop_idx_[0]
+        return _One_Hot_Op(list(transformer.categories_[0]), drop_idx)
+
+    if isinstance(transformer, FunctionTransformer):
+        # A fitted remainder="passthrough" is stored as FunctionTransformer(func=None) in transformers_
+        if transformer.func is None:
+            return _passthrough
+        if not isinstance(transformer.func, np.ufunc) or transformer.kw_args:
+            raise NotImplementedError("FunctionTransformer with a non numpy function")
+        return _Ufunc_Op(transformer.func)
+
+    if isinstance(transformer, MinMaxScaler):
+        return _Min_Max_Op(
+            transformer.scale_,
+            transformer.min_,
+            transformer.clip,
+            transformer.feature_range,
+        )
+
+    # category_encoders.TargetEncoder: category -> ordinal code -> smoothed target mean
+    if type(transformer).__name__ == "TargetEncoder" and hasattr(
+        transformer, "ordinal_encoder"
+    ):
+        tables, unknown_values, missing_values = [], [], []
+        for col_mapping in transformer.ordinal_encoder.mapping:
+            target_mapping = transformer.mapping[col_mapping["col"]]
+            table = {}
+            for category, code in col_mapping["mapping"].items():
+                if not _is_missing(category) and code in target_mapping.index:
+                    table[category] = float(target_mapping[code])
+            tables.append(table)
+            unknown_values.append(float(target_mapping.get(-1, transformer._mean)))
+            missing_values.append(float(target_mapping.get(-2, transformer._mean)))
+        return _Lookup_Op(tables, unknown_values, missing_values)
+
+    raise NotImplementedError(
+        "Unsupported transformer: {0}".format(type(transformer).__name__)
+    )
+
+
+def _column_positions(columns, column_transformer):
+    if isinstance(columns, slice):
+        return list(range(column_transformer.n_features_in_))[columns]
+    columns = list(np.atleast_1d(columns))
+    if columns and isinstance(columns[0], (bool, np.bool_)):
+        return [i for i, keep in enumerate(columns) if keep]
+    if columns and isinstance(columns[0], str):
+        names = list(column_transformer.feature_names_in_)
+        return [names.index(col) for col in columns]
+    return [int(col) for col in columns]
+
+
+def pipeline_feature_names(pipeline):
+    """
+    This function will return the name of every output column of a fitted pipeline of ColumnTransformers,
+    following each input column through the steps (one-hot columns are named <column>_<category>).
+    Unlike Pipeline.get_feature_names_out, it also works with FunctionTransformer steps
+    :return: list, or None when the pipeline was not fitted on a DataFrame
+    """
+    steps = getattr(pipeline, "steps", [("pipeline", pipeline)])
+    if not hasattr(steps[0][1], "feature_names_in_"):
+        return None
+    names = list(steps[0][1].feature_names_in_)
+    for _, column_transformer in steps:
+        step_names = []
+        for _, transformer, columns in column_transformer.transformers_:
+            if isinstance(transformer, str) and transformer == "drop":
+                continue
+            column_names = [
+                names[col] for col in _column_positions(columns, column_transformer)
+            ]
+            if isinstance(transformer, OneHotEncoder):
+                drop_idx = (
+                    None if transformer.drop_idx_ is None else transformer.drop_idx_[0]
+                )
+                step_names.extend(
+                    "{0}_{1}".format(column_names[0], category)
+                    for i, category in enumerate(transformer.categories_[0])
+                    if i != drop_idx
+                )
+            else:
+                step_names.extend(column_names)
+        names = step_names
+    return names
+
+
+def pipeline_input_categories(pipeline, input_names=None):
+    """
+    This function will return the categories known to the encoders of the first step of a fitted pipeline
+    (ordinal, one-hot and target encoders), for every input column they encode. A value outside them is
+    encoded as NaN or as all zeros
+    :param input_names: names of the input columns, used when the pipeline was not fitted on a DataFrame
+    :return: dict column name -> list of categories
+    """
+    steps = getattr(pipeline, "steps", [("pipeline", pipeline)])
+    column_transformer = steps[0][1]
+    names = list(getattr(column_transformer, "feature_names_in_", input_names))
+    categories = {}
+    for _, transformer, columns in column_transformer.transformers_:
+        if isinstance(transformer, str):
+            continue
+        positions = _column_positions(columns, column_transformer)
+        if isinstance(transformer, (OrdinalEncoder, OneHotEncoder)):
+            column_categories = transformer.categories_
+        elif type(transformer).__name__ == "TargetEncoder" and hasattr(
+            transformer, "ordinal_encoder"
+        ):
+            column_categories = [
+                list(col_mapping["mapping"].keys())
+                for col_mapping in transformer.ordinal_encoder.mapping
+            ]
+        else:
+            continue
+        for position, known in zip(positions, column_categories):
+            categories[names[position]] = [
+                category for category in known if not _is_missing(category)
+            ]
+    return categories
+
+
+class Compiled_Pipeline:
+    """
+    Class holding a fitted Processing_pipeline flattened into lookup tables and NumPy operations.
+    Every stage is a list of (input column positions, operation) whose outputs are concatenated,
+    exactly like the ColumnTransformer it was compiled from
+    """
+
+    def __init__(self, stages, feature_names=None):
+        self.stages = stages
+        self.feature_names = feature_names
+
+    def transform_rows(self, X):
+        """
+        This method will transform a 2d array of raw feature values (columns in the pipeline's input order)
+        :param X: 2d array (object dtype for the categorical values)
+        :return: 2d float64 numpy array
+        """
+        X = np.asarray(X, dtype=object)
+        for stage in self.stages:
+            X = np.hstack([op(X[:, columns]) for columns, op in stage])
+        return X
+
+    def feature_names_out(self):
+        """
+        This method will return the name of every output column (e.g. the exog columns of an OLS fitted
+        on the transformed data), following each input column through the stages
+        """
+        names = list(self.feature_names)
+        for stage in self.stages:
+            stage_names = []
+            for columns, op in stage:
+                column_names = [names[col] for col in columns]
+                # Element-wise operations keep the names of their input columns
+                output_names = getattr(op, "output_names", None)
+                stage_names.extend(
+                    output_names(column_names) if output_names else column_names
+                )
+            names = stage_names
+        return names
+
+    def transform_row(self, row):
+        """
+        This method will transform one row given as a dict (feature name -> value) or a sequence
+        :return: 2d float64 numpy array with one row
+        """
+        if isinstance(row, dict):
+            row = [row[name] for name in self.feature_names]
+        X = np.empty((1, len(row)), dtype=object)
+        X[0, :] = row
+        return self.transform_rows(X)
+
+
+def compile_pipeline(pipeline):
+    """
+    This function will compile a fitted sklearn Pipeline of ColumnTransformers (like the Processing_pipeline
+    of Src/Data_Processing.py) into a Compiled_Pipeline. NotImplementedError is raised for transformers
+    which cannot be compiled, in which case the sklearn pipeline has to be used
+    :return: Compiled_Pipeline
+    """
+    steps = getattr(pipeline, "steps", [("pipeline", pipeline)])
+    stages = []
+    for _, column_transformer in steps:
+        if not isinstance(column_transformer, ColumnTransformer):
+            raise NotImplementedError("Only ColumnTransformer steps can be compiled")
+        if getattr(column_transformer, "sparse_output_", False):
+            raise NotImplementedError("Sparse ColumnTransformer output")
+
+        stage = []
+        for _, transformer, columns in column_transformer.transformers_:
+            if transformer == "drop":
+                continue
+            positions = _column_positions(columns, column_transformer)
+            if positions:
+                stage.append((positions, _compile_transformer(transformer)))
+        stages.append(stage)
+
+    first_step = steps[0][1]
+    feature_names = (
+        list(first_step.feature_names_in_)
+        if hasattr(first_step, "feature_names_in_")
+        else None
+    )
+    return Compiled_Pipeline(stages, feature_names)
+
+
+def load_compiled_pipeline(file_path):
+    """
+    This function will load a pickled Processing_pipeline and compile it (registry loader).
+    None is returned when the pipeline holds transformers which cannot be compiled
+    """
+    with open(file_path, "rb") as file:
+        pipeline = pickle.load(file)
+    try:
+        return compile_pipeline(pipeline)
+    except NotImplementedError:
+        return None
+
+
+def benchmark_single_row(pipeline, compiled, frame, repeats=200):
+    """
+    This function will compare the single row latency of pipeline.transform (one row DataFrame)
+    against the compiled pipeline
+    :return: dict of mean latencies in microseconds and the speedup
+    """
+    X = frame.to_numpy(dtype=object)
+    n_rows = min(repeats, len(frame))
+
+    start = time.perf_counter()
+    for i in range(n_rows):
+        pipeline.transform(frame.iloc[[i]])
+    sklearn_us = (time.perf_counter() - start) / n_rows * 1e6
+
+    start = time.perf_counter()
+    for i in range(n_rows):
+        compiled.transform_row(X[i])
+    compiled_us = (time.perf_counter() - start) / n_rows * 1e6
+
+    return {
+        "sklearn_us_per_row": sklearn_us,
+        "compiled_us_per_row": compiled_us,
+        "speedup": sklearn_us / compiled_us,
+    }
@@ -0,0 +1,255 @@
+import os
+import sys
+import time
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+from zenml import step
+from Src.Exception import CustomException
+from Src.Artifact_Store import write_artifact
+
+
+FLAT = "flat"
+INDEPENDENT_HOUSE = "Independent_house"
+
+# Raw scrapes cleaned ahead of the ingestion, with the name of the cleaned artifact. Flats.csv (read by
+# Flats_Cleaning.ipynb) is not shipped in Raw_data, so the flats scrape is skipped until it is added
+RAW_LISTINGS = {
+    "Cleaned_Flats": ("Notebook_And_Dataset/Raw_data/Flats.csv", FLAT),
+    "Cleaned_IH": (
+        "Notebook_And_Dataset/Raw_data/Independent_Houses.csv",
+        INDEPENDENT_HOUSE,
+    ),
+}
+
+SOCIETY_RATING_PATTERN = r"\d+(\.\d+)?\s?★"
+
+
+def clean_society(society):
+    """
+    '★ 4.2 Bptp Visionnaire' style names -> rating removed, stripped and lowercased
+    """
+    return (
+        society.astype(str)
+        .str.replace(SOCIETY_RATING_PATTERN, "", regex=True)
+        .str.strip()
+        .str.lower()
+    )
+
+
+def parse_price(price):
+    """
+    '5.25 Crore' -> 5.25 and '45 Lac' -> 0.45 (price in crore, rounded to 2 decimals)
+    """
+    parts = price.str.extract(r"^\s*([\d.]+)\s+(\S+)")
+    value = pd.to_numeric(parts[0], errors="coerce")
+    value = value.where(parts[1] != "Lac", value / 100)
+    # Python's round like the notebooks: Series.round scales by 100 first, which rounds some halves
+    # (e.g. 2.675) the other way
+    return value.map(lambda v: round(v, 2))
+
+
+def parse_rate(rate):
+    """
+    '₹ 5,000/sq.ft.' -> 5000.0
+    """
+    value = rate.str.extract(r"^\S+\s+([\d,.]+)/")[0].str.replace(",", "", regex=False)
+    return pd.to_numeric(value, errors="coerce")
+
+
+def first_token(values):
+    return values.astype("string").str.strip().str.split().str.get(0)
+
+
+def parse_count(values):
+    """
+    '3 Bedrooms' -> 3.0
+    """
+    return pd.to_numeric(first_token(values), errors="coerce")
+
+
+def parse_balcony(values):
+    """
+    'No Balcony' -> '0', '3+ Balconies' -> '3+' (kept as text, 3+ is a category)
+    """
+    token = first_token(values)
+    return token.mask(token == "No", "0")
+
+
+def parse_floor_number(values):
+    """
+    '14th of 14 Floors' -> 14, 'Ground' / 'Lower' -> 0, 'Basement' -> -1
+    """
+    token = first_token(values)
+    floor = pd.to_numeric(token.str.extract(r"^(\d+)")[0], errors="coerce")
+    floor = floor.mask(token.isin(["Ground", "Lower"]), 0)
+    floor = floor.mask(token == "Basement", -1)
+    return floor
+
+
+class Listing_Cleaning_Class:
+    """
+    Class implementing the cleaning of Flats_Cleaning.ipynb and Independent_House_Cleaning.ipynb with
+    vectorised string operations. Statistics used for imputation (modes / medians) are computed once on
+    the whole scrape with global_statistics, so every shard is cleaned with the same values
+    """
+
+    def __init__(self, property_type=FLAT):
+        if property_type not in (FLAT, INDEPENDENT_HOUSE):
+            raise ValueError("Unknown property type: {0}".format(property_type))
+        self.property_type = property_type
+
+    def global_statistics(self, raw_df):
+        if self.property_type == FLAT:
+            on_request = raw_df["price"] == "Price on Request"
+            return {
+                "price_mode": raw_df.loc[~on_request, "price"].mode()[0],
+                "area_mode": raw_df["area"].mode()[0],
+                "floor_mode": raw_df["floorNum"].mode()[0],
+            }
+        rate = parse_rate(raw_df["rate"].fillna("₹ 0/sq.ft."))
+        return {
+            "rate_median": rate.median(),
+            "floor_mode": raw_df["noOfFloor"].mode()[0],
+        }
+
+    def clean_shard(self, raw_df, statistics):
+        """
+        This method will clean one shard of raw listings
+        :param raw_df: raw listings (already de-duplicated)
+        :param statistics: dict returned by global_statistics
+        :return: DataFrame
+        """
+        df = raw_df.drop(["property_id", "link"], axis=1, errors="ignore")
+        df = df[df["price"] != "Price on Request"].copy()
+        df["society"] = clean_society(df["society"])
+
+        if self.property_type == FLAT:
+            df["price"] = parse_price(df["price"].fillna(statistics["price_mode"]))
+            df["area"] = parse_rate(df["area"].fillna(statistics["area_mode"]))
+            df = df.rename(columns={"area": "Price_Per_SQFT"})
+        else:
+            # Only the missing society (read as 'nan') becomes 'independent'
+            df["society"] = df["society"].mask(df["society"] == "nan", "independent")
+            df["price"] = parse_price(df["price"])
+            rate = parse_rate(df["rate"].fillna("₹ 0/sq.ft."))
+            df["Price_Per_SQFT"] = rate.replace(0, statistics["rate_median"])
+            df = df.drop(columns=["rate"])
+
+        # Listings without any of bedroom / bathroom / balcony details are dropped
+        all_missing = df[["bedRoom", "bathroom", "balcony"]].isna().all(axis=1)
+        df = df[~all_missing].copy()
+
+        df["bedRoom"] = parse_count(df["bedRoom"])
+        df["bathroom"] = parse_count(df["bathroom"])
+        df["balcony"] = parse_balcony(df["balcony"])
+        df["additionalRoom"] = df["additionalRoom"].fillna("Not available").str.lower()
+
+        if self.property_type == FLAT:
+            df["floorNum"] = parse_floor_number(
+                df["floorNum"].fillna(statistics["floor_mode"])
+            )
+            # Same integer arithmetic as the notebook: int(price * 1e7) / int(price per sq.ft)
+            price_value = np.trunc(df["price"] * 10000000)
+            price_psqft = np.trunc(df["Price_Per_SQFT"])
+            df.insert(loc=4, column="Area", value=np.trunc(price_value / price_psqft))
+            df.insert(loc=1, column="Property_Type", value=FLAT)
+        else:
+            df = df.rename(columns={"noOfFloor": "floorNum", "area": "Area"})
+            # '2 Floors' -> 2.0, numeric like the floorNum of the flats
+            floors = first_token(df["floorNum"].fillna(statistics["floor_mode"]))
+            df["floorNum"] = pd.to_numeric(floors, errors="coerce")
+            df["facing"] = df["facing"].fillna("NA")
+            df["Area"] = df["price"] * 10000000 / df["Price_Per_SQFT"]
+            df.insert(loc=1, column="Property_Type", value=INDEPENDENT_HOUSE)
+
+        return df
+
+    def clean_listings(self, raw_df, n_workers=None, shard_rows=250000):
+        """
+        This method will clean a raw scrape, splitting it in shards of shard_rows rows cleaned in a process pool
+        :param raw_df: raw listings
+        :param n_workers: number of processes (None = number of cores, 1 = no pool)
+        :return: DataFrame
+        """
+        try:
+            raw_df = raw_df.drop_duplicates()
+            statistics = self.global_statistics(raw_df)
+
+            shards = [
+                raw_df.iloc[start : start + shard_rows]
+                for start in range(0, len(raw_df), shard_rows)
+            ]
+            if n_workers == 1 or len(shards) <= 1:
+                cleaned = [self.clean_shard(shard, statistics) for shard in shards]
+            else:
+                with ProcessPoolExecutor(max_workers=n_workers) as executor:
+                    cleaned = list(
+                        executor.map(
+                            self.clean_shard, shards, [statistics] * len(shards)
+                        )
+                    )
+
+            return pd.concat(cleaned).reset_index(drop=True)
+
+        except Exception as e:
+            raise CustomException(e, sys)
+
+
+def clean_raw_file(raw_path, property_type, output_name=None, n_workers=None):
+    """
+    This function will clean a raw csv scrape and store it as an artifact when output_name is given
+    :return: DataFrame
+    """
+    try:
+        raw_df = pd.read_csv(raw_path)
+        cleaned_df = Listing_Cleaning_Class(property_type).clean_listings(
+            raw_df, n_workers=n_workers
+        )
+        if output_name is not None:
+            write_artifact(cleaned_df, output_name)
+        return cleaned_df
+
+    except Exception as e:
+        raise CustomException(e, sys)
+
+
+def benchmark_cleaning(raw_path, property_type, repeats=1, n_workers=None):
+    """
+    This function will report the cleaning throughput of a raw scrape, replicated repeats times
+    :return: dict
+    """
+    raw_df = pd.read_csv(raw_path)
+    # Suffixing the listing id keeps the replicated rows from being removed as duplicates
+    raw_df = pd.concat(
+        [
+            raw_df.assign(property_id=raw_df["property_id"].astype(str) + "-" + str(i))
+            for i in range(repeats)
+        ],
+        ignore_index=True,
+    )
+    start = time.perf_counter()
+    cleaned_df = Listing_Cleaning_Class(property_type).clean_listings(
+        raw_df, n_workers=n_workers
+    )
+    elapsed = time.perf_counter() - start
+    return {
+        "raw_rows": len(raw_df),
+        "cleaned_rows": len(cleaned_df),
+        "seconds": elapsed,
+        "rows_per_second": len(raw_df) / elapsed,
+    }
+
+
+# Not cached: the job of the step is writing the cleaned artifact, which a cache hit would skip
+@step(enable_cache=False)
+def clean_listings(raw_path: str, property_type: str, output_name: str) -> pd.DataFrame:
+    return clean_raw_file(raw_path, property_type, output_name)
+
+
+# USE THE BELOW-MENTIONED CODE TO CLEAN THE RAW SCRAPES
+if __name__ == "__main__":
+    for name, (path, listing_type) in RAW_LISTINGS.items():
+        if os.path.exists(path):
+            print(name, clean_raw_file(path, listing_type, name).shape)
+            print(benchmark_cleaning(path, listing_type, repeats=10))
@@ -1,9 +1,12 @@
 import os
 import sys
+import glob
 import pandas as pd
 import numpy as np
 from zenml import step
 from Src.Exception import CustomException
+from Src.Artifact_Store import write_artifact
+from Src.Deduplication import Listing_Deduplication_Class
 from typing_extensions import Annotated
 from typing import Tuple
 from sklearn.preprocessing import (
@@ -15,53 +18,141 @@ from sklearn.preprocessing import (
 from sklearn.model_selection import train_test_split
 
 
+class _Shard_Writer:
+    """
+    Class which appends rows to numbered csv shards, starting a new shard every shard_rows rows
+    """
+
+    def __init__(self, directory, prefix, shard_rows):
+        self.directory = directory
+        self.prefix = prefix
+        self.shard_rows = shard_rows
+        self.paths = []
+        self.rows_in_shard = shard_rows
+
+        # Removing the shards of a previous run so that rows are not appended twice
+        os.makedirs(directory, exist_ok=True)
+        for old_shard in glob.glob(os.path.join(directory, prefix + "-*.csv")):
+            os.remove(old_shard)
+
+    def append(self, df):
+        while len(df) > 0:
+            if self.rows_in_shard >= self.shard_rows:
+                self.paths.append(
+                    os.path.join(
+                        self.directory,
+                        "{0}-{1:05d}.csv".format(self.prefix, len(self.paths)),
+                    )
+                )
+                self.rows_in_shard = 0
+
+            part = df.iloc[: self.shard_rows - self.rows_in_shard]
+            part.to_csv(
+                self.paths[-1],
+                mode="a",
+                index=False,
+                header=self.rows_in_shard == 0,
+            )
+            self.rows_in_shard += len(part)
+            df = df.iloc[len(part) :]
+
+
 class DIP:
     def __int__(self):
         pass
 
-    def Data_Ingest_Process(self, path):
+    def Data_Ingest_Process(self, path, deduplicate=False):
         """
         This method will take the file path as input and will load the data from the given path,
         perform train, test split and save the files in the specified directory
         :param path: file path
+        :param deduplicate: merge the near-duplicate listings first (report stored as Duplicate_Clusters)
         :return: train and testing dataframe
         """
         try:
             # Reading the data from the csv file
             df = pd.read_csv(path)
 
+            # Duplicates are removed before the split so that a listing can not be in both sets
+            if deduplicate:
+                df, clusters = Listing_Deduplication_Class().deduplicate(df)
+                write_artifact(clusters, "Duplicate_Clusters")
+
             # Performing the train test split
             Train_df, Test_df = train_test_split(df, train_size=0.8, shuffle=True)
 
-            # Let's make the directory to store the files
-            os.makedirs(
-                os.path.dirname(os.path.join("Artifacts", "Train.csv")), exist_ok=True
-            )
-            os.makedirs(
-                os.path.dirname(os.path.join("Artifacts", "Test.csv")), exist_ok=True
-            )
+            # Let's now store the files as typed parquet artifacts
+            write_artifact(Train_df, "Train")
+            write_artifact(Test_df, "Test")
 
-            # Let's now store the files
-            Train_df.to_csv(
-                os.path.join("Artifacts", "Train.csv"), index=False, header=True
+            return Train_df, Test_df
+
+        except Exception as e:
+            raise CustomException(e, sys)
+
+    def Data_Ingest_Stream(
+        self,
+        path,
+        chunk_size=100000,
+        test_size=0.2,
+        shard_rows=1000000,
+        output_dir="Artifacts",
+    ):
+        """
+        This method will read the csv file in chunks and assign every row to the train or test split by
+        a hash of its content, so the split is deterministic and the peak memory only depends on chunk_size.
+        Rows are appended to csv shards of at most shard_rows rows
+        :param path: file path
+        :param chunk_size: number of rows read at a time
+        :param test_size: fraction of the rows going to the test split
+        :param shard_rows: maximum number of rows per output shard
+        :return: list of train shard paths, list of test shard paths
+        """
+        try:
+            train_writer = _Shard_Writer(
+                os.path.join(output_dir, "Train_Shards"), "train", shard_rows
             )
-            Test_df.to_csv(
-                os.path.join("Artifacts", "Test.csv"), index=False, header=True
+            test_writer = _Shard_Writer(
+                os.path.join(output_dir, "Test_Shards"), "test", shard_rows
             )
 
-            return Train_df, Test_df
+            # Values are read as text so that the row hash does not depend on the dtypes inferred per chunk
+            for chunk in pd.read_csv(
+                path, chunksize=chunk_size, dtype=str, keep_default_na=False
+            ):
+                row_hash = pd.util.hash_pandas_object(chunk, index=False).values
+                buckets = row_hash % 10000
+                is_test = buckets < int(test_size * 10000)
+                train_writer.append(chunk[~is_test])
+                test_writer.append(chunk[is_test])
+
+            return train_writer.paths, test_writer.paths
 
         except Exception as e:
             raise CustomException(e, sys)
 
 
 @step
-def ingest_data(path: str) -> Tuple[pd.DataFrame, pd.DataFrame]:
+def ingest_data(
+    path: str, data_hash: str, code_hash: str, deduplicate: bool = False
+) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    # data_hash and code_hash are not used by the step, they only make the content of the file and the
+    # source of the ingestion modules part of the cache key
     ingest_obj = DIP()
-    Train_df, Test_df = ingest_obj.Data_Ingest_Process(path)
+    Train_df, Test_df = ingest_obj.Data_Ingest_Process(path, deduplicate=deduplicate)
     return Train_df, Test_df
 
 
+@step
+def ingest_data_stream(path: str, data_hash: str = "") -> Tuple[
+    Annotated[list, "Train_Shards"],
+    Annotated[list, "Test_Shards"],
+]:
+    ingest_obj = DIP()
+    train_shards, test_shards = ingest_obj.Data_Ingest_Stream(path)
+    return train_shards, test_shards
+
+
 # USE THE BELOW-MENTIONED CODE TO CHECK IF EVERYTHING IS WORKING FINE
 # if __name__ == "__main__":
 #     ingest_obj = DIP()
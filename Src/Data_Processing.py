@@ -135,7 +135,8 @@ class Data_Processing_Class:
             lambda_value = yeojohnson(y_train)[1]
             y_train_transformed = yeojohnson(y_train, lambda_value)
 
-            # Saving the trained pipeline
+            # Saving the trained pipeline (also kept on the object for the pipeline step)
+            self.processing_pipeline = Processing_pipeline
             pipeline_path = os.path.join("Artifacts", "pipeline.pkl")
             with open(pipeline_path, "wb") as file:
                 pickle.dump(Processing_pipeline, file)
@@ -147,17 +148,27 @@ class Data_Processing_Class:
 
 
 @step
-def process_data_step(Train_df: pd.DataFrame, Test_df: pd.DataFrame) -> Tuple[
+def process_data_step(
+    Train_df: pd.DataFrame, Test_df: pd.DataFrame, code_hash: str
+) -> Tuple[
     Annotated[np.ndarray, "X_train"],
     Annotated[np.ndarray, "X_test"],
     Annotated[np.ndarray, "y_train"],
     Annotated[np.ndarray, "y_test"],
+    Annotated[Pipeline, "Processing_pipeline"],
 ]:
+    # code_hash is not used by the step, it only makes the source of Data_Processing part of the cache key
     try:
         process_data_obj = Data_Processing_Class()
         X_train, X_test, y_train, y_test = process_data_obj.Process_data_method(
             Train_df, Test_df
         )
-        return X_train, X_test, y_train, y_test
+        return (
+            X_train,
+            X_test,
+            y_train,
+            y_test,
+            process_data_obj.processing_pipeline,
+        )
     except Exception as e:
         raise CustomException(e, sys)
@@ -0,0 +1,316 @@
+import sys
+import time
+import numpy as np
+import pandas as pd
+from Src.Exception import CustomException
+
+
+# Free text compared with MinHash (the columns missing from a dataset are skipped)
+TEXT_COLUMNS = ("society", "description")
+
+# Society values standing for "no society" (normalised): shared by unrelated listings, so they are not
+# used as a text signal
+PLACEHOLDER_SOCIETIES = ("independent", "not applicable", "na", "nan", "none")
+
+# Only listings of the same block (sector, property type, rooms and price band) are compared
+BLOCK_COLUMNS = ("sector", "Property_Type", "bedRoom", "bathroom")
+PRICE_BAND_WIDTH = 0.1
+
+NUM_PERMUTATIONS = 64
+LSH_BANDS = 16
+SIMILARITY_THRESHOLD = 0.8
+
+_MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64((1 << 32) - 1)
+
+
+def normalise_text(values):
+    """
+    'Bptp   Visionnaire, Ph-2' -> 'bptp visionnaire ph 2'
+    """
+    return (
+        values.astype("string")
+        .str.lower()
+        .str.replace(r"[^a-z0-9]+", " ", regex=True)
+        .str.strip()
+    )
+
+
+def price_band(price, width=PRICE_BAND_WIDTH):
+    """
+    Index of the price on a logarithmic scale of ratio (1 + width), -1 for missing or non positive prices
+    """
+    price = np.asarray(price, dtype=float)
+    band = np.full(len(price), -1, dtype=np.int64)
+    valid = price > 0
+    band[valid] = np.floor(np.log(price[valid]) / np.log1p(width)).astype(np.int64)
+    return band
+
+
+class Listing_Deduplication_Class:
+    """
+    Class finding near-duplicate listings in roughly linear time. Listings are blocked on sector, property type,
+    bedrooms, bathrooms and price band, every listing gets a MinHash signature of its normalised society name
+    and description, and the signatures are split in LSH bands: only listings sharing a block and a band
+    bucket are compared. Candidate pairs are checked with the exact Jaccard similarity of their shingles, and
+    a listing is only merged into a cluster when it matches the listing the cluster keeps (no chaining).
+    Placeholder society values ('independent', ...) are left out of the shingles, so a listing without any
+    other text is never merged. Without any of the text columns (e.g. Combined_CleanData_V4) listings can not
+    be told apart from similar ones, so only exact duplicates are removed
+    """
+
+    def __init__(
+        self,
+        text_columns=TEXT_COLUMNS,
+        block_columns=BLOCK_COLUMNS,
+        price_column="price",
+        price_band_width=PRICE_BAND_WIDTH,
+        num_permutations=NUM_PERMUTATIONS,
+        bands=LSH_BANDS,
+        threshold=SIMILARITY_THRESHOLD,
+        shingle_size=3,
+        seed=0,
+    ):
+        if num_permutations % bands != 0:
+            raise ValueError("num_permutations has to be a multiple of bands")
+        self.text_columns = list(text_columns)
+        self.block_columns = list(block_columns)
+        self.price_column = price_column
+        self.price_band_width = price_band_width
+        self.bands = bands
+        self.rows_per_band = num_permutations // bands
+        self.threshold = threshold
+        self.shingle_size = shingle_size
+
+        # Universal hashing (a * x + b) mod p, with a * x + b kept below 2**64
+        rng = np.random.default_rng(seed)
+        self.a = rng.integers(1, 1 << 31, num_permutations, dtype=np.uint64)
+        self.b = rng.integers(0, 1 << 31, num_permutations, dtype=np.uint64)
+
+    def _word_shingles(self, text, prefix, size):
+        """
+        Word n-grams of every row, as a Series indexed by row position
+        """
+        text = normalise_text(text)
+        words = text.str.split().explode().dropna()
+        grams = words
+        if size > 1:
+            by_row = words.groupby(level=0)
+            grams = words.str.cat(
+                [by_row.shift(-i) for i in range(1, size)], sep=" "
+            ).dropna()
+            # Texts shorter than size words are kept as one shingle
+            short = (text.str.split().str.len() < size) & (text != "")
+            grams = pd.concat([grams, text[short.fillna(False)]])
+        return prefix + grams.astype(str)
+
+    def shingles(self, df):
+        """
+        This method will return the row positions and the distinct 32 bit hashes of the shingles of every
+        listing
+        :param df: DataFrame with a RangeIndex and at least one of the text columns
+        :return: (rows, hashes) numpy arrays sorted by row then hash
+        """
+        parts = []
+        for col in self.text_columns:
+            if col in df.columns:
+                text = df[col]
+                size = self.shingle_size
+                if col == "society":
+                    # Society names are short, their words are enough to compare them
+                    size = 1
+                    text = text.mask(normalise_text(text).isin(PLACEHOLDER_SOCIETIES))
+                parts.append(self._word_shingles(text, col + ":", size))
+        tokens = pd.concat(parts)
+
+        rows = tokens.index.to_numpy(dtype=np.int64)
+        hashes = pd.util.hash_array(tokens.to_numpy(dtype=object)) & _MAX_HASH
+        order = np.lexsort((hashes, rows))
+        rows, hashes = rows[order], hashes[order]
+        distinct = np.r_[True, (rows[1:] != rows[:-1]) | (hashes[1:] != hashes[:-1])]
+        return rows[distinct], hashes[distinct]
+
+    def signatures(self, rows, hashes, n_rows):
+        """
+        This method will compute the MinHash signature of every listing
+        :return: (n_rows, num_permutations) uint64 array, rows without any shingle are set to the maximum value
+        """
+        signatures = np.full(
+            (n_rows, len(self.a)), np.iinfo(np.uint64).max, dtype=np.uint64
+        )
+        if len(rows) == 0:
+            return signatures
+        starts = np.flatnonzero(np.r_[True, rows[1:] != rows[:-1]])
+        for i in range(len(self.a)):
+            permuted = (self.a[i] * hashes + self.b[i]) % _MERSENNE_PRIME
+            signatures[rows[starts], i] = np.minimum.reduceat(permuted, starts)
+        return signatures
+
+    def blocks(self, df):
+        keys = pd.DataFrame(
+            {col: df[col] for col in self.block_columns if col in df.columns}
+        )
+        if self.price_column in df.columns:
+            keys["price_band"] = price_band(
+                df[self.price_column], self.price_band_width
+            )
+        if keys.shape[1] == 0:
+            return np.zeros(len(df), dtype=np.int64)
+        return (
+            keys.groupby(list(keys.columns), dropna=False, sort=False)
+            .ngroup()
+            .to_numpy()
+        )
+
+    def candidate_pairs(self, signatures, blocks):
+        """
+        This method will return the pairs of listings sharing a block and at least one LSH bucket.
+        Inside a bucket every listing is paired with the first listing of the bucket and with the previous one
+        :return: (n_pairs, 2) array with i < j
+        """
+        has_signature = signatures[:, 0] != np.iinfo(np.uint64).max
+        positions = np.flatnonzero(has_signature)
+        pairs = []
+        for band in range(self.bands):
+            start = band * self.rows_per_band
+            columns = slice(start, start + self.rows_per_band)
+            band_hash = pd.util.hash_pandas_object(
+                pd.DataFrame(signatures[positions, columns]), index=False
+            ).to_numpy()
+            bucket = (
+                pd.DataFrame({"block": blocks[positions], "band": band_hash})
+                .groupby(["block", "band"], sort=False)
+                .ngroup()
+                .to_numpy()
+            )
+            order = np.lexsort((positions, bucket))
+            bucket, ordered = bucket[order], positions[order]
+            same_bucket = bucket[1:] == bucket[:-1]
+            first = ordered[np.searchsorted(bucket, bucket, side="left")]
+            pairs.append(
+                np.column_stack((ordered[:-1][same_bucket], ordered[1:][same_bucket]))
+            )
+            pairs.append(np.column_stack((first, ordered))[first != ordered])
+        if not pairs:
+            return np.empty((0, 2), dtype=np.int64)
+        return np.unique(np.concatenate(pairs), axis=0)
+
+    @staticmethod
+    def jaccard(pairs, rows, hashes, n_rows):
+        """
+        This method will compute the exact Jaccard similarity of the shingle sets of every pair
+        :return: 1d array
+        """
+        bounds = np.searchsorted(rows, np.arange(n_rows + 1))
+        similarity = np.zeros(len(pairs))
+        for k, (i, j) in enumerate(pairs):
+            first = hashes[bounds[i] : bounds[i + 1]]
+            second = hashes[bounds[j] : bounds[j + 1]]
+            common = np.intersect1d(first, second, assume_unique=True).size
+            similarity[k] = common / (first.size + second.size - common)
+        return similarity
+
+    @staticmethod
+    def assign_clusters(pairs, similarity, n_rows):
+        """
+        This method will merge every listing into the most similar earlier listing it matches, provided
+        that listing is itself kept, so every member of a cluster matches the listing the cluster keeps
+        :param pairs: (n_pairs, 2) matching pairs with i < j
+        :return: 1d array with the position of the kept listing of every listing
+        """
+        labels = np.arange(n_rows)
+        # Pairs by increasing j, the most similar first: a listing is final once its pairs are processed
+        order = np.lexsort((-similarity, pairs[:, 1]))
+        for i, j in pairs[order]:
+            if labels[j] == j and labels[i] == i:
+                labels[j] = i
+        return labels
+
+    def deduplicate(self, df):
+        """
+        This method will merge the near-duplicate listings, keeping the first listing of every cluster
+        :param df: listings
+        :return: (deduplicated DataFrame, DataFrame reporting every merged cluster)
+        """
+        try:
+            data = df.reset_index(drop=True)
+            if not any(col in data.columns for col in self.text_columns):
+                labels = (
+                    data.groupby(list(data.columns), dropna=False, sort=False)
+                    .ngroup()
+                    .to_numpy()
+                )
+            else:
+                rows, hashes = self.shingles(data)
+                signatures = self.signatures(rows, hashes, len(data))
+                pairs = self.candidate_pairs(signatures, self.blocks(data))
+
+                # The MinHash estimate (standard error about 0.05) discards most pairs before the exact check
+                estimate = (signatures[pairs[:, 0]] == signatures[pairs[:, 1]]).mean(
+                    axis=1
+                )
+                pairs = pairs[estimate >= self.threshold - 0.15]
+                similarity = self.jaccard(pairs, rows, hashes, len(data))
+                matches = similarity >= self.threshold
+                labels = self.assign_clusters(
+                    pairs[matches], similarity[matches], len(data)
+                )
+
+            keep = ~pd.Series(labels).duplicated().to_numpy()
+            return df[keep], self.cluster_report(df, labels)
+
+        except Exception as e:
+            raise CustomException(e, sys)
+
+    def cluster_report(self, df, labels):
+        """
+        This method will describe every cluster of more than one listing
+        :return: DataFrame with one row per cluster
+        """
+        data = df.reset_index(drop=True).assign(
+            cluster=labels, original_index=df.index.astype(str)
+        )
+        sizes = data.groupby("cluster")["cluster"].transform("size")
+        merged = data[sizes > 1]
+
+        groups = merged.groupby("cluster", sort=False)
+        report = groups.agg(
+            size=("original_index", "size"),
+            kept_index=("original_index", "first"),
+            merged_indices=("original_index", ",".join),
+        )
+        for col in self.block_columns + self.text_columns[:1]:
+            if col in merged.columns:
+                report[col] = groups[col].first()
+        if self.price_column in merged.columns:
+            report["price_min"] = groups[self.price_column].min()
+            report["price_max"] = groups[self.price_column].max()
+        return report.reset_index().sort_values("size", ascending=False)
+
+
+def benchmark_deduplication(df, repeats=10):
+    """
+    This function will report the deduplication throughput (rows per second) on the data replicated
+    repeats times (every replicated listing is an exact duplicate of the original)
+    :return: dict
+    """
+    data = pd.concat([df] * repeats, ignore_index=True)
+    start = time.perf_counter()
+    deduplicated_df, clusters = Listing_Deduplication_Class().deduplicate(data)
+    elapsed = time.perf_counter() - start
+    return {
+        "rows": len(data),
+        "kept_rows": len(deduplicated_df),
+        "clusters": len(clusters),
+        "seconds": elapsed,
+        "rows_per_second": len(data) / elapsed,
+    }
+
+
+# USE THE BELOW-MENTIONED CODE TO CHECK THE DUPLICATE CLUSTERS OF A DATASET
+# if __name__ == "__main__":
+#     listings_df = pd.read_csv("Notebook_And_Dataset/Cleaned_datasets/Combined_CleanData_V2.csv")
+#     deduplicated_df, clusters = Listing_Deduplication_Class().deduplicate(listings_df)
+#     print(len(listings_df), len(deduplicated_df))
+#     print(clusters.head(10))
+#     print(benchmark_deduplication(listings_df))
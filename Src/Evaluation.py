@@ -1,18 +1,31 @@
+import os
 import mlflow
 import numpy as np
 import pandas as pd
-from sklearn.base import RegressorMixin
+from sklearn.base import RegressorMixin, clone
 from typing_extensions import Annotated
 from zenml import step
 from zenml.client import Client
 from Src.Exception import CustomException
-from sklearn.model_selection import cross_val_score, KFold
+from sklearn.model_selection import cross_validate, KFold
 from sklearn.metrics import mean_absolute_error, r2_score
 from typing import Tuple
 
 # experiment_tracker = Client().active_stack.experiment_tracker
 
 
+def fold_thread_budget(model, n_parallel_folds):
+    """
+    This function will return a copy of the model whose own thread count is limited so that
+    n_parallel_folds fits running at the same time do not oversubscribe the cores
+    """
+    threads_per_fold = max(1, (os.cpu_count() or 1) // n_parallel_folds)
+    cv_model = clone(model)
+    if "n_jobs" in cv_model.get_params():
+        cv_model.set_params(n_jobs=threads_per_fold)
+    return cv_model, threads_per_fold
+
+
 # @step(experiment_tracker=experiment_tracker.name)
 @step
 def evaluation(
@@ -21,7 +34,14 @@ def evaluation(
     y_train: np.ndarray,
     X_test: np.ndarray,
     y_test: np.ndarray,
-) -> Tuple[Annotated[float, "R2_Score"], Annotated[float, "MAE"]]:
+    code_hash: str,
+    n_splits: int = 10,
+    n_parallel_folds: int = 0,
+) -> Tuple[
+    Annotated[float, "R2_Score"],
+    Annotated[float, "MAE"],
+    Annotated[dict, "Fold_Report"],
+]:
     """
     Args:
         model: RegressorMixin
@@ -29,9 +49,13 @@ def evaluation(
         X_test: np.ndarray
         y_train: np.ndarray
         y_test: np.ndarray
+        code_hash: str (hash of Src.Evaluation, only used as part of the cache key)
+        n_splits: int (number of K-fold splits)
+        n_parallel_folds: int (folds fitted at the same time, 0 = one per core up to n_splits)
     Returns:
         r2_score: float
         rmse: float
+        fold_report: dict (per fold R2 score, fit and score time)
     """
     try:
         # Getting predictions
@@ -39,11 +63,29 @@ def evaluation(
         y_pred = np.expm1(y_pred)
         MAE_value = mean_absolute_error(y_test, y_pred)
 
-        # K-fold cross-validation
-        kfold = KFold(n_splits=10, shuffle=True, random_state=42)
-        scores = cross_val_score(model, X_train, y_train, cv=kfold, scoring="r2")
-        Avg_R2 = scores.mean()
-        return Avg_R2, MAE_value
+        # K-fold cross-validation, with the folds fitted in parallel processes
+        n_parallel_folds = n_parallel_folds or min(n_splits, os.cpu_count() or 1)
+        cv_model, threads_per_fold = fold_thread_budget(model, n_parallel_folds)
+        kfold = KFold(n_splits=n_splits, shuffle=True, random_state=42)
+        cv_results = cross_validate(
+            cv_model,
+            X_train,
+            y_train,
+            cv=kfold,
+            scoring="r2",
+            n_jobs=n_parallel_folds,
+        )
+        Avg_R2 = float(cv_results["test_score"].mean())
+
+        fold_report = {
+            "fold": list(range(1, n_splits + 1)),
+            "r2": cv_results["test_score"].tolist(),
+            "fit_time_s": cv_results["fit_time"].tolist(),
+            "score_time_s": cv_results["score_time"].tolist(),
+            "n_parallel_folds": n_parallel_folds,
+            "threads_per_fold": threads_per_fold,
+        }
+        return Avg_R2, MAE_value, fold_report
 
     except Exception as e:
         raise e
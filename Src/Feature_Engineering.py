@@ -0,0 +1,230 @@
+import re
+import sys
+import time
+import numpy as np
+import pandas as pd
+from Src.Exception import CustomException
+
+
+AREA_COLUMNS = ["super_built_up_area", "built_up_area", "carpet_area"]
+
+# Pattern of the value of every area type inside the areaWithType text
+AREA_PATTERNS = {
+    "super_built_up_area": r"Super Built up area (\d+\.?\d*)",
+    "built_up_area": r"Built Up area\s*:\s*(\d+\.?\d*)",
+    "carpet_area": r"Carpet area\s*:\s*(\d+\.?\d*)",
+}
+PLOT_AREA_PATTERN = r"Plot area (\d+\.?\d*)"
+SQ_M_PATTERN = r"(\d+\.?\d*) \((\d+\.?\d*) sq.m.\)"
+
+# Only the sq.m values of the text are converted, as in the notebook (other units are kept as listed)
+SQFT_PER_SQ_M = 10.7639
+
+# Plot areas whose ratio to the listed Area rounds to one of these values were given in another unit
+PLOT_SCALE_RATIOS = np.array([9.0, 11.0])
+PLOT_SCALE_FACTORS = np.array([9.0, 10.7])
+
+
+class Area_Extraction_Class:
+    """
+    Class extracting the super built up, built up and carpet areas (in sq.ft) from the areaWithType text
+    with vectorised regex extraction, replacing the row-wise Extract_featres_Area of Feature_Engineering.ipynb
+    """
+
+    def __init__(self):
+        pass
+
+    @staticmethod
+    def _sq_m_values(text):
+        """
+        Every 'value (x sq.m.)' pair of the texts, as a DataFrame indexed by row with value and sq_m columns
+        """
+        pairs = text.str.extractall(SQ_M_PATTERN)
+        pairs.columns = ["value", "sq_m"]
+        pairs = pairs.droplevel("match")
+        pairs["sq_m"] = pairs["sq_m"].astype(float)
+        return pairs
+
+    @staticmethod
+    def convert_to_sqft(area, sq_m_pairs):
+        """
+        This method will replace an area by its sq.m value converted to sq.ft when the text holds
+        'area (x sq.m.)'. As in the notebook, the area is looked up by its float representation (e.g. '1650.5')
+        :param area: Series of extracted areas (the DataFrame index has to be unique)
+        :param sq_m_pairs: DataFrame returned by _sq_m_values
+        :return: Series
+        """
+        area_repr = area.map(str, na_action="ignore")
+        candidates = sq_m_pairs.join(area_repr.rename("area_repr"), how="inner")
+        matched = candidates[candidates["value"] == candidates["area_repr"]]
+        # The first matching pair of a row is used, like re.search
+        matched = matched[~matched.index.duplicated(keep="first")]
+        converted = area.copy()
+        converted.loc[matched.index] = matched["sq_m"] * SQFT_PER_SQ_M
+        return converted
+
+    def extract_areas(self, df):
+        """
+        This method will add the super_built_up_area, built_up_area and carpet_area columns
+        :param df: DataFrame with the areaWithType and Area columns
+        :return: DataFrame
+        """
+        try:
+            df = df.copy()
+            text = df["areaWithType"].astype(str)
+            sq_m_pairs = self._sq_m_values(text)
+
+            for col, pattern in AREA_PATTERNS.items():
+                area = pd.to_numeric(text.str.extract(pattern)[0], errors="coerce")
+                df[col] = self.convert_to_sqft(area, sq_m_pairs)
+
+            # Houses only have a plot area, which stands for their built up area
+            only_plot = df[AREA_COLUMNS].isna().all(axis=1)
+            plot_area = pd.to_numeric(
+                text.str.extract(PLOT_AREA_PATTERN)[0], errors="coerce"
+            )
+            ratio = np.round(df["Area"].to_numpy(dtype=float) / plot_area.to_numpy())
+            scale_idx = np.argmax(ratio[:, None] == PLOT_SCALE_RATIOS, axis=1)
+            has_scale = (ratio[:, None] == PLOT_SCALE_RATIOS).any(axis=1)
+            factor = np.where(has_scale, PLOT_SCALE_FACTORS[scale_idx], 1.0)
+            scaled_plot = plot_area * factor
+
+            replace = only_plot & scaled_plot.notna()
+            df.loc[replace, "built_up_area"] = scaled_plot[replace]
+            return df
+
+        except Exception as e:
+            raise CustomException(e, sys)
+
+
+class Extract_featres_Area:
+    """
+    Row-wise implementation of Feature_Engineering.ipynb, kept as the reference of verify_parity
+    """
+
+    def get_super_built_up_area(self, text):
+        match = re.search(r"Super Built up area (\d+\.?\d*)", text)
+        if match:
+            return float(match.group(1))
+        return None
+
+    def get_area(self, text, area_type):
+        match = re.search(area_type + r"\s*:\s*(\d+\.?\d*)", text)
+        if match:
+            return float(match.group(1))
+        return None
+
+    def extract_plot_area(self, area_with_type):
+        match = re.search(r"Plot area (\d+\.?\d*)", area_with_type)
+        if match:
+            return float(match.group(1))
+        else:
+            None
+
+    def convert_to_sqft(self, text, area_value):
+        if area_value is None:
+            return None
+        match = re.search(r"{} \((\d+\.?\d*) sq.m.\)".format(area_value), text)
+        if match:
+            sq_m_value = float(match.group(1))
+            return sq_m_value * 10.7639
+        return area_value
+
+    def convert_scale(self, row):
+        if np.isnan(row["Area"]) or np.isnan(row["built_up_area"]):
+            return row["built_up_area"]
+        else:
+            if round(row["Area"] / row["built_up_area"]) == 9.0:
+                return row["built_up_area"] * 9
+            elif round(row["Area"] / row["built_up_area"]) == 11.0:
+                return row["built_up_area"] * 10.7
+            else:
+                return row["built_up_area"]
+
+    def extract_areas(self, df):
+        df = df.copy()
+        df["super_built_up_area"] = df["areaWithType"].apply(
+            self.get_super_built_up_area
+        )
+        df["super_built_up_area"] = df.apply(
+            lambda x: self.convert_to_sqft(x["areaWithType"], x["super_built_up_area"]),
+            axis=1,
+        )
+        df["built_up_area"] = df["areaWithType"].apply(
+            lambda x: self.get_area(x, "Built Up area")
+        )
+        df["built_up_area"] = df.apply(
+            lambda x: self.convert_to_sqft(x["areaWithType"], x["built_up_area"]),
+            axis=1,
+        )
+        df["carpet_area"] = df["areaWithType"].apply(
+            lambda x: self.get_area(x, "Carpet area")
+        )
+        df["carpet_area"] = df.apply(
+            lambda x: self.convert_to_sqft(x["areaWithType"], x["carpet_area"]), axis=1
+        )
+
+        Ind_House_df = df[
+            (df["super_built_up_area"].isnull())
+            & (df["built_up_area"].isnull())
+            & (df["carpet_area"].isnull())
+        ][["Area", "areaWithType", "built_up_area"]]
+        Ind_House_df["built_up_area"] = Ind_House_df["areaWithType"].apply(
+            self.extract_plot_area
+        )
+        Ind_House_df["built_up_area"] = Ind_House_df.apply(self.convert_scale, axis=1)
+        df.update(Ind_House_df)
+        return df
+
+
+def verify_parity(df):
+    """
+    This function will compare the vectorised extraction with the notebook implementation
+    :param df: DataFrame with the areaWithType and Area columns (e.g. the concatenated cleaned listings)
+    :return: dict with the number of rows and of differing values per area column
+    """
+    try:
+        expected = Extract_featres_Area().extract_areas(df)
+        result = Area_Extraction_Class().extract_areas(df)
+        report = {"rows": len(df)}
+        for col in AREA_COLUMNS:
+            expected_values = pd.to_numeric(expected[col], errors="coerce").to_numpy(
+                dtype=float
+            )
+            values = result[col].to_numpy(dtype=float)
+            same = (expected_values == values) | (
+                np.isnan(expected_values) & np.isnan(values)
+            )
+            report[col + "_mismatches"] = int((~same).sum())
+        return report
+
+    except Exception as e:
+        raise CustomException(e, sys)
+
+
+def benchmark_area_extraction(df, repeats=10):
+    """
+    This function will report the throughput (rows per second) of both implementations on the data
+    replicated repeats times
+    :return: dict
+    """
+    data = pd.concat([df] * repeats, ignore_index=True)
+    report = {"rows": len(data)}
+    for name, extractor in (
+        ("notebook", Extract_featres_Area()),
+        ("vectorised", Area_Extraction_Class()),
+    ):
+        start = time.perf_counter()
+        extractor.extract_areas(data)
+        report[name + "_rows_per_second"] = len(data) / (time.perf_counter() - start)
+    report["speedup"] = (
+        report["vectorised_rows_per_second"] / report["notebook_rows_per_second"]
+    )
+    return report
+
+
+# USE THE BELOW-MENTIONED CODE TO CHECK THE PARITY AND THE THROUGHPUT OF THE AREA EXTRACTION
+# if __name__ == "__main__":
+#     listings_df = pd.read_csv("Notebook_And_Dataset/Cleaned_datasets/Cleaned_IH_V1.csv")
+#     print(verify_parity(listings_df))
+#     print(benchmark_area_extraction(listings_df))
@@ -0,0 +1,519 @@
+import sys
+import json
+import math
+import re
+import time
+import asyncio
+import pandas as pd
+from Src.Exception import CustomException
+from Src.Model_Registry import get_registry
+from Src.Prediction_Cache import Prediction_Cache, make_keys
+from Src.Compiled_Pipeline import pipeline_input_categories
+from Src.Batch_Prediction import (
+    Batch_Prediction_Class,
+    FEATURE_COLUMNS,
+    servant_room_options,
+    furnishing_type_options,
+)
+
+# Column order expected by the loan pipeline (same as create_dataframe in the loan page).
+# Loan_Amount_Term is in months like the training data, the loan page converts its slider (years) before
+# calling the pipeline
+LOAN_FEATURE_COLUMNS = [
+    "Education",
+    "Self_Employed",
+    "Dependents",
+    "Loan_Amount_Term",
+    "Gender",
+    "Married",
+    "Property_Area",
+    "CoapplicantIncome",
+    "LoanAmount",
+    "ApplicantIncome",
+    "Credit_History",
+]
+
+PRICE_NUMERIC_COLUMNS = ["built_up_area", "bedRoom", "bathroom"]
+PRICE_TEXT_COLUMNS = [
+    "agePossession",
+    "luxury_category",
+    "floor_category",
+    "Property_Type",
+]
+LOAN_NUMERIC_COLUMNS = [
+    "Loan_Amount_Term",
+    "CoapplicantIncome",
+    "LoanAmount",
+    "ApplicantIncome",
+    "Credit_History",
+]
+LOAN_TEXT_COLUMNS = [
+    "Education",
+    "Self_Employed",
+    "Gender",
+    "Married",
+    "Property_Area",
+]
+
+HTTP_STATUS = {
+    200: "OK",
+    400: "Bad Request",
+    404: "Not Found",
+    500: "Internal Server Error",
+}
+
+
+class Micro_Batcher:
+    """
+    Class which queues single-row requests and merges the ones arriving together into one
+    batch call. A batch is flushed once it holds max_batch_size rows or max_wait_ms has passed
+    since its first row arrived
+    """
+
+    def __init__(self, batch_fn, max_batch_size=256, max_wait_ms=5.0):
+        self.batch_fn = batch_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait_ms = max_wait_ms
+        self.queue = None
+        self.batches = 0
+        self.rows = 0
+
+    def start(self):
+        self.queue = asyncio.Queue()
+        return asyncio.create_task(self._run())
+
+    async def submit(self, row):
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put((row, future))
+        return await future
+
+    async def _collect(self):
+        items = [await self.queue.get()]
+        deadline = time.monotonic() + self.max_wait_ms / 1000
+        while len(items) < self.max_batch_size:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                items.append(await asyncio.wait_for(self.queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        return items
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            items = await self._collect()
+            rows = [row for row, _ in items]
+            try:
+                # The model call runs in a worker thread so the event loop keeps accepting requests
+                results = await loop.run_in_executor(None, self.batch_fn, rows)
+                for (_, future), result in zip(items, results):
+                    if not future.done():
+                        future.set_result(result)
+            except Exception as e:
+                if len(items) == 1:
+                    if not items[0][1].done():
+                        items[0][1].set_exception(e)
+                else:
+                    # One failing row would fail every request of the batch, so the rows are retried one
+                    # by one and only the failing ones get the error
+                    for row, future in items:
+                        try:
+                            result = await loop.run_in_executor(
+                                None, self.batch_fn, [row]
+                            )
+                            if not future.done():
+                                future.set_result(result[0])
+                        except Exception as row_error:
+                            if not future.done():
+                                future.set_exception(row_error)
+            self.batches += 1
+            self.rows += len(items)
+
+    def stats(self):
+        return {
+            "batches": self.batches,
+            "rows": self.rows,
+            "mean_batch_size": self.rows / self.batches if self.batches else 0.0,
+        }
+
+
+class Inference_Service:
+    """
+    Class holding the batch functions of the price, loan and recommendation models.
+    All artifacts come from the process wide model registry
+    """
+
+    def __init__(self, max_batch_size=256, max_wait_ms=5.0, price_cache_entries=65536):
+        self.registry = get_registry()
+        self.price_cache = Prediction_Cache(max_entries=price_cache_entries)
+        self.price_batcher = Micro_Batcher(
+            self.predict_price_batch, max_batch_size, max_wait_ms
+        )
+        self.loan_batcher = Micro_Batcher(
+            self.predict_loan_batch, max_batch_size, max_wait_ms
+        )
+        # Artifact name -> (fitted pipeline, categories of its encoded input columns)
+        self._categories = {}
+
+    def start(self):
+        return [self.price_batcher.start(), self.loan_batcher.start()]
+
+    def known_categories(self, pipeline_name, input_names):
+        """
+        This method will return the categories of the encoded input columns of a registry pipeline,
+        recomputed when the registry reloads the pipeline
+        """
+        pipeline = self.registry.get(pipeline_name)
+        cached = self._categories.get(pipeline_name)
+        if cached is None or cached[0] is not pipeline:
+            cached = (pipeline, pipeline_input_categories(pipeline, input_names))
+            self._categories[pipeline_name] = cached
+        return cached[1]
+
+    def validate_price_rows(self, payload):
+        """
+        This method will coerce the listings of one request, normalise them like the batch and check their
+        categorical values against the regression pipeline
+        :return: list of normalised feature dicts
+        """
+        rows = _validate_rows(payload, PRICE_COERCERS)
+        features_df = Batch_Prediction_Class.prepare_features(pd.DataFrame(rows))
+        _validate_categories(
+            features_df, self.known_categories("regression_pipeline", FEATURE_COLUMNS)
+        )
+        return features_df.to_dict(orient="records")
+
+    def validate_loan_rows(self, payload):
+        """
+        This method will coerce the applications of one request and check their categorical values
+        (including the Loan_Amount_Term, encoded as a category) against the loan pipeline
+        :return: list of feature dicts
+        """
+        rows = _validate_rows(payload, LOAN_COERCERS)
+        _validate_categories(
+            pd.DataFrame(rows, columns=LOAN_FEATURE_COLUMNS),
+            self.known_categories("loan_pipeline", LOAN_FEATURE_COLUMNS),
+        )
+        return rows
+
+    def predict_price_batch(self, rows):
+        """
+        This method will score many listings with one pipeline transform and one DMatrix prediction
+        :param rows: list of feature dicts
+        :return: list of predicted prices
+        """
+        # The rows are normalised once, the cache keys and the model both use the normalised values
+        features_df = Batch_Prediction_Class.prepare_features(pd.DataFrame(rows))
+        keys = make_keys(features_df)
+        # Taken before the artifacts are read, so predictions of a replaced model are not cached
+        version = self.price_cache.version()
+
+        # Only the rows missing from the prediction cache are sent to the model
+        predictions = [self.price_cache.lookup(key) for key in keys]
+        missing = [i for i, value in enumerate(predictions) if value is None]
+        if not missing:
+            return predictions
+
+        batch_obj = Batch_Prediction_Class(
+            reg_pipeline=self.registry.get("regression_pipeline"),
+            model=self.registry.get("price_model"),
+        )
+        values = (
+            batch_obj.predict_frame(features_df.iloc[missing]).astype(float).tolist()
+        )
+        for i, value in zip(missing, values):
+            predictions[i] = value
+            self.price_cache.store(keys[i], value, version)
+        return predictions
+
+    def predict_loan_batch(self, rows):
+        """
+        This method will run the loan pipeline and the SVC once over all the rows
+        :param rows: list of feature dicts
+        :return: list of predicted labels (1.0 = approved)
+        """
+        loan_df = pd.DataFrame(rows)[LOAN_FEATURE_COLUMNS]
+        Loan_Input = self.registry.get("loan_pipeline").transform(loan_df)
+        # Same adjustment as the loan page makes on the processed row
+        Loan_Input[:, 6] = 1.0
+        predictions = self.registry.get("loan_model").predict(Loan_Input)
+        return predictions.astype(float).tolist()
+
+    def recommend(self, property_name, facilities_wt, top_n=5):
+        facilities_wt_normalized = facilities_wt / 100
+        recommendations_df = self.registry.get("recommendation_index").recommend(
+            property_name,
+            {
+                "facilities": facilities_wt_normalized,
+                "prices": 1 - facilities_wt_normalized,
+            },
+            top_n=top_n,
+        )
+        # numpy scores are not JSON serialisable
+        recommendations_df["SimilarityScore"] = recommendations_df[
+            "SimilarityScore"
+        ].astype(float)
+        return recommendations_df.to_dict(orient="records")
+
+    async def handle(self, method, path, body):
+        """
+        This method will route one request and return (status code, JSON serialisable payload)
+        """
+        if method == "GET" and path == "/health":
+            return 200, {"status": "ok"}
+
+        if method == "GET" and path == "/stats":
+            return 200, {
+                "price_batcher": self.price_batcher.stats(),
+                "loan_batcher": self.loan_batcher.stats(),
+                "price_cache": self.price_cache.stats(),
+                "artifacts": json.loads(
+                    self.registry.stats().to_json(orient="records")
+                ),
+            }
+
+        if method != "POST":
+            return 404, {"error": "Unknown route"}
+
+        payload = json.loads(body or b"{}")
+        if path == "/predict/price":
+            # Either a single listing or a list of listings; every row goes through the batcher
+            rows = self.validate_price_rows(payload)
+            predictions = await asyncio.gather(
+                *[self.price_batcher.submit(row) for row in rows]
+            )
+            return 200, {"predictions": predictions}
+
+        if path == "/predict/loan":
+            # Loan_Amount_Term in months (e.g. 360), not in years as on the loan page
+            rows = self.validate_loan_rows(payload)
+            predictions = await asyncio.gather(
+                *[self.loan_batcher.submit(row) for row in rows]
+            )
+            return 200, {"predictions": predictions}
+
+        if path == "/recommend":
+            recommendations = self.recommend(
+                payload["property_name"],
+                float(payload.get("facilities_wt", 30)),
+                int(payload.get("top_n", 5)),
+            )
+            return 200, {"recommendations": recommendations}
+
+        return 404, {"error": "Unknown route"}
+
+
+def _to_float(value):
+    if (
+        value is None
+        or isinstance(value, bool)
+        or not isinstance(value, (int, float, str))
+    ):
+        raise ValueError
+    value = float(value)
+    # "nan"/"inf" strings are parsed by float but are not valid feature values
+    if not math.isfinite(value):
+        raise ValueError
+    return value
+
+
+def _to_text(value):
+    if not isinstance(value, str):
+        raise ValueError
+    return value
+
+
+def _to_option(options):
+    # UI label (e.g. "Yes") or the numeric value the label is mapped to
+    def coerce(value):
+        return (
+            value if isinstance(value, str) and value in options else _to_float(value)
+        )
+
+    return coerce
+
+
+def _to_sector(value):
+    # "sector 7" or 7, the number is extracted by prepare_features
+    if isinstance(value, bool) or not re.search(r"\d", str(value)):
+        raise ValueError
+    return value
+
+
+def _to_balcony(value):
+    # "3+", "No Balcony" or a number, normalised by prepare_features
+    if isinstance(value, bool) or not isinstance(value, (int, float, str)):
+        raise ValueError
+    return value
+
+
+def _to_dependents(value):
+    # "0", "1", "2", "3+" (the categories of the loan pipeline), plain integers are accepted
+    if isinstance(value, int) and not isinstance(value, bool):
+        return str(value)
+    return _to_text(value)
+
+
+PRICE_COERCERS = {
+    **{col: _to_float for col in PRICE_NUMERIC_COLUMNS},
+    **{col: _to_text for col in PRICE_TEXT_COLUMNS},
+    "sector": _to_sector,
+    "balcony": _to_balcony,
+    "servant room": _to_option(servant_room_options),
+    "furnishing_type": _to_option(furnishing_type_options),
+}
+
+LOAN_COERCERS = {
+    **{col: _to_float for col in LOAN_NUMERIC_COLUMNS},
+    **{col: _to_text for col in LOAN_TEXT_COLUMNS},
+    "Dependents": _to_dependents,
+}
+
+
+def _validate_rows(payload, coercers):
+    """
+    A row with a missing column or a value of the wrong type would fail the whole merged batch, and with it
+    the requests of other clients, so every row is checked and coerced before queuing. The ValueError is
+    turned into a 400 for this request only
+    :param payload: a feature dict or a list of feature dicts
+    :param coercers: column -> function returning the coerced value or raising ValueError
+    :return: list of dicts holding only the model columns
+    """
+    rows = payload if isinstance(payload, list) else [payload]
+    if not rows:
+        raise ValueError("No rows to predict")
+    validated_rows = []
+    for i, row in enumerate(rows):
+        if not isinstance(row, dict):
+            raise ValueError("Row {0} is not a JSON object".format(i))
+        missing_columns = [col for col in coercers if col not in row]
+        if missing_columns:
+            raise ValueError(
+                "Row {0} is missing the columns: {1}".format(i, missing_columns)
+            )
+        validated_row = {}
+        for col, coerce in coercers.items():
+            try:
+                validated_row[col] = coerce(row[col])
+            except (TypeError, ValueError):
+                raise ValueError(
+                    "Row {0} has an invalid value for {1}: {2!r}".format(
+                        i, col, row[col]
+                    )
+                )
+        validated_rows.append(validated_row)
+    return validated_rows
+
+
+def _validate_categories(features_df, categories):
+    """
+    A value unknown to an encoder is turned into NaN (failing the model) or into all zeros (silently
+    mispriced), so such rows are rejected with a ValueError (400 for this request only)
+    :param categories: column -> known categories, from pipeline_input_categories
+    """
+    for col, known in categories.items():
+        if col not in features_df.columns:
+            continue
+        unknown = ~features_df[col].isin(known)
+        if unknown.any():
+            i = int(unknown.to_numpy().argmax())
+            raise ValueError(
+                "Row {0} has an unknown value for {1}: {2!r} (expected one of {3})".format(
+                    i, col, features_df[col].iloc[i], list(known)
+                )
+            )
+
+
+async def _read_request(reader):
+    request_line = await reader.readline()
+    if not request_line:
+        return None
+    method, path, _ = request_line.decode("latin-1").split(" ", 2)
+
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+
+    body = b""
+    if "content-length" in headers:
+        body = await reader.readexactly(int(headers["content-length"]))
+    return method, path, headers, body
+
+
+def _write_response(writer, status, payload, keep_alive):
+    body = json.dumps(payload).encode()
+    head = (
+        "HTTP/1.1 {0} {1}\r\n"
+        "Content-Type: application/json\r\n"
+        "Content-Length: {2}\r\n"
+        "Connection: {3}\r\n\r\n".format(
+            status,
+            HTTP_STATUS[status],
+            len(body),
+            "keep-alive" if keep_alive else "close",
+        )
+    )
+    writer.write(head.encode("latin-1") + body)
+
+
+async def serve(host="0.0.0.0", port=8000, max_batch_size=256, max_wait_ms=5.0):
+    """
+    This function will start the HTTP inference server and serve until cancelled
+    """
+    try:
+        service = Inference_Service(max_batch_size, max_wait_ms)
+        service.registry.preload()
+        batcher_tasks = service.start()
+
+        async def handle_connection(reader, writer):
+            try:
+                while True:
+                    request = await _read_request(reader)
+                    if request is None:
+                        break
+                    method, path, headers, body = request
+                    keep_alive = headers.get("connection", "").lower() != "close"
+                    try:
+                        status, payload = await service.handle(method, path, body)
+                    except (KeyError, ValueError) as e:
+                        status, payload = 400, {"error": str(e)}
+                    except Exception as e:
+                        status, payload = 500, {"error": str(e)}
+                    _write_response(writer, status, payload, keep_alive)
+                    await writer.drain()
+                    if not keep_alive:
+                        break
+            except (asyncio.IncompleteReadError, ConnectionError):
+                pass
+            finally:
+                writer.close()
+
+        server = await asyncio.start_server(handle_connection, host, port)
+        async with server:
+            await server.serve_forever()
+
+        for task in batcher_tasks:
+            task.cancel()
+
+    except Exception as e:
+        raise CustomException(e, sys)
+
+
+# USE THE BELOW-MENTIONED CODE TO START THE INFERENCE SERVER
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="HomeQuest.AI inference server")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--max-batch-size", type=int, default=256)
+    parser.add_argument("--max-wait-ms", type=float, default=5.0)
+    args = parser.parse_args()
+
+    asyncio.run(serve(args.host, args.port, args.max_batch_size, args.max_wait_ms))
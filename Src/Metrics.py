@@ -0,0 +1,81 @@
+import os
+import sys
+import json
+import time
+import threading
+from collections import defaultdict, deque
+from contextlib import contextmanager
+import numpy as np
+from Src.Exception import CustomException
+
+
+METRICS_DIR = os.path.join("Artifacts", "Metrics")
+
+
+class Stage_Timer:
+    """
+    Class for timing the stages of a single request with time.perf_counter
+    """
+
+    def __init__(self):
+        self.timings_ms = {}
+
+    @contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings_ms[name] = (time.perf_counter() - start) * 1000
+
+    @property
+    def total_ms(self):
+        return sum(self.timings_ms.values())
+
+
+class Metrics_Sink:
+    """
+    Class which appends every recorded request as a JSON line to a metrics file and keeps a window
+    of the most recent total latencies in memory for computing percentiles
+    """
+
+    def __init__(
+        self, file_path=os.path.join(METRICS_DIR, "latency.jsonl"), window=1000
+    ):
+        self.file_path = file_path
+        self._recent = defaultdict(lambda: deque(maxlen=window))
+        self._lock = threading.Lock()
+
+    def record(self, event, timings_ms):
+        """
+        This method will store the stage timings (in milliseconds) of one request
+        :param event: name of the measured operation
+        :param timings_ms: dict of stage name -> milliseconds
+        """
+        try:
+            total_ms = sum(timings_ms.values())
+            line = {"timestamp": time.time(), "event": event, "total_ms": total_ms}
+            line.update(timings_ms)
+
+            with self._lock:
+                self._recent[event].append(total_ms)
+                os.makedirs(os.path.dirname(self.file_path), exist_ok=True)
+                with open(self.file_path, "a") as file_obj:
+                    file_obj.write(json.dumps(line) + "\n")
+
+        except Exception as e:
+            raise CustomException(e, sys)
+
+    def percentiles(self, event, quantiles=(50, 99)):
+        """
+        This method will return the requested percentiles of the recent total latencies of an event
+        :return: dict like {"p50": ..., "p99": ...} (empty if nothing was recorded yet)
+        """
+        with self._lock:
+            values = list(self._recent[event])
+        if not values:
+            return {}
+        return {
+            "p{0}".format(q): float(v)
+            for q, v in zip(quantiles, np.percentile(values, quantiles))
+        }
@@ -1,5 +1,6 @@
 from zenml.steps import BaseParameters
 import os
+from typing import List
 
 
 class ModelNameConfig(BaseParameters):
@@ -7,4 +8,23 @@ class ModelNameConfig(BaseParameters):
 
     model_name: str = "Xgboost"
     fine_tuning: bool = True
+    tuning_max_evals: int = 100
+    tuning_workers: int = 1  # > 1 runs the trials in a local process pool
+    tuning_seed: int = 0
+    # With tuning_workers > 1, also runs the serial search and reports the measured speedup (doubles the cost)
+    tuning_measure_speedup: bool = False
+    # Early stopping rounds and successive halving rung budgets (number of trees) of the tuning trials
+    tuning_early_stopping_rounds: int = 20
+    tuning_rung_budgets: List[int] = [30, 60, 120]
+    tuning_reduction_factor: int = 3
     model_storage_path = os.path.join("Artifacts", "Model.pkl")
+    # Incremental mode: boosting continues from the served model (raw price scale) on the new listings only, and
+    # the updated model is rejected when its holdout MAE is more than incremental_mae_tolerance (relative) worse
+    incremental_rounds: int = 30
+    incremental_learning_rate: float = 0.05
+    incremental_mae_tolerance: float = 0.01
+    served_model_path = os.path.join("Artifacts", "xgboost_regressor_model.bin")
+    pipeline_storage_path = os.path.join("Artifacts", "pipeline.pkl")
+    served_pipeline_path = os.path.join(
+        "Notebook_And_Dataset", "Model Building", "Pipeline.pkl"
+    )
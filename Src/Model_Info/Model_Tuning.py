@@ -1,9 +1,70 @@
+import os
+import time
+import logging
+from collections import defaultdict
 import pandas as pd
 import numpy as np
+from concurrent.futures import ProcessPoolExecutor
 from xgboost import XGBRegressor
+from xgboost.callback import TrainingCallback
 from sklearn.ensemble import RandomForestRegressor, ExtraTreesRegressor
-from hyperopt import STATUS_OK, Trials, fmin, hp, tpe
+from hyperopt import STATUS_OK, STATUS_FAIL, Trials, fmin, hp, tpe, space_eval
+from hyperopt.base import Domain, JOB_STATE_DONE
 from sklearn.metrics import mean_absolute_error
+from sklearn.model_selection import train_test_split
+
+logger = logging.getLogger(__name__)
+
+# Tuner living in each worker process of the parallel search (the data is sent once per worker)
+_worker_tuner = None
+
+
+def _init_worker(X_train, X_test, y_train, y_test, tuner_kwargs):
+    global _worker_tuner
+    _worker_tuner = HyperparameterTuner(
+        X_train, X_test, y_train, y_test, **tuner_kwargs
+    )
+
+
+def _evaluate_in_worker(task):
+    params, rung_losses = task
+    # Pruning decisions use the rung results of every trial finished before this round
+    _worker_tuner.rung_losses = defaultdict(list, rung_losses)
+    return _worker_tuner.objective(params)
+
+
+class Successive_Halving_Callback(TrainingCallback):
+    """
+    XGBoost callback implementing the asynchronous successive halving (ASHA) rule: when a trial reaches
+    a rung budget (number of trees), it only keeps training if its validation MAE is within the best
+    1 / reduction_factor of all the trials which reached that rung before it
+    """
+
+    def __init__(self, rung_budgets, rung_losses, reduction_factor=3):
+        super().__init__()
+        self.rung_budgets = set(rung_budgets)
+        self.rung_losses = rung_losses
+        self.reduction_factor = reduction_factor
+        self.reached = {}
+        self.pruned_at = None
+
+    def after_iteration(self, model, epoch, evals_log):
+        n_trees = epoch + 1
+        if n_trees not in self.rung_budgets:
+            return False
+
+        loss = evals_log["validation_0"]["mae"][-1]
+        self.reached[n_trees] = loss
+        previous = self.rung_losses[n_trees]
+
+        # Too few trials at this rung to compare against, so the trial is promoted
+        if len(previous) < self.reduction_factor:
+            return False
+        if loss <= np.quantile(previous, 1 / self.reduction_factor):
+            return False
+
+        self.pruned_at = n_trees
+        return True
 
 
 class HyperparameterTuner:
@@ -11,13 +72,64 @@ class HyperparameterTuner:
     Class for performing hyperparameter tuning using the hyperopt library
     """
 
-    def __init__(self, X_train, X_test, y_train, y_test):
+    def __init__(
+        self,
+        X_train,
+        X_test,
+        y_train,
+        y_test,
+        n_jobs=None,
+        early_stopping_rounds=None,
+        rung_budgets=None,
+        reduction_factor=3,
+        validation_size=0.2,
+    ):
         self.X_train = X_train
         self.X_test = X_test
         self.y_train = y_train
         self.y_test = y_test
+        # Number of XGBoost threads per trial (None = XGBoost default)
+        self.n_jobs = n_jobs
+        self.tuning_report = None
+
+        # Early stopping and successive halving are judged on a validation split of the training data
+        self.early_stopping_rounds = early_stopping_rounds
+        self.rung_budgets = sorted(rung_budgets or [])
+        self.reduction_factor = reduction_factor
+        self.validation_size = validation_size
+        self.rung_losses = defaultdict(list)
+        if self.early_stopping_rounds or self.rung_budgets:
+            self.X_fit, self.X_val, self.y_fit, self.y_val = train_test_split(
+                X_train, y_train, test_size=validation_size, random_state=0
+            )
+
+    def tuner_kwargs(self):
+        return {
+            "early_stopping_rounds": self.early_stopping_rounds,
+            "rung_budgets": self.rung_budgets,
+            "reduction_factor": self.reduction_factor,
+            "validation_size": self.validation_size,
+        }
 
     def objective(self, space):
+        pruning_callback = None
+        fit_params = {}
+        extra_params = {}
+        X_fit, y_fit = self.X_train, self.y_train
+
+        if self.early_stopping_rounds or self.rung_budgets:
+            X_fit, y_fit = self.X_fit, self.y_fit
+            fit_params = {"eval_set": [(self.X_val, self.y_val)], "verbose": False}
+            extra_params = {
+                "eval_metric": "mae",
+                "early_stopping_rounds": self.early_stopping_rounds,
+            }
+            if self.rung_budgets:
+                pruning_callback = Successive_Halving_Callback(
+                    self.rung_budgets, self.rung_losses, self.reduction_factor
+                )
+                extra_params["callbacks"] = [pruning_callback]
+
         model = XGBRegressor(
             n_estimators=int(space["n_estimators"]),
             max_depth=int(space["max_depth"]),
@@ -27,10 +139,13 @@ class HyperparameterTuner:
             colsample_bytree=space["colsample_bytree"],
             min_child_weight=int(space["min_child_weight"]),
             random_state=space["seed"],
+            n_jobs=self.n_jobs,
+            **extra_params,
         )
 
         # Training the model
-        model.fit(self.X_train, self.y_train)
+        start = time.perf_counter()
+        model.fit(X_fit, y_fit, **fit_params)
 
         # Getting predictions from the trained model and computing mean absolute error
         y_pred = model.predict(self.X_test)
@@ -38,11 +153,27 @@ class HyperparameterTuner:
         mae = mean_absolute_error(self.y_test, y_pred)
 
         # Return the value to minimize (in this case, MAE)
-        return {"loss": mae, "status": STATUS_OK}
+        result = {
+            "loss": mae,
+            "status": STATUS_OK,
+            "train_time": time.perf_counter() - start,
+        }
+        if pruning_callback is not None:
+            for budget, loss in pruning_callback.reached.items():
+                self.rung_losses[budget].append(loss)
+            result["rung_losses"] = pruning_callback.reached
+            result["pruned_at"] = pruning_callback.pruned_at
+            if pruning_callback.pruned_at is not None:
+                # The MAE of a model cut at a rung budget is not comparable with the finished trials, so
+                # the trial is reported as failed: TPE leaves it out and it can never be the best trial
+                result["pruned_loss"] = mae
+                result["loss"] = float("inf")
+                result["status"] = STATUS_FAIL
+        return result
 
-    def optimize(self):
+    def search_space(self):
         # Defining the domain space
-        space = {
+        return {
             "max_depth": hp.quniform("max_depth", 3, 18, 1),
             "gamma": hp.uniform("gamma", 0, 5),
             "reg_alpha": hp.uniform("reg_alpha", 0, 1),
@@ -53,12 +184,158 @@ class HyperparameterTuner:
             "seed": 0,
         }
 
+    def _report(self, mode, n_workers, wall_time, trials):
+        # The summed trial times of a parallel run are measured with fewer threads per trial than a serial
+        # run uses, so they are not a serial baseline: the speedup is only reported by
+        # measure_serial_baseline, from the wall time of an actual serial run
+        self.tuning_report = {
+            "mode": mode,
+            "n_workers": n_workers,
+            "trials": len(trials.trials),
+            "wall_time_s": wall_time,
+            "best_loss": min(
+                result["loss"]
+                for result in trials.results
+                if result["status"] == STATUS_OK
+            ),
+            "pruned_trials": sum(
+                1 for result in trials.results if result.get("pruned_at")
+            ),
+        }
+        logger.info(
+            "Hyperparameter tuning (%s, %d workers): %d trials in %.1fs, %d pruned",
+            mode,
+            n_workers,
+            self.tuning_report["trials"],
+            wall_time,
+            self.tuning_report["pruned_trials"],
+        )
+        return self.tuning_report
+
+    def optimize(self, max_evals=100, n_workers=1, seed=0, measure_speedup=False):
+        """
+        This method will run the TPE search and return the best set of hyper-parameters
+        :param max_evals: number of trials
+        :param n_workers: number of processes evaluating trials in parallel (1 = serial fmin)
+        :param seed: seed of the TPE sampler, the same seed gives the same trials
+        :param measure_speedup: with n_workers > 1, also run the serial search to report the speedup
+        :return: dict of the best hyper-parameters
+        """
+        if n_workers > 1:
+            best_hyperparams = self.optimize_parallel(max_evals, n_workers, seed)
+            if measure_speedup:
+                self.measure_serial_baseline(max_evals, seed)
+            return best_hyperparams
+
+        best_hyperparams, trials, wall_time = self._serial_search(max_evals, seed)
+        self._report("serial", 1, wall_time, trials)
+        return best_hyperparams
+
+    def _serial_search(self, max_evals, seed):
+        # Every search starts from empty rungs, so a run does not prune against the trials of another one
+        self.rung_losses = defaultdict(list)
         trials = Trials()
+        start = time.perf_counter()
         best_hyperparams = fmin(
             fn=self.objective,
-            space=space,
+            space=self.search_space(),
             algo=tpe.suggest,
-            max_evals=100,
+            max_evals=max_evals,
             trials=trials,
+            rstate=np.random.default_rng(seed),
         )
-        return best_hyperparams
+        return best_hyperparams, trials, time.perf_counter() - start
+
+    def measure_serial_baseline(self, max_evals, seed):
+        """
+        This method will run the serial search with the same seed and number of trials as the last parallel
+        run and add its wall time and the speedup to tuning_report. The serial run suggests every trial from
+        all the previous ones, so its trials differ from the parallel ones: the speedup compares the cost
+        of the same search budget, and serial_best_loss shows what the parallel rounds cost in quality
+        :return: tuning_report
+        """
+        _, trials, serial_wall_time = self._serial_search(max_evals, seed)
+        wall_time = self.tuning_report["wall_time_s"]
+        self.tuning_report.update(
+            serial_wall_time_s=serial_wall_time,
+            speedup=serial_wall_time / wall_time if wall_time else 1.0,
+            serial_best_loss=min(
+                result["loss"]
+                for result in trials.results
+                if result["status"] == STATUS_OK
+            ),
+        )
+        logger.info(
+            "Serial baseline: %d trials in %.1fs, speedup %.2fx",
+            len(trials.trials),
+            serial_wall_time,
+            self.tuning_report["speedup"],
+        )
+        return self.tuning_report
+
+    def optimize_parallel(self, max_evals=100, n_workers=None, seed=0):
+        """
+        This method will run the TPE search in rounds of n_workers trials. Every round is suggested from
+        the finished trials and evaluated in a local process pool, and the results are inserted in trial
+        id order, so a given seed and worker count always produce the same trials
+        :return: dict of the best hyper-parameters
+        """
+        n_workers = n_workers or os.cpu_count()
+        # Splitting the cores between the workers so the XGBoost threads do not oversubscribe them
+        n_jobs = max(1, (os.cpu_count() or 1) // n_workers)
+
+        self.rung_losses = defaultdict(list)
+        space = self.search_space()
+        domain = Domain(self.objective, space)
+        trials = Trials()
+        rstate = np.random.default_rng(seed)
+
+        start = time.perf_counter()
+        with ProcessPoolExecutor(
+            max_workers=n_workers,
+            initializer=_init_worker,
+            initargs=(
+                self.X_train,
+                self.X_test,
+                self.y_train,
+                self.y_test,
+                dict(self.tuner_kwargs(), n_jobs=n_jobs),
+            ),
+        ) as executor:
+            while len(trials.trials) < max_evals:
+                new_ids = trials.new_trial_ids(
+                    min(n_workers, max_evals - len(trials.trials))
+                )
+                trials.refresh()
+                new_trials = tpe.suggest(
+                    new_ids, domain, trials, rstate.integers(2**31 - 1)
+                )
+
+                params = [
+                    space_eval(
+                        space,
+                        {
+                            label: values[0]
+                            for label, values in trial["misc"]["vals"].items()
+                            if values
+                        },
+                    )
+                    for trial in new_trials
+                ]
+                rung_snapshot = dict(self.rung_losses)
+                for trial, result in zip(
+                    new_trials,
+                    executor.map(
+                        _evaluate_in_worker, [(p, rung_snapshot) for p in params]
+                    ),
+                ):
+                    trial["state"] = JOB_STATE_DONE
+                    trial["result"] = result
+                    for budget, loss in result.get("rung_losses", {}).items():
+                        self.rung_losses[budget].append(loss)
+
+                trials.insert_trial_docs(new_trials)
+                trials.refresh()
+
+        self._report("parallel", n_workers, time.perf_counter() - start, trials)
+        return trials.argmin
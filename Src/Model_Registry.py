@@ -0,0 +1,242 @@
+import os
+import sys
+import time
+import pickle
+import hashlib
+import threading
+import numpy as np
+import pandas as pd
+import xgboost as xgb
+from Src.Exception import CustomException
+from Src.Compiled_Pipeline import load_compiled_pipeline
+from Src.Price_Grid import PRICE_GRID_PATH, load_price_grid
+from Src.Recommendation_Index import SOURCE_DIR, load_recommendation_store
+
+
+def _artifact_files(path):
+    # Files being written (.tmp, swapped in with os.replace) are not part of the artifact
+    if os.path.isdir(path):
+        return [
+            os.path.join(path, name)
+            for name in sorted(os.listdir(path))
+            if os.path.isfile(os.path.join(path, name)) and not name.endswith(".tmp")
+        ]
+    return [path]
+
+
+def file_checksum(file_path, block_size=1 << 20):
+    """
+    This function will take a file (or directory) path and return the sha256 hex digest of its content
+    """
+    sha = hashlib.sha256()
+    for artifact_file in _artifact_files(file_path):
+        sha.update(os.path.basename(artifact_file).encode())
+        with open(artifact_file, "rb") as file_obj:
+            for block in iter(lambda: file_obj.read(block_size), b""):
+                sha.update(block)
+    return sha.hexdigest()
+
+
+def stat_key(file_path):
+    """
+    This function will return the (mtime, size) of every file of the artifact, used as a cheap change check
+    """
+    keys = []
+    for artifact_file in _artifact_files(file_path):
+        stat = os.stat(artifact_file)
+        keys.append((artifact_file, stat.st_mtime_ns, stat.st_size))
+    return tuple(keys)
+
+
+def load_pickle(file_path):
+    with open(file_path, "rb") as file_obj:
+        return pickle.load(file_obj)
+
+
+def load_booster(file_path):
+    return xgb.Booster(model_file=file_path)
+
+
+def object_size(obj):
+    """
+    This function will return an estimate of the memory held by a loaded artifact (in bytes)
+    """
+    if isinstance(obj, np.ndarray):
+        return int(obj.nbytes)
+    if isinstance(obj, pd.DataFrame):
+        return int(obj.memory_usage(deep=True).sum())
+    if isinstance(obj, pd.Series):
+        # Series.memory_usage already returns the total as an int
+        return int(obj.memory_usage(deep=True))
+    if isinstance(obj, xgb.Booster):
+        return len(obj.save_raw())
+    if callable(getattr(obj, "nbytes", None)):
+        return int(obj.nbytes())
+    return len(pickle.dumps(obj, protocol=pickle.HIGHEST_PROTOCOL))
+
+
+class _Artifact:
+    def __init__(self, path, loader):
+        self.path = path
+        self.loader = loader
+        self.obj = None
+        self.stat = None
+        self.checksum = None
+        self.load_time_ms = None
+        self.size_bytes = None
+        self.loads = 0
+        self.last_check = 0.0
+        # Held while the artifact is checked or (re)loaded, so a slow loader (e.g. building the
+        # recommendation index) only blocks the callers of that artifact
+        self.lock = threading.RLock()
+
+
+class Model_Registry:
+    """
+    Class which loads every model artifact once per process and shares it between callers.
+    An artifact is reloaded only when the checksum of its file changes on disk, and every artifact has its
+    own lock so loading one does not block the others.
+    """
+
+    def __init__(self, check_interval=5.0):
+        # Minimum number of seconds between two on-disk change checks of the same artifact
+        self.check_interval = check_interval
+        self._artifacts = {}
+        # Only guards the artifact table, never held while loading
+        self._lock = threading.Lock()
+
+    def register(self, name, path, loader=load_pickle):
+        with self._lock:
+            self._artifacts[name] = _Artifact(path, loader)
+
+    def _load(self, name, artifact, checksum):
+        start = time.perf_counter()
+        artifact.obj = artifact.loader(artifact.path)
+        artifact.load_time_ms = (time.perf_counter() - start) * 1000
+        artifact.size_bytes = object_size(artifact.obj)
+        artifact.checksum = checksum
+        artifact.loads += 1
+
+    def _refresh(self, name, artifact):
+        """
+        The cheap stat (mtime, size) is used to detect a possible change and the checksum
+        decides whether the artifact really has to be reloaded
+        """
+        if artifact.loads == 0:
+            # The loader may create the artifact (e.g. build an index), so it is checked after loading
+            self._load(name, artifact, None)
+            artifact.stat = stat_key(artifact.path)
+            artifact.checksum = file_checksum(artifact.path)
+            return
+
+        current_stat = stat_key(artifact.path)
+        if current_stat == artifact.stat:
+            return
+
+        checksum = file_checksum(artifact.path)
+        if checksum != artifact.checksum:
+            self._load(name, artifact, checksum)
+        artifact.stat = current_stat
+
+    def get(self, name):
+        """
+        This method will return the loaded artifact, loading it on first use or after its file changed
+        :param name: registered artifact name
+        :return: loaded object
+        """
+        try:
+            with self._lock:
+                artifact = self._artifacts[name]
+            with artifact.lock:
+                now = time.monotonic()
+                if (
+                    artifact.loads == 0
+                    or now - artifact.last_check >= self.check_interval
+                ):
+                    self._refresh(name, artifact)
+                    artifact.last_check = now
+                return artifact.obj
+
+        except Exception as e:
+            raise CustomException(e, sys)
+
+    def checksum(self, name):
+        self.get(name)
+        return self._artifacts[name].checksum
+
+    def preload(self):
+        for name in self._artifacts:
+            self.get(name)
+
+    def stats(self):
+        """
+        This method will return the load time (ms), memory size (bytes), checksum and number of loads
+        of every artifact which has been loaded so far
+        :return: DataFrame
+        """
+        rows = []
+        with self._lock:
+            for name, artifact in self._artifacts.items():
+                rows.append(
+                    {
+                        "artifact": name,
+                        "path": artifact.path,
+                        "loaded": artifact.loads > 0,
+                        "load_time_ms": artifact.load_time_ms,
+                        "size_bytes": artifact.size_bytes,
+                        "checksum": artifact.checksum,
+                        "loads": artifact.loads,
+                    }
+                )
+        return pd.DataFrame(rows)
+
+
+def default_registry():
+    """
+    This function will return a registry with all the artifacts used by the application
+    """
+    registry = Model_Registry()
+    registry.register(
+        "regression_pipeline", "Notebook_And_Dataset/Model Building/Pipeline.pkl"
+    )
+    registry.register(
+        "compiled_regression_pipeline",
+        "Notebook_And_Dataset/Model Building/Pipeline.pkl",
+        loader=load_compiled_pipeline,
+    )
+    registry.register(
+        "price_model", "Artifacts/xgboost_regressor_model.bin", loader=load_booster
+    )
+    # Only loaded: the grid is built by the training pipelines, and the price page checks that it was scored
+    # with the current booster and pipeline before using it
+    registry.register("price_grid", PRICE_GRID_PATH, loader=load_price_grid)
+    registry.register("loan_pipeline", "Artifacts/Classification_pipeline.pkl")
+    registry.register("loan_model", "Artifacts/SVC.pkl")
+    registry.register("loan_coefficients", "Artifacts/Classification_Coeff.pkl")
+    # Keyed on the source pickles (the files of SOURCE_DIR), the loader rebuilds the index when they change
+    registry.register(
+        "recommendation_index", SOURCE_DIR, loader=load_recommendation_store
+    )
+    return registry
+
+
+_registry = None
+_registry_lock = threading.Lock()
+
+
+def get_registry():
+    """
+    This function will return the process wide registry (created on first use)
+    """
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = default_registry()
+        return _registry
+
+
+# USE THE BELOW-MENTIONED CODE TO CHECK THE COLD-START COST OF EVERY ARTIFACT
+# if __name__ == "__main__":
+#     registry = get_registry()
+#     registry.preload()
+#     print(registry.stats())
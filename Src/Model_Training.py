@@ -1,10 +1,20 @@
 from Src.Exception import CustomException
+import os
 import sys
+import time
+import shutil
+import logging
 import numpy as np
-from Src.Utilities import save_object
+from typing_extensions import Annotated
+from typing import Tuple
+from Src.Utilities import save_object, load_object
+from Src.Artifact_Store import read_artifact
+from Src.Batch_Prediction import Batch_Prediction_Class
+from Src.Price_Grid import refresh_price_grid
 from Src.Model_Info.Model_Configuration import ModelNameConfig
 from Src.Model_Info.Model_Tuning import HyperparameterTuner
 from sklearn.base import RegressorMixin
+from sklearn.metrics import mean_absolute_error
 from zenml import step
 from xgboost import XGBRegressor
 from sklearn.ensemble import RandomForestRegressor, ExtraTreesRegressor
@@ -17,6 +27,77 @@ from sklearn.ensemble import RandomForestRegressor, ExtraTreesRegressor
 
 # experiment_tracker = Client().active_stack.experiment_tracker
 
+logger = logging.getLogger(__name__)
+
+
+def load_base_model(model_config_obj):
+    """
+    This function will load the model incremental training continues from: the booster served by the
+    application (served_model_path), which predicts the raw price. The model of model_storage_path is not
+    used: the full training fits it on the Yeo-Johnson transformed price, and the lambda of that transform
+    is not stored, so new listings could not be put on its scale
+    :return: (XGBRegressor, path it was loaded from)
+    """
+    model = XGBRegressor()
+    model.load_model(model_config_obj.served_model_path)
+    return model, model_config_obj.served_model_path
+
+
+def base_pipeline_path(model_config_obj):
+    """
+    This function will return the fitted Processing_pipeline matching the model returned by load_base_model
+    """
+    return model_config_obj.served_pipeline_path
+
+
+def holdout_mae(model, X_holdout, y_holdout):
+    # Same target scale as the served booster: the raw price (in crore), predicted directly
+    return mean_absolute_error(y_holdout, model.predict(X_holdout))
+
+
+def replace_model_file(model, file_path):
+    """
+    This function will store the model in place of file_path, keeping the previous file as
+    <name>.<timestamp><extension>. The new file is written next to it and moved in place, so readers of
+    file_path (e.g. the model registry) never see a partially written model
+    :return: path of the kept previous version
+    """
+    name, extension = os.path.splitext(file_path)
+    previous_path = "{0}.{1}{2}".format(name, time.strftime("%Y%m%d-%H%M%S"), extension)
+    shutil.copy2(file_path, previous_path)
+
+    temporary_path = name + ".tmp" + extension
+    if extension == ".pkl":
+        save_object(file_path=temporary_path, obj=model)
+    else:
+        model.get_booster().save_model(temporary_path)
+    os.replace(temporary_path, file_path)
+    return previous_path
+
+
+def prepare_delta(delta_df, holdout_df, pipeline_path):
+    """
+    This function will process the new listings and the holdout listings with the already fitted
+    Processing_pipeline (it is not refitted, so the features keep the meaning the model was trained with)
+    :param delta_df: new listings with a price column
+    :param holdout_df: listings the updated model is checked on
+    :return: X_delta, X_holdout, y_delta (price), y_holdout (price)
+    """
+    try:
+        processing_pipeline = load_object(pipeline_path)
+        X_delta = processing_pipeline.transform(
+            Batch_Prediction_Class.prepare_features(delta_df)
+        )
+        X_holdout = processing_pipeline.transform(
+            Batch_Prediction_Class.prepare_features(holdout_df)
+        )
+        y_delta = delta_df["price"].to_numpy(dtype=float)
+        y_holdout = holdout_df["price"].to_numpy(dtype=float)
+        return X_delta, X_holdout, y_delta, y_holdout
+
+    except Exception as e:
+        raise CustomException(e, sys)
+
 
 class Model_training_Class:
     def __init__(self):
@@ -42,9 +123,20 @@ class Model_training_Class:
 
             # If fine_tuning is set to be true in Model configuration file
             if model_config_obj.fine_tuning == True:
-                find_hparms_obj = HyperparameterTuner(X_train, X_test, y_train, y_test)
-                hyper_parms = (
-                    find_hparms_obj.optimize()
+                find_hparms_obj = HyperparameterTuner(
+                    X_train,
+                    X_test,
+                    y_train,
+                    y_test,
+                    early_stopping_rounds=model_config_obj.tuning_early_stopping_rounds,
+                    rung_budgets=model_config_obj.tuning_rung_budgets,
+                    reduction_factor=model_config_obj.tuning_reduction_factor,
+                )
+                hyper_parms = find_hparms_obj.optimize(
+                    max_evals=model_config_obj.tuning_max_evals,
+                    n_workers=model_config_obj.tuning_workers,
+                    seed=model_config_obj.tuning_seed,
+                    measure_speedup=model_config_obj.tuning_measure_speedup,
                 )  # Getting best set of hyper-parameters
 
                 # Create the XGBoost Regressor with the best hyperparameters
@@ -81,18 +173,88 @@ class Model_training_Class:
         except Exception as e:
             raise CustomException(e, sys)
 
+    def incremental_model_training(self, X_delta, X_holdout, y_delta, y_holdout):
+        """
+        This method will continue boosting the served model for incremental_rounds trees fitted on the
+        new listings only. The updated model replaces the served one only when its holdout MAE is not
+        more than incremental_mae_tolerance worse than the MAE of the current model
+        :param X_delta: processed features of the new listings
+        :param y_delta: price of the new listings
+        :param X_holdout: processed features of the holdout listings
+        :param y_holdout: price of the holdout listings
+        :return: the updated model, or the current one when the update is rejected
+        """
+        try:
+            model_config_obj = ModelNameConfig()
+            start = time.perf_counter()
+
+            base_model, base_path = load_base_model(model_config_obj)
+            base_mae = holdout_mae(base_model, X_holdout, y_holdout)
+
+            params = base_model.get_params()
+            params.update(
+                n_estimators=model_config_obj.incremental_rounds,
+                learning_rate=model_config_obj.incremental_learning_rate,
+                early_stopping_rounds=None,
+                callbacks=None,
+            )
+            updated_model = XGBRegressor(**params)
+            updated_model.fit(X_delta, y_delta, xgb_model=base_model.get_booster())
+            updated_mae = holdout_mae(updated_model, X_holdout, y_holdout)
+
+            accepted = updated_mae <= base_mae * (
+                1 + model_config_obj.incremental_mae_tolerance
+            )
+            # The updated model replaces the one it was loaded from, which was fitted with the same pipeline
+            # (the application reloads the served booster when its checksum changes)
+            previous_path = None
+            if accepted:
+                previous_path = replace_model_file(updated_model, base_path)
+                refresh_price_grid(
+                    model_path=base_path,
+                    pipeline_path=base_pipeline_path(model_config_obj),
+                )
+
+            self.incremental_report = {
+                "base_model": base_path,
+                "delta_rows": len(y_delta),
+                "rounds": model_config_obj.incremental_rounds,
+                "base_mae": base_mae,
+                "updated_mae": updated_mae,
+                "accepted": accepted,
+                "previous_model": previous_path,
+                "seconds": time.perf_counter() - start,
+            }
+            logger.info(
+                "Incremental training on {delta_rows} listings: holdout MAE {base_mae:.4f} -> "
+                "{updated_mae:.4f}, accepted={accepted} ({seconds:.1f}s)".format(
+                    **self.incremental_report
+                )
+            )
+            return updated_model if accepted else base_model
+
+        except Exception as e:
+            raise CustomException(e, sys)
+
 
 # @step(experiment_tracker=experiment_tracker.name)
 @step
 def train_model(
-    X_train: np.ndarray, X_test: np.ndarray, y_train: np.ndarray, y_test: np.ndarray
+    X_train: np.ndarray,
+    X_test: np.ndarray,
+    y_train: np.ndarray,
+    y_test: np.ndarray,
+    config_hash: str,
+    code_hash: str,
 ) -> RegressorMixin:
     """
     Args:
         X_train: np.array,
         X_test: np.array,
         y_train: np.array,
-        y_test: np.array
+        y_test: np.array,
+        config_hash: str (hash of ModelNameConfig, only used as part of the cache key)
+        code_hash: str (hash of the training and tuning modules, only used as part of the cache key)
     Returns:
         model: RegressorMixin
     """
@@ -101,3 +263,39 @@ def train_model(
         X_train, X_test, y_train, y_test
     )
     return trained_model
+
+
+@step(enable_cache=False)
+def prepare_delta_step(delta_path: str, holdout_name: str = "Test") -> Tuple[
+    Annotated[np.ndarray, "X_delta"],
+    Annotated[np.ndarray, "X_holdout"],
+    Annotated[np.ndarray, "y_delta"],
+    Annotated[np.ndarray, "y_holdout"],
+]:
+    # Not cached: the output also depends on the fitted pipeline and the holdout of the last full training
+    delta_df = Batch_Prediction_Class.read_listings(delta_path)
+    holdout_df = read_artifact(holdout_name)
+    return prepare_delta(delta_df, holdout_df, base_pipeline_path(ModelNameConfig()))
+
+
+@step(enable_cache=False)
+def incremental_train_model(
+    X_delta: np.ndarray,
+    X_holdout: np.ndarray,
+    y_delta: np.ndarray,
+    y_holdout: np.ndarray,
+) -> RegressorMixin:
+    """
+    Args:
+        X_delta: np.array (processed new listings)
+        X_holdout: np.array
+        y_delta: np.array (price)
+        y_holdout: np.array (price)
+    Returns:
+        model: RegressorMixin
+    """
+    # Not cached: the result depends on the served model, which every accepted update replaces
+    model_train_obj = Model_training_Class()
+    return model_train_obj.incremental_model_training(
+        X_delta, X_holdout, y_delta, y_holdout
+    )
@@ -0,0 +1,72 @@
+import sys
+import json
+import hashlib
+import importlib.util
+import pandas as pd
+from Src.Exception import CustomException
+from Src.Model_Registry import file_checksum
+
+
+def file_fingerprint(path):
+    """
+    This function will return the sha256 of a data file. It is passed to the steps reading that file as a
+    parameter, so ZenML's cache key changes whenever the content of the file changes
+    """
+    try:
+        return file_checksum(path)
+    except Exception as e:
+        raise CustomException(e, sys)
+
+
+def config_fingerprint(config):
+    """
+    This function will return the sha256 of a pydantic configuration (e.g. ModelNameConfig)
+    """
+    config_json = json.dumps(json.loads(config.json()), sort_keys=True)
+    return hashlib.sha256(config_json.encode()).hexdigest()
+
+
+def source_fingerprint(module_names):
+    """
+    This function will return the sha256 of the source files of the given modules. ZenML's code hash only
+    covers the source of the step function itself, so the hash of the modules a step calls into is passed
+    to it as a parameter, and editing e.g. Data_Processing_Class invalidates the step
+    :param module_names: dotted module names (e.g. "Src.Data_Processing")
+    """
+    try:
+        digest = hashlib.sha256()
+        for name in sorted(module_names):
+            with open(importlib.util.find_spec(name).origin, "rb") as file:
+                digest.update(name.encode())
+                digest.update(file.read())
+        return digest.hexdigest()
+
+    except Exception as e:
+        raise CustomException(e, sys)
+
+
+def report_cache_usage(pipeline_name="train_pipeline"):
+    """
+    This function will return the cache hit / miss of every step of the last run of a pipeline
+    :return: DataFrame
+    """
+    from zenml.client import Client
+    from zenml.enums import ExecutionStatus
+
+    try:
+        last_run = Client().get_pipeline(pipeline_name).last_run
+        rows = []
+        for step_name, step_run in last_run.steps.items():
+            rows.append(
+                {
+                    "step": step_name,
+                    "status": step_run.status.value,
+                    "cache": (
+                        "hit" if step_run.status == ExecutionStatus.CACHED else "miss"
+                    ),
+                }
+            )
+        return pd.DataFrame(rows)
+
+    except Exception as e:
+        raise CustomException(e, sys)
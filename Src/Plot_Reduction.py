@@ -0,0 +1,137 @@
+import sys
+import numpy as np
+import pandas as pd
+from Src.Exception import CustomException
+
+
+# Upper bound of the number of raw points sent to the browser by one figure
+MAX_PLOT_POINTS = 5000
+
+
+def stratified_sample(df, by, max_rows=MAX_PLOT_POINTS, seed=0):
+    """
+    This function will sample at most max_rows rows, keeping the share of every group of the by column(s)
+    (every group keeps at least one row)
+    :return: DataFrame
+    """
+    try:
+        if len(df) <= max_rows:
+            return df
+        fraction = max_rows / len(df)
+        rng = np.random.default_rng(seed)
+        positions = []
+        for group_positions in df.groupby(by, observed=True).indices.values():
+            n = max(1, int(round(len(group_positions) * fraction)))
+            positions.append(rng.choice(group_positions, size=n, replace=False))
+        return df.iloc[np.sort(np.concatenate(positions))]
+
+    except Exception as e:
+        raise CustomException(e, sys)
+
+
+def aggregate_points(df, columns, value, count_name="listings"):
+    """
+    This function will collapse the rows sharing the same values of columns into one point with the
+    mean of value and the number of rows (exact for discrete columns like bedRoom / bathroom / balcony)
+    :return: DataFrame
+    """
+    return (
+        df.groupby(columns, observed=True)[value]
+        .agg(["mean", "size"])
+        .rename(columns={"mean": value, "size": count_name})
+        .reset_index()
+    )
+
+
+def bin_2d(df, x, y, bins=60, by=None, count_name="listings"):
+    """
+    This function will replace a scatter of x against y by the non empty cells of a bins x bins histogram
+    (computed per group of the by column), located at the cell centres
+    :return: DataFrame with x, y, count_name (and by) columns
+    """
+    try:
+        x_edges = np.histogram_bin_edges(df[x].to_numpy(dtype=float), bins=bins)
+        y_edges = np.histogram_bin_edges(df[y].to_numpy(dtype=float), bins=bins)
+        x_centres = (x_edges[:-1] + x_edges[1:]) / 2
+        y_centres = (y_edges[:-1] + y_edges[1:]) / 2
+
+        groups = df.groupby(by, observed=True) if by is not None else [(None, df)]
+        frames = []
+        for group, group_df in groups:
+            counts, _, _ = np.histogram2d(
+                group_df[x].to_numpy(dtype=float),
+                group_df[y].to_numpy(dtype=float),
+                bins=[x_edges, y_edges],
+            )
+            x_idx, y_idx = np.nonzero(counts)
+            frame = pd.DataFrame(
+                {
+                    x: x_centres[x_idx],
+                    y: y_centres[y_idx],
+                    count_name: counts[x_idx, y_idx].astype(np.int64),
+                }
+            )
+            if by is not None:
+                frame[by] = group
+            frames.append(frame)
+        return pd.concat(frames, ignore_index=True)
+
+    except Exception as e:
+        raise CustomException(e, sys)
+
+
+def _binned_kde(values, grid_points):
+    """
+    Gaussian KDE (Silverman bandwidth, as used by plotly's violin) evaluated on a regular grid from a
+    fine histogram of the values, so the cost is linear in the number of values
+    """
+    n = len(values)
+    std = values.std(ddof=1) if n > 1 else 0.0
+    iqr = np.subtract(*np.percentile(values, [75, 25]))
+    spread = min(std, iqr / 1.349) if iqr > 0 else std
+    bandwidth = 1.059 * spread * n ** (-1 / 5) if spread > 0 else 1e-3
+
+    lower, upper = values.min() - 3 * bandwidth, values.max() + 3 * bandwidth
+    fine_bins = grid_points * 8
+    counts, edges = np.histogram(values, bins=fine_bins, range=(lower, upper))
+    step = edges[1] - edges[0]
+    half_width = int(np.ceil(4 * bandwidth / step))
+    offsets = np.arange(-half_width, half_width + 1) * step
+    kernel = np.exp(-0.5 * (offsets / bandwidth) ** 2)
+    density = np.convolve(counts, kernel, mode="same")
+    density /= density.sum() * step
+
+    centres = (edges[:-1] + edges[1:]) / 2
+    grid = np.linspace(lower, upper, grid_points)
+    return grid, np.interp(grid, centres, density)
+
+
+def violin_summaries(df, x, y, grid_points=100):
+    """
+    This function will compute, for every group of x, the KDE curve and the box plot quantiles of y
+    :return: dict group -> dict(grid, density, q1, median, q3, lowerfence, upperfence, count)
+    """
+    try:
+        summaries = {}
+        for group, values in df.groupby(x, observed=True)[y]:
+            values = values.dropna().to_numpy(dtype=float)
+            if len(values) == 0:
+                continue
+            grid, density = _binned_kde(values, grid_points)
+            q1, median, q3 = np.percentile(values, [25, 50, 75])
+            iqr = q3 - q1
+            summaries[group] = {
+                "grid": grid,
+                "density": density,
+                "q1": q1,
+                "median": median,
+                "q3": q3,
+                # Whiskers end at the furthest values within 1.5 IQR, like plotly's box
+                "lowerfence": values[values >= q1 - 1.5 * iqr].min(),
+                "upperfence": values[values <= q3 + 1.5 * iqr].max(),
+                "count": len(values),
+            }
+        return summaries
+
+    except Exception as e:
+        raise CustomException(e, sys)
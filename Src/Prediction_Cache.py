@@ -0,0 +1,152 @@
+import time
+import threading
+from collections import OrderedDict
+import numpy as np
+import pandas as pd
+from Src.Model_Registry import get_registry
+from Src.Batch_Prediction import Batch_Prediction_Class, FEATURE_COLUMNS
+
+
+def feature_key(values):
+    """
+    This function will turn one row of prepared features (FEATURE_COLUMNS order) into a hashable tuple.
+    numpy scalars are converted to python values, numbers to float and missing values to None, since
+    NaN never compares equal to itself
+    """
+    key = []
+    for name, value in zip(FEATURE_COLUMNS, values):
+        if isinstance(value, np.generic):
+            value = value.item()
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            value = float(value)
+        if value is None or value is pd.NA or value != value:
+            value = None
+        key.append((name, value))
+    return tuple(key)
+
+
+def make_keys(features_df):
+    """
+    This function will return the key of every row of a frame already normalised by
+    Batch_Prediction_Class.prepare_features
+    """
+    return [feature_key(values) for values in features_df.itertuples(index=False)]
+
+
+def make_key(features):
+    """
+    This function will take one row of price features (dict, Series or one row DataFrame, as built by
+    create_input_features or sent to the inference server) and return its key. The row is normalised with
+    prepare_features first, so "sector 7", 7 and 7.0 or "No" and 0.0 give the same key
+    """
+    if isinstance(features, pd.DataFrame):
+        features_df = features.iloc[:1]
+    else:
+        features_df = pd.DataFrame([dict(features)])
+    return make_keys(Batch_Prediction_Class.prepare_features(features_df))[0]
+
+
+class Prediction_Cache:
+    """
+    Class holding a bounded LRU cache of price predictions with an optional time to live.
+    The cache is emptied whenever the checksum of the pipeline or the model artifact changes
+    """
+
+    def __init__(
+        self,
+        max_entries=4096,
+        ttl_seconds=None,
+        artifact_names=("regression_pipeline", "price_model"),
+    ):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.artifact_names = artifact_names
+        self._entries = OrderedDict()
+        self._version = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def _current_version(self):
+        registry = get_registry()
+        return tuple(registry.checksum(name) for name in self.artifact_names)
+
+    def _check_version(self):
+        version = self._current_version()
+        if version != self._version:
+            if self._entries:
+                self.invalidations += 1
+            self._entries.clear()
+            self._version = version
+
+    def version(self):
+        """
+        This method will return the artifact version the cached entries belong to. Callers take it before
+        computing a prediction and pass it to store
+        """
+        with self._lock:
+            self._check_version()
+            return self._version
+
+    def lookup(self, key):
+        """
+        This method will return the cached prediction for the key, or None
+        """
+        with self._lock:
+            self._check_version()
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, stored_at = entry
+                if (
+                    self.ttl_seconds is None
+                    or time.monotonic() - stored_at < self.ttl_seconds
+                ):
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def store(self, key, value, version):
+        """
+        This method will cache a prediction computed with the artifacts of the given version. It is dropped
+        when the artifacts changed meanwhile, as it may come from the old model
+        """
+        with self._lock:
+            self._check_version()
+            if version != self._version:
+                return
+            self._entries[key] = (value, time.monotonic())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def get_or_compute(self, features, compute_fn):
+        """
+        This method will return the cached prediction of the features, calling compute_fn() on a miss
+        :param features: one row of price features
+        :param compute_fn: function without arguments returning the prediction
+        """
+        key = make_key(features)
+        version = self.version()
+        value = self.lookup(key)
+        if value is None:
+            value = compute_fn()
+            self.store(key, value, version)
+        return value
+
+    def stats(self):
+        requests = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / requests if requests else 0.0,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+        }
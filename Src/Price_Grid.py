@@ -0,0 +1,248 @@
+import os
+import sys
+import time
+import hashlib
+import numpy as np
+import pandas as pd
+from Src.Exception import CustomException
+from Src.Artifact_Store import read_artifact
+from Src.Batch_Prediction import Batch_Prediction_Class, FEATURE_COLUMNS
+
+
+PRICE_GRID_PATH = os.path.join("Artifacts", "Price_Grid.npz")
+# Booster and pipeline the grid is scored with (the ones served by the application)
+MODEL_PATH = os.path.join("Artifacts", "xgboost_regressor_model.bin")
+PIPELINE_PATH = os.path.join("Notebook_And_Dataset", "Model Building", "Pipeline.pkl")
+
+# Axes of the grid (same ranges as the sliders of the price page)
+PROPERTY_TYPES = ("flat", "Independent_house")
+BEDROOM_AXIS = np.arange(1, 15, dtype=np.float64)
+BATHROOM_AXIS = np.arange(1, 15, dtype=np.float64)
+BUILT_UP_AREA_AXIS = np.arange(1000, 10001, 250, dtype=np.float64)
+
+# Inputs which are not part of the grid and are held at their most common value
+FIXED_COLUMNS = [
+    "balcony",
+    "agePossession",
+    "luxury_category",
+    "floor_category",
+    "servant room",
+    "furnishing_type",
+]
+
+
+class Price_Grid:
+    """
+    Class holding the predicted price of every (sector, property type, bedRoom, bathroom, built_up_area)
+    combination as a float32 array, so what-if curves are read without calling the model.
+    source_checksum identifies the booster and pipeline the prices were scored with
+    """
+
+    def __init__(self, prices, sectors, fixed_values, source_checksum=None):
+        self.prices = prices
+        self.sectors = sectors
+        self.fixed_values = fixed_values
+        self.source_checksum = source_checksum
+        self._sector_position = {sector: i for i, sector in enumerate(sectors)}
+
+    @classmethod
+    def load(cls, path=PRICE_GRID_PATH):
+        with np.load(path, allow_pickle=False) as grid_file:
+            fixed_values = dict(
+                zip(
+                    grid_file["fixed_columns"].tolist(),
+                    grid_file["fixed_values"].tolist(),
+                )
+            )
+            # Grids saved before the checksum was stored are treated as stale
+            source_checksum = None
+            if "source_checksum" in grid_file.files:
+                source_checksum = str(grid_file["source_checksum"]) or None
+            return cls(
+                grid_file["prices"], grid_file["sectors"], fixed_values, source_checksum
+            )
+
+    def save(self, path=PRICE_GRID_PATH):
+        # Written next to the grid and moved in place, so the registry never loads a partial file
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temporary_path = path + ".tmp"
+        with open(temporary_path, "wb") as file_obj:
+            np.savez_compressed(
+                file_obj,
+                prices=self.prices,
+                sectors=self.sectors,
+                fixed_columns=np.array(list(self.fixed_values.keys())),
+                fixed_values=np.array([str(v) for v in self.fixed_values.values()]),
+                source_checksum=np.array(self.source_checksum or ""),
+            )
+        os.replace(temporary_path, path)
+
+    def is_current(self, model_path=MODEL_PATH, pipeline_path=PIPELINE_PATH):
+        """
+        This method will tell whether the grid was scored with the current booster and pipeline
+        """
+        return self.source_checksum == source_checksum(model_path, pipeline_path)
+
+    def has_sector(self, sector):
+        return float(sector) in self._sector_position
+
+    def _positions(self, sector, property_type, bedRoom=None, bathroom=None):
+        positions = [
+            self._sector_position[float(sector)],
+            PROPERTY_TYPES.index(property_type),
+        ]
+        for axis, value in ((BEDROOM_AXIS, bedRoom), (BATHROOM_AXIS, bathroom)):
+            if value is not None:
+                positions.append(int(np.abs(axis - float(value)).argmin()))
+        return tuple(positions)
+
+    def area_curve(self, sector, property_type, bedRoom, bathroom):
+        """
+        This method will return the price versus built up area curve of one configuration
+        :return: DataFrame with built_up_area and price columns
+        """
+        prices = self.prices[self._positions(sector, property_type, bedRoom, bathroom)]
+        return pd.DataFrame({"built_up_area": BUILT_UP_AREA_AXIS, "price": prices})
+
+    def bedroom_curve(self, sector, property_type, bathroom, built_up_area):
+        """
+        This method will return the price versus number of bedrooms curve of one configuration
+        :return: DataFrame with bedRoom and price columns
+        """
+        sector_prices = self.prices[self._positions(sector, property_type)]
+        bathroom_position = int(np.abs(BATHROOM_AXIS - float(bathroom)).argmin())
+        area_position = int(np.abs(BUILT_UP_AREA_AXIS - float(built_up_area)).argmin())
+        return pd.DataFrame(
+            {
+                "bedRoom": BEDROOM_AXIS,
+                "price": sector_prices[:, bathroom_position, area_position],
+            }
+        )
+
+    def nbytes(self):
+        return int(self.prices.nbytes + self.sectors.nbytes)
+
+
+def source_checksum(model_path=MODEL_PATH, pipeline_path=PIPELINE_PATH):
+    """
+    This function will return the sha256 hex digest of the booster and pipeline files the grid is scored with
+    """
+    sha = hashlib.sha256()
+    for file_path in (model_path, pipeline_path):
+        sha.update(os.path.basename(file_path).encode())
+        with open(file_path, "rb") as file_obj:
+            sha.update(file_obj.read())
+    return sha.hexdigest()
+
+
+def most_common_values(data_df):
+    """
+    This function will return the mode of every input which is not an axis of the grid
+    """
+    fixed_values = {}
+    for col in FIXED_COLUMNS:
+        value = data_df[col].mode().iloc[0]
+        fixed_values[col] = value.item() if isinstance(value, np.generic) else value
+    fixed_values["balcony"] = str(fixed_values["balcony"])
+    return fixed_values
+
+
+def build_price_grid(
+    data_name="Data",
+    batch_size=100000,
+    model_path=MODEL_PATH,
+    pipeline_path=PIPELINE_PATH,
+):
+    """
+    This function will score the whole grid with the given pipeline and booster in vectorised batches
+    :param data_name: artifact used for the list of sectors and the most common values of the other inputs
+    :param batch_size: number of grid points transformed and predicted at once
+    :return: Price_Grid
+    """
+    try:
+        # Computed before loading, so files replaced during the build are picked up by the next refresh
+        checksum = source_checksum(model_path, pipeline_path)
+        data_df = read_artifact(data_name)
+        sectors = np.sort(data_df["sector"].astype(float).unique())
+        fixed_values = most_common_values(data_df)
+        batch_obj = Batch_Prediction_Class(
+            pipeline_path=pipeline_path, model_path=model_path
+        )
+
+        # Cartesian product of the axes in C order, so the predictions reshape straight into the grid
+        shape = (
+            len(sectors),
+            len(PROPERTY_TYPES),
+            len(BEDROOM_AXIS),
+            len(BATHROOM_AXIS),
+            len(BUILT_UP_AREA_AXIS),
+        )
+        sector_idx, type_idx, bed_idx, bath_idx, area_idx = np.indices(shape).reshape(
+            len(shape), -1
+        )
+        grid_df = pd.DataFrame(
+            {
+                "Property_Type": np.array(PROPERTY_TYPES, dtype=object)[type_idx],
+                "sector": sectors[sector_idx],
+                "built_up_area": BUILT_UP_AREA_AXIS[area_idx],
+                "bedRoom": BEDROOM_AXIS[bed_idx],
+                "bathroom": BATHROOM_AXIS[bath_idx],
+            }
+        )
+        for col, value in fixed_values.items():
+            grid_df[col] = value
+        grid_df = grid_df[FEATURE_COLUMNS]
+
+        prices = np.empty(len(grid_df), dtype=np.float32)
+        for start in range(0, len(grid_df), batch_size):
+            batch_df = grid_df.iloc[start : start + batch_size]
+            prices[start : start + len(batch_df)] = batch_obj.predict_frame(batch_df)
+
+        return Price_Grid(prices.reshape(shape), sectors, fixed_values, checksum)
+
+    except Exception as e:
+        raise CustomException(e, sys)
+
+
+def load_price_grid(path=PRICE_GRID_PATH):
+    """
+    This function will load the price grid artifact (registry loader). The grid is built by
+    refresh_price_grid in the training pipelines, never on a page load
+    """
+    return Price_Grid.load(path)
+
+
+def refresh_price_grid(
+    path=PRICE_GRID_PATH, model_path=MODEL_PATH, pipeline_path=PIPELINE_PATH
+):
+    """
+    This function will rebuild the price grid when it is missing or was scored with another booster or
+    pipeline than the current ones
+    :return: True if the grid was rebuilt
+    """
+    try:
+        if os.path.exists(path) and Price_Grid.load(path).is_current(
+            model_path, pipeline_path
+        ):
+            return False
+        build_price_grid(model_path=model_path, pipeline_path=pipeline_path).save(path)
+        return True
+
+    except Exception as e:
+        raise CustomException(e, sys)
+
+
+# USE THE BELOW-MENTIONED CODE TO REBUILD THE PRICE GRID AFTER REPLACING THE MODEL OR THE PIPELINE
+if __name__ == "__main__":
+    start = time.perf_counter()
+    if refresh_price_grid():
+        price_grid = Price_Grid.load()
+        print(
+            "Scored {0} grid points in {1:.1f}s ({2:.1f} MB)".format(
+                price_grid.prices.size,
+                time.perf_counter() - start,
+                price_grid.nbytes() / 1e6,
+            )
+        )
+    else:
+        print("The price grid is up to date")
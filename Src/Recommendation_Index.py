@@ -0,0 +1,426 @@
+import os
+import sys
+import time
+import pickle
+import hashlib
+import numpy as np
+import pandas as pd
+from Src.Exception import CustomException
+
+
+SOURCE_DIR = os.path.join("Artifacts", "Recommendation_Engine")
+INDEX_DIR = os.path.join(SOURCE_DIR, "TopK_Index")
+SOURCES = ("facilities", "prices")
+
+# Pickles (in SOURCE_DIR) the index is built from
+DENSE_PICKLES = {
+    "facilities": "CosineSim_facilities.pkl",
+    "prices": "CosineSim_Prices.pkl",
+}
+FACILITIES_PICKLE = "Facilities_RE.pkl"
+
+# Written next to the index: checksum of the pickles it was built from
+SOURCE_CHECKSUM_FILE = "source_checksum.txt"
+# Part of that checksum, bumped when the layout of the saved arrays changes so older indexes are rebuilt
+INDEX_FORMAT = "2"
+
+
+def _top_k(block_scores, k):
+    """
+    This function will take a 2d block of similarity scores and return the column indices and scores
+    of the k highest scores of every row, sorted in descending order
+    """
+    k = block_scores.shape[1] if k is None else min(k, block_scores.shape[1])
+    part = np.argpartition(-block_scores, k - 1, axis=1)[:, :k]
+    part_scores = np.take_along_axis(block_scores, part, axis=1)
+    order = np.argsort(-part_scores, axis=1, kind="stable")
+    # Scores keep the dtype of the source (float64), so blends match the dense matrices exactly
+    return (
+        np.take_along_axis(part, order, axis=1).astype(np.int32),
+        np.take_along_axis(part_scores, order, axis=1),
+    )
+
+
+class TopK_Index:
+    """
+    Class which stores the k most similar properties of every property for each similarity source,
+    as (N, k) arrays of neighbour positions and cosine scores. With k=None every property is stored and
+    the blended scores are exact. With a smaller k, a score missing from a row is looked up in the other
+    property's row (the similarities are symmetric), and properties whose score is still unknown are not
+    ranked rather than given an estimated score
+    """
+
+    def __init__(self, property_names, indices, scores):
+        self.property_names = pd.Index(property_names)
+        self.indices = indices
+        self.scores = scores
+
+    @classmethod
+    def build_from_dense(cls, property_names, matrices, k=None, block_size=1024):
+        """
+        This method will take already computed N x N similarity matrices (one per source) and keep
+        the top k entries of every row
+        :param property_names: names of the properties in row order
+        :param matrices: dict of source name -> N x N similarity matrix
+        :param k: number of neighbours stored per property (None = all)
+        :return: TopK_Index
+        """
+        indices, scores = {}, {}
+        for source, matrix in matrices.items():
+            matrix = np.asarray(matrix)
+            source_indices, source_scores = [], []
+            for start in range(0, matrix.shape[0], block_size):
+                block_indices, block_scores = _top_k(
+                    matrix[start : start + block_size], k
+                )
+                source_indices.append(block_indices)
+                source_scores.append(block_scores)
+            indices[source] = np.vstack(source_indices)
+            scores[source] = np.vstack(source_scores)
+        return cls(property_names, indices, scores)
+
+    @classmethod
+    def build_from_features(cls, property_names, features, k=None, block_size=1024):
+        """
+        This method will compute the cosine similarities block by block from the feature matrices, so
+        that only a block_size x N slice of the similarity matrix is in memory at any time
+        :param property_names: names of the properties in row order
+        :param features: dict of source name -> N x d feature matrix
+        :param k: number of neighbours stored per property (None = all)
+        :return: TopK_Index
+        """
+        indices, scores = {}, {}
+        for source, matrix in features.items():
+            matrix = np.asarray(matrix, dtype=np.float64)
+            norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+            norms[norms == 0] = 1.0
+            normalised = matrix / norms
+
+            source_indices, source_scores = [], []
+            for start in range(0, normalised.shape[0], block_size):
+                block = normalised[start : start + block_size] @ normalised.T
+                block_indices, block_scores = _top_k(block, k)
+                source_indices.append(block_indices)
+                source_scores.append(block_scores)
+            indices[source] = np.vstack(source_indices)
+            scores[source] = np.vstack(source_scores)
+        return cls(property_names, indices, scores)
+
+    def save(self, directory=INDEX_DIR):
+        """
+        This method will save every array as its own .npy file. Files are written next to the target
+        and swapped in with os.replace, so processes which memory-map the old files are not affected
+        """
+        try:
+            os.makedirs(directory, exist_ok=True)
+            arrays = {"property_names": np.asarray(self.property_names, dtype=str)}
+            for source in self.indices:
+                arrays[source + "_indices"] = self.indices[source]
+                arrays[source + "_scores"] = self.scores[source]
+
+            for name, array in arrays.items():
+                file_path = os.path.join(directory, name + ".npy")
+                with open(file_path + ".tmp", "wb") as file_obj:
+                    np.save(file_obj, array)
+                os.replace(file_path + ".tmp", file_path)
+
+        except Exception as e:
+            raise CustomException(e, sys)
+
+    @classmethod
+    def load(cls, directory=INDEX_DIR, sources=SOURCES, mmap_mode="r"):
+        """
+        This method will load a saved index. With mmap_mode="r" the arrays are memory-mapped, so nothing
+        is copied on load and the pages are shared by every process which maps the same files
+        """
+        try:
+            property_names = np.load(os.path.join(directory, "property_names.npy"))
+            indices, scores = {}, {}
+            for source in sources:
+                indices[source] = np.load(
+                    os.path.join(directory, source + "_indices.npy"),
+                    mmap_mode=mmap_mode,
+                )
+                scores[source] = np.load(
+                    os.path.join(directory, source + "_scores.npy"),
+                    mmap_mode=mmap_mode,
+                )
+            return cls(property_names, indices, scores)
+
+        except Exception as e:
+            raise CustomException(e, sys)
+
+    @property
+    def k(self):
+        return next(iter(self.indices.values())).shape[1]
+
+    def position(self, property_name):
+        return self.property_names.get_loc(property_name)
+
+    def neighbours(self, position, source):
+        """
+        This method will return the neighbour positions and scores stored for one property
+        """
+        return self.indices[source][position], self.scores[source][position]
+
+    def source_scores(self, position, candidates, source):
+        """
+        This method will return the score of every candidate against one property for one source, taken
+        from the stored row of the property or, failing that, from the stored row of the candidate
+        :param candidates: sorted 1d array of property positions
+        :return: 1d float64 array, NaN where the score is not stored
+        """
+        scores = np.full(len(candidates), np.nan)
+        row_indices, row_scores = self.neighbours(position, source)
+        order = np.argsort(row_indices)
+        sorted_indices = row_indices[order]
+        found = np.searchsorted(sorted_indices, candidates).clip(
+            max=len(sorted_indices) - 1
+        )
+        match = sorted_indices[found] == candidates
+        scores[match] = row_scores[order][found[match]]
+
+        missing = np.flatnonzero(~match)
+        if len(missing):
+            hits = self.indices[source][candidates[missing]] == position
+            has_hit = hits.any(axis=1)
+            reverse_scores = self.scores[source][candidates[missing[has_hit]]]
+            scores[missing[has_hit]] = reverse_scores[hits[has_hit]]
+        return scores
+
+    def dense_row(self, position, source):
+        """
+        This method will expand the stored neighbours of one property into a full length N row
+        (NaN for the properties whose score is not stored)
+        """
+        candidates = np.arange(len(self.property_names))
+        return self.source_scores(position, candidates, source)
+
+    def hybrid_scores(self, position, weights):
+        """
+        This method will blend the stored scores of one property across sources without building a full
+        length row. Candidates are the union of the per source neighbour lists, and only the candidates
+        with a known score in every source are returned
+        :param position: row position of the queried property
+        :param weights: dict of source name -> weight
+        :return: candidate positions, blended scores
+        """
+        candidates = np.unique(
+            np.concatenate([self.indices[source][position] for source in weights])
+        )
+        blended = np.zeros(len(candidates))
+        known = np.ones(len(candidates), dtype=bool)
+        for source, weight in weights.items():
+            source_scores = self.source_scores(position, candidates, source)
+            known &= ~np.isnan(source_scores)
+            blended += weight * source_scores
+        return candidates[known], blended[known]
+
+    def recommend(self, property_name, weights, top_n=5, position=None):
+        """
+        This method will return the top_n properties most similar to the given property
+        :param property_name: name of the queried property
+        :param weights: dict of source name -> weight
+        :param top_n: number of recommendations
+        :param position: row position of the property, when already looked up
+        :return: DataFrame with PropertyName and SimilarityScore columns
+        """
+        if position is None:
+            position = self.position(property_name)
+        candidates, blended = self.hybrid_scores(position, weights)
+        # As in the dense implementation, the first ranked property (normally the queried one, with a
+        # similarity of 1) is dropped
+        top_positions, top_scores = select_top_n(
+            blended, top_n + 1, positions=candidates
+        )
+        top_positions, top_scores = top_positions[1:], top_scores[1:]
+        return pd.DataFrame(
+            {
+                "PropertyName": self.property_names[top_positions].tolist(),
+                "SimilarityScore": top_scores,
+            }
+        )
+
+    def nbytes(self):
+        return sum(a.nbytes for a in self.indices.values()) + sum(
+            a.nbytes for a in self.scores.values()
+        )
+
+
+def select_top_n(scores, top_n, positions=None, exclude=None):
+    """
+    This function will select the top_n highest scores with a partial selection (argpartition) and only
+    sort those top_n entries (and the entries tied with them)
+    :param scores: 1d array of scores
+    :param top_n: number of entries to return
+    :param positions: property positions of the scores (defaults to 0..len(scores)-1)
+    :param exclude: property position to leave out (the queried property itself)
+    :return: positions, scores sorted by descending score
+    """
+    if positions is None:
+        positions = np.arange(len(scores))
+    if exclude is not None:
+        keep = positions != exclude
+        positions, scores = positions[keep], scores[keep]
+
+    top_n = min(top_n, len(scores))
+    if top_n == 0:
+        return positions[:0], scores[:0]
+    part = np.argpartition(-scores, top_n - 1)[:top_n]
+    # Every entry tied with the last selected score is kept, so ties are resolved by position like the
+    # stable sorted() of the dense implementation rather than by argpartition's arbitrary pick
+    tied = np.flatnonzero(scores >= scores[part].min())
+    order = np.lexsort((positions[tied], -scores[tied]))[:top_n]
+    return positions[tied[order]], scores[tied[order]]
+
+
+def hybrid_top_n_dense(matrices, position, weights, top_n=5):
+    """
+    This function will blend only the queried row of every dense similarity matrix and select its top_n
+    :param matrices: dict of source name -> N x N similarity matrix
+    :param position: row position of the queried property
+    :param weights: dict of source name -> weight
+    :return: positions, scores sorted by descending score
+    """
+    blended = sum(
+        weight * np.asarray(matrices[source][position])
+        for source, weight in weights.items()
+    )
+    top_positions, top_scores = select_top_n(blended, top_n + 1)
+    return top_positions[1:], top_scores[1:]
+
+
+def source_checksum(source_dir=SOURCE_DIR):
+    """
+    This function will return the sha256 hex digest of the pickles the index is built from (and of the
+    index format)
+    """
+    sha = hashlib.sha256(INDEX_FORMAT.encode())
+    for name in [FACILITIES_PICKLE] + sorted(DENSE_PICKLES.values()):
+        sha.update(name.encode())
+        with open(os.path.join(source_dir, name), "rb") as file_obj:
+            sha.update(file_obj.read())
+    return sha.hexdigest()
+
+
+def stored_source_checksum(directory=INDEX_DIR):
+    """
+    This function will return the checksum of the pickles a saved index was built from (None if unknown)
+    """
+    checksum_path = os.path.join(directory, SOURCE_CHECKSUM_FILE)
+    if not os.path.exists(checksum_path):
+        return None
+    with open(checksum_path) as file_obj:
+        return file_obj.read().strip()
+
+
+def build_index_from_pickles(source_dir=SOURCE_DIR, directory=INDEX_DIR, k=None):
+    """
+    This function will build the index from the dense cosine similarity pickles and save it as .npy files,
+    along with the checksum of the pickles
+    :return: TopK_Index
+    """
+    try:
+        # Computed before reading, so pickles replaced during the build are picked up by the next check
+        checksum = source_checksum(source_dir)
+        with open(os.path.join(source_dir, FACILITIES_PICKLE), "rb") as file:
+            facilities_df = pickle.load(file)
+        dense_matrices = {}
+        for source, name in DENSE_PICKLES.items():
+            with open(os.path.join(source_dir, name), "rb") as file:
+                dense_matrices[source] = pickle.load(file)
+
+        topk_index = TopK_Index.build_from_dense(
+            facilities_df.index, dense_matrices, k=k
+        )
+        topk_index.save(directory)
+
+        # Written last, so an interrupted build is rebuilt
+        checksum_path = os.path.join(directory, SOURCE_CHECKSUM_FILE)
+        with open(checksum_path + ".tmp", "w") as file_obj:
+            file_obj.write(checksum)
+        os.replace(checksum_path + ".tmp", checksum_path)
+        return topk_index
+
+    except Exception as e:
+        raise CustomException(e, sys)
+
+
+def load_recommendation_store(source_dir=SOURCE_DIR):
+    """
+    This function will memory-map the saved index (registry loader, keyed on the source pickles), building
+    it first if it does not exist yet or was built from other pickles
+    :param source_dir: directory of the pickles, the index is stored in its TopK_Index sub directory
+    :return: TopK_Index
+    """
+    directory = os.path.join(source_dir, os.path.basename(INDEX_DIR))
+    if stored_source_checksum(directory) != source_checksum(source_dir):
+        build_index_from_pickles(source_dir, directory)
+    return TopK_Index.load(directory)
+
+
+def benchmark_index(index, matrices, top_n=5, n_queries=200, seed=0):
+    """
+    This function will compare the memory and per query latency of the dense similarity matrices
+    against the top k index for every source
+    :param index: TopK_Index
+    :param matrices: dict of source name -> N x N similarity matrix
+    :return: DataFrame
+    """
+    rng = np.random.default_rng(seed)
+    positions = rng.integers(0, len(index.property_names), size=n_queries)
+
+    rows = []
+    for source, matrix in matrices.items():
+        matrix = np.asarray(matrix)
+
+        dense_times = []
+        for position in positions:
+            start = time.perf_counter()
+            top_indices = np.argsort(-matrix[position])[: top_n + 1]
+            dense_times.append(time.perf_counter() - start)
+
+        index_times = []
+        for position in positions:
+            start = time.perf_counter()
+            row_indices, row_scores = index.neighbours(position, source)
+            top_indices = row_indices[: top_n + 1]
+            index_times.append(time.perf_counter() - start)
+
+        for method, nbytes, times in (
+            ("dense", matrix.nbytes, dense_times),
+            (
+                "top_k",
+                index.indices[source].nbytes + index.scores[source].nbytes,
+                index_times,
+            ),
+        ):
+            times_ms = np.asarray(times) * 1000
+            rows.append(
+                {
+                    "source": source,
+                    "method": method,
+                    "memory_bytes": nbytes,
+                    "mean_latency_ms": times_ms.mean(),
+                    "p99_latency_ms": np.percentile(times_ms, 99),
+                }
+            )
+    return pd.DataFrame(rows)
+
+
+# USE THE BELOW-MENTIONED CODE TO BUILD THE INDEX FROM THE DENSE PICKLES AND BENCHMARK IT
+if __name__ == "__main__":
+    import argparse
+    from Src.Utilities import load_object
+
+    parser = argparse.ArgumentParser(description="Build the top k recommendation index")
+    parser.add_argument("--k", type=int, default=None)
+    parser.add_argument("--output", default=INDEX_DIR)
+    args = parser.parse_args()
+
+    topk_index = build_index_from_pickles(directory=args.output, k=args.k)
+    dense_matrices = {
+        source: load_object(os.path.join(SOURCE_DIR, name))
+        for source, name in DENSE_PICKLES.items()
+    }
+    print(benchmark_index(topk_index, dense_matrices))
@@ -0,0 +1,122 @@
+import os
+import sys
+import pickle
+import numpy as np
+import statsmodels.api as sm
+from scipy.stats import norm, skew, kurtosis, yeojohnson
+from Src.Exception import CustomException
+from Src.Artifact_Store import read_artifact
+from Src.Batch_Prediction import Batch_Prediction_Class
+from Src.Model_Registry import get_registry
+from Src.Compiled_Pipeline import pipeline_feature_names
+
+
+REGRESSION_ANALYSIS_MODEL_PATH = os.path.join(
+    "Artifacts", "regression_analysis_model.pkl"
+)
+
+
+def qq_data(values):
+    """
+    This function will compute the points of a normal Q-Q plot with a standardized reference line,
+    the same values as sm.qqplot(values, line='s') without drawing a matplotlib figure
+    :return: dict with the theoretical and sample quantiles and the two end points of the line
+    """
+    sample = np.sort(np.asarray(values, dtype=float))
+    n = len(sample)
+    # Plotting positions (i - a) / (n + 1 - 2a) with a = 0
+    theoretical = norm.ppf(np.arange(1, n + 1) / (n + 1))
+    line_x = theoretical[[0, -1]]
+    return {
+        "theoretical": theoretical,
+        "sample": sample,
+        "line_x": line_x,
+        "line_y": line_x * sample.std() + sample.mean(),
+    }
+
+
+def distribution_measures(values):
+    return {"skew": float(skew(values)), "kurtosis": float(kurtosis(values))}
+
+
+def fit_regression_analysis_model(df, reg_pipeline):
+    """
+    This function will fit the OLS model of the regression analysis on a dataset, the same way as
+    Model_Building.ipynb: processed features with a constant against the Yeo-Johnson transformed price.
+    Rows the pipeline can not encode (NaN features, e.g. an unknown category) are left out of the fit
+    :return: (statsmodels results, Yeo-Johnson lambda, number of rows left out)
+    """
+    X = np.asarray(
+        reg_pipeline.transform(Batch_Prediction_Class.prepare_features(df)),
+        dtype=float,
+    )
+    price = df["price"].to_numpy(dtype=float)
+    valid = np.isfinite(X).all(axis=1) & np.isfinite(price)
+
+    lambda_value = yeojohnson(price[valid])[1]
+    y = yeojohnson(price[valid], lambda_value)
+    model = sm.OLS(y, sm.add_constant(X[valid], has_constant="add")).fit()
+    return model, lambda_value, int((~valid).sum())
+
+
+def load_regression_analysis_model(path=REGRESSION_ANALYSIS_MODEL_PATH):
+    with open(path, "rb") as file:
+        return pickle.load(file)
+
+
+def regression_diagnostics(data_name="Data", refit=True):
+    """
+    This function will compute everything shown by the Regression Analysis page: the F-test, the coefficients
+    with their 95% confidence intervals, the residuals, and the distribution measures and Q-Q data of the
+    price before and after the Yeo-Johnson transformation
+    :param data_name: artifact the model is fitted on
+    :param refit: refit the OLS on the current data, otherwise use the stored regression_analysis_model.pkl
+    :return: dict of numbers and numpy arrays
+    """
+    try:
+        df = read_artifact(data_name)
+        price = df["price"].to_numpy(dtype=float)
+        yeo_price = yeojohnson(price, yeojohnson(price)[1])
+
+        reg_pipeline = get_registry().get("regression_pipeline")
+        dropped_rows = 0
+        if refit or not os.path.exists(REGRESSION_ANALYSIS_MODEL_PATH):
+            model, _, dropped_rows = fit_regression_analysis_model(df, reg_pipeline)
+        else:
+            model = load_regression_analysis_model()
+
+        n_features = len(model.params) - 1
+        feature_names = pipeline_feature_names(reg_pipeline)
+        if feature_names is not None and len(feature_names) == n_features:
+            variables = ["const"] + feature_names
+        else:
+            variables = ["const"] + ["x{0}".format(i + 1) for i in range(n_features)]
+
+        conf_int = np.asarray(model.conf_int(alpha=0.05))
+        return {
+            "variables": variables,
+            "coefficients": np.asarray(model.params),
+            "ci_lower": conf_int[:, 0],
+            "ci_upper": conf_int[:, 1],
+            "pvalues": np.asarray(model.pvalues),
+            "df_model": float(model.df_model),
+            "df_resid": float(model.df_resid),
+            "mse_model": float(model.mse_model),
+            "mse_resid": float(model.mse_resid),
+            "fvalue": float(model.fvalue),
+            "f_pvalue": float(model.f_pvalue),
+            "rsquared": float(model.rsquared),
+            "rsquared_adj": float(model.rsquared_adj),
+            "dropped_rows": dropped_rows,
+            "fitted": np.asarray(model.fittedvalues),
+            "residuals": np.asarray(model.resid),
+            "price": distribution_measures(price),
+            "yeo_price": distribution_measures(yeo_price),
+            "price_values": price,
+            "yeo_price_values": yeo_price,
+            "price_qq": qq_data(price),
+            "yeo_price_qq": qq_data(yeo_price),
+        }
+
+    except Exception as e:
+        raise CustomException(e, sys)
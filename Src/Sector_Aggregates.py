@@ -0,0 +1,80 @@
+import os
+import sys
+import pandas as pd
+from Src.Exception import CustomException
+from Src.Artifact_Store import read_artifact
+
+
+SECTOR_AGGREGATES_PATH = os.path.join("Artifacts", "Sector_Aggregates.parquet")
+PRICE_PERCENTILES = [0.1, 0.25, 0.75, 0.9]
+
+
+class Sector_Aggregates_Class:
+    def __init__(self):
+        pass
+
+    def build_sector_aggregates(self, listings_df):
+        """
+        This method will take the geo-coded listings and compute per sector statistics in a single groupby
+        :param listings_df: DataFrame with sector, price, built_up_area, latitude and longitude columns
+        :return: DataFrame indexed by sector
+        """
+        try:
+            grouped = listings_df.groupby("sector", observed=True)
+
+            aggregates_df = grouped.agg(
+                listings=("price", "size"),
+                price_mean=("price", "mean"),
+                price_median=("price", "median"),
+                built_up_area_mean=("built_up_area", "mean"),
+                built_up_area_median=("built_up_area", "median"),
+                latitude=("latitude", "mean"),
+                longitude=("longitude", "mean"),
+            )
+
+            percentiles_df = grouped["price"].quantile(PRICE_PERCENTILES).unstack()
+            percentiles_df.columns = [
+                "price_p{0}".format(int(q * 100)) for q in percentiles_df.columns
+            ]
+
+            return aggregates_df.join(percentiles_df)
+
+        except Exception as e:
+            raise CustomException(e, sys)
+
+    def read_listings(self, latlong_name="latlong"):
+        """
+        This method will read the columns of the geo-coded listings used by the sector aggregates
+        """
+        return read_artifact(
+            latlong_name,
+            columns=["sector", "price", "built_up_area", "latitude", "longitude"],
+        )
+
+    def save_sector_aggregates(
+        self, latlong_name="latlong", output_path=SECTOR_AGGREGATES_PATH
+    ):
+        """
+        This method will read the geo-coded listings, build the sector aggregates and store them as parquet
+        :return: DataFrame indexed by sector
+        """
+        try:
+            aggregates_df = self.build_sector_aggregates(
+                self.read_listings(latlong_name)
+            )
+
+            os.makedirs(os.path.dirname(output_path), exist_ok=True)
+            aggregates_df.to_parquet(output_path)
+            return aggregates_df
+
+        except Exception as e:
+            raise CustomException(e, sys)
+
+
+def load_sector_aggregates(path=SECTOR_AGGREGATES_PATH):
+    """
+    This function will load the sector aggregates artifact, building it first if it does not exist yet
+    """
+    if not os.path.exists(path):
+        return Sector_Aggregates_Class().save_sector_aggregates(output_path=path)
+    return pd.read_parquet(path)
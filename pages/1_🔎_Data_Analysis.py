@@ -8,7 +8,22 @@ import plotly.express as px
 from plotly.subplots import make_subplots
 import statsmodels.api as sm
 import plotly.figure_factory as ff
+import plotly.io as pio
 import warnings
+from Src.Analytics import (
+    PIE_COLUMNS,
+    BAR_COLUMNS,
+    data_version,
+    load_analysis_data,
+    compute_summary_tables,
+)
+from Src.Plot_Reduction import (
+    MAX_PLOT_POINTS,
+    stratified_sample,
+    aggregate_points,
+    bin_2d,
+    violin_summaries,
+)
 
 
 st.markdown(
@@ -32,15 +47,131 @@ st.markdown(
 
 
 @st.cache_resource
-def load_dataframe():
-    df = pd.read_csv('Artifacts/Data.csv')
-    df.drop(['store room'], axis=1, inplace=True)
-    df['sector'] = df['sector'].astype(object)
-    return df
+def load_dataframe(version):
+    # The data version is only part of the cache key, a new version of the data reloads it
+    return load_analysis_data('Data')
+
+
+PIE_TITLES = {
+    'luxury_category': 'Distribution of Luxury Category',
+    'floor_category': 'Distribution of Floor Category',
+    'Property_Type': 'Distribution of Property type feature',
+    'agePossession': 'Distribution of agePossession feature',
+}
+BAR_TITLES = {
+    'bedRoom': 'Distribution of Bedrooms',
+    'bathroom': 'Distribution of Bathrooms',
+    'balcony': 'Distribution of Balconies',
+    'furnishing_type': 'Distribution of Furnishing Type',
+}
+
+
+def violin_figure(df, x, y, title):
+    """
+    This method will draw violins from precomputed KDE curves and quantiles plus a stratified sample of the
+    points, so the size of the figure does not grow with the data
+    :return: plotly figure
+    """
+    summaries = violin_summaries(df, x, y)
+    sample_df = stratified_sample(df, x, max_rows=MAX_PLOT_POINTS)
+    fig = go.Figure()
+    groups = list(summaries.keys())
+    for position, group in enumerate(groups):
+        summary = summaries[group]
+        half_width = 0.4 * summary['density'] / summary['density'].max()
+        fig.add_trace(go.Scatter(x=np.concatenate([position - half_width, (position + half_width)[::-1]]),
+                                 y=np.concatenate([summary['grid'], summary['grid'][::-1]]),
+                                 fill='toself', mode='lines', name=str(group), legendgroup=str(group),
+                                 hoverinfo='skip', line={'width': 1}))
+        fig.add_trace(go.Box(x=[position], q1=[summary['q1']], median=[summary['median']], q3=[summary['q3']],
+                             lowerfence=[summary['lowerfence']], upperfence=[summary['upperfence']],
+                             width=0.1, showlegend=False, legendgroup=str(group), marker_color='black'))
+        points = sample_df.loc[sample_df[x] == group, y].to_numpy(dtype=float)
+        jitter = np.random.default_rng(position).uniform(-0.05, 0.05, len(points))
+        fig.add_trace(go.Scatter(x=position - 0.45 + jitter, y=points, mode='markers', showlegend=False,
+                                 legendgroup=str(group), marker={'size': 3, 'opacity': 0.5}))
+    fig.update_layout(title=title, xaxis={'tickvals': list(range(len(groups))),
+                                          'ticktext': [str(group) for group in groups], 'title': x},
+                      yaxis_title=y)
+    return fig
+
+
+def build_figures(df, tables):
+    """
+    This method will build every figure of the page from the data and its summary tables
+    :return: dict of figures
+    """
+    figures = {}
 
+    # Bubble plot of the sector frequencies
+    fig = px.scatter(tables['sector_counts'], x='sector', y='count', size='count',
+                     labels={'sector': 'Sector', 'count': 'Count'},
+                     title='Understanding the frequency of sectors',
+                     size_max=50, color_discrete_sequence=['#086ccc'])
+    fig.update_layout(yaxis={'categoryorder': 'total ascending'})
+    figures['sector_counts'] = fig
+
+    # Pie and bar charts are drawn from the precomputed counts instead of the full data
+    for col in PIE_COLUMNS:
+        fig = px.pie(tables[col + '_counts'], names=col, values='count', title=PIE_TITLES[col])
+        fig.update_layout(height=380, width=380)  # Adjust size here
+        figures[col + '_pie'] = fig
+
+    for col in BAR_COLUMNS:
+        counts = tables[col + '_counts']
+        fig = px.bar(x=counts[col], y=counts['count'], title=BAR_TITLES[col])
+        fig.update_layout(height=380, width=380)  # Adjust size here
+        figures[col + '_bar'] = fig
+
+    figures['q1'] = px.box(df, x='Property_Type', y='price', title='Property Type vs Price')
+    # Bedrooms, bathrooms and balconies are discrete, so every distinct combination becomes one point
+    points_df = aggregate_points(df, ['bedRoom', 'bathroom', 'balcony'], 'price')
+    figures['q2'] = px.scatter_3d(points_df, x='bedRoom', y='bathroom', z='balcony', color='price',
+                                  hover_data=['listings'], title='Bedrooms, Bathrooms, Balconies vs Price',
+                                  color_continuous_scale='viridis')
+    figures['q3'] = violin_figure(df, 'agePossession', 'price', 'Age/Possession Status vs Price')
+    if len(df) <= MAX_PLOT_POINTS:
+        figures['q4'] = px.scatter(df, x='built_up_area', y='price', color='Property_Type',
+                                   facet_col='Property_Type', title='Built-up Area vs Price by Property Type')
+    else:
+        # Large data: one marker per non empty cell of a 2D histogram, sized by its number of listings
+        binned_df = bin_2d(df, 'built_up_area', 'price', by='Property_Type')
+        figures['q4'] = px.scatter(binned_df, x='built_up_area', y='price', color='Property_Type',
+                                   size='listings', facet_col='Property_Type',
+                                   title='Built-up Area vs Price by Property Type')
+    figures['q5'] = px.line(df, x='luxury_category', y='price', color='furnishing_type', markers=True,
+                            title='Luxury Category and Furnishing Type vs Price')
+    figures['q6'] = px.box(df, x='floor_category', y='price', color='Property_Type',
+                           title='Floor Categories vs Price by Property Type', facet_col='Property_Type')
+    figures['q7'] = px.line(df, x='balcony', y='price', color='agePossession', markers=True,
+                            title='Number of Balconies and Age of Property vs Price')
+    figures['q8'] = px.box(df, x='servant room', y='price', color='Property_Type',
+                           title='Servant Room Presence vs Price by Property Type')
+
+    fig = px.imshow(tables['sector_type_price'], title='Sector and Property Type vs Price', aspect='auto')
+    fig.update_layout(width=1500)
+    figures['sector_type_price'] = fig
+    return figures
+
+
+@st.cache_data
+def load_figures(version):
+    """
+    This method will compute the summary tables and figures once per data version and keep them as JSON,
+    so a rerun of the page only costs a cache lookup
+    :return: dict of figure JSON strings, the data shape and the first rows of the data
+    """
+    df = load_dataframe(version)
+    tables = compute_summary_tables(df)
+    figures = build_figures(df, tables)
+    return {name: fig.to_json() for name, fig in figures.items()}, tables['shape'], tables['head']
 
 
-def univariate_analysis(df):
+def show_figure(figures, name, **kwargs):
+    st.plotly_chart(pio.from_json(figures[name]), **kwargs)
+
+
+def univariate_analysis(figures, shape, head):
     st.markdown(
         "<h2 style='text-align: left; font-size: 40px; '>Introductory Analysis</h1>",
         unsafe_allow_html=True,
@@ -48,92 +179,37 @@ def univariate_analysis(df):
 
     col1, col2 = st.columns(spec=(2, 1), gap="small")
     with col1:
-        st.dataframe(df.head(8))
+        st.dataframe(head)
     with col2:
         st.markdown(
             "<p style='font-size: 17px; text-align: left;background-color:#abdbfc;padding:1rem;'>Welcome to the Univariate Analysis Module! When it comes to understanding data, focusing on one thing at a time is key. It's all about looking closely at one variable at a time, helping us uncover important patterns and insights. Think of it as the first step in exploring data, like peeling back layers to reveal what's underneath and discover the secrets hidden within your data!.</p>",
             unsafe_allow_html=True,
         )
         with st.expander(label = "What is the overall dimensionality of the dataset ?"):
-            st.write(df.shape,"Which means there are around 3630 rows and 12 features")
+            st.write(shape,"Which means there are around 3630 rows and 12 features")
         with st.expander(label = "What's the count of categorical/numerical features in our data ?"):
             st.write("Out of the 12 features, 10 are categorical—6 ordinal and 2 nominal—while 2 are continuous numerical.")
 
 
     # Plotting the bubble plot
-    sector_counts = df['sector'].value_counts().reset_index()
-    sector_counts.columns = ['sector', 'count']
-
-    # Create bubble plot
-    fig = px.scatter(sector_counts, x='sector', y='count', size='count',
-                     labels={'sector': 'Sector', 'count': 'Count'},
-                     title='Understanding the frequency of sectors',
-                     size_max=50, color_discrete_sequence=['#086ccc'])
-
-    fig.update_layout(yaxis={'categoryorder': 'total ascending'})
-    st.plotly_chart(fig, use_container_width=True)
+    show_figure(figures, 'sector_counts', use_container_width=True)
 
     # Plotting the pie charts
-    pie_col1, pie_col2, pie_col3, pie_col4 = st.columns(spec=(1, 1, 1, 1), gap="large")
-
-    with pie_col1:
-        # Plot pie chart for employment_type
-        fig1 = px.pie(df, names='luxury_category', title='Distribution of Luxury Category')
-        fig1.update_layout(height=380, width=380)  # Adjust size here
-        st.plotly_chart(fig1, use_container_width=True)
+    pie_cols = st.columns(spec=(1, 1, 1, 1), gap="large")
+    for pie_col, col in zip(pie_cols, PIE_COLUMNS):
+        with pie_col:
+            show_figure(figures, col + '_pie', use_container_width=True)
 
-    with pie_col2:
-        # Plot pie chart for required_experience
-        fig2 = px.pie(df, names='floor_category', title='Distribution of Floor Category')
-        fig2.update_layout(height=380, width=380)  # Adjust size here
-        st.plotly_chart(fig2, use_container_width=True)
 
-    with pie_col3:
-        # Plot pie chart for required_education
-        fig3 = px.pie(df, names='Property_Type', title='Distribution of Property type feature')
-        fig3.update_layout(height=380, width=380)  # Adjust size here
-        st.plotly_chart(fig3, use_container_width=True)
+    # Plotting the bar plots
+    bar_cols = st.columns(spec=(1, 1, 1, 1), gap="large")
+    for bar_col, col in zip(bar_cols, BAR_COLUMNS):
+        with bar_col:
+            show_figure(figures, col + '_bar', use_container_width=True)
 
-    with pie_col4:
-        # Plot pie chart for required_education
-        fig4 = px.pie(df, names='agePossession', title='Distribution of agePossession feature')
-        fig4.update_layout(height=380, width=380)  # Adjust size here
-        st.plotly_chart(fig4, use_container_width=True)
 
 
-    # Plotting the bar plots
-    bar_col1, bar_col2, bar_col3, bar_col4 = st.columns(spec=(1, 1, 1, 1), gap="large")
-    with bar_col1:
-        # Plot bar plot for bedRoom
-        fig1 = px.bar(df, x=df['bedRoom'].value_counts().index, y=df['bedRoom'].value_counts().values,
-                      title='Distribution of Bedrooms')
-        fig1.update_layout(height=380, width=380)  # Adjust size here
-        st.plotly_chart(fig1, use_container_width=True)
-
-    with bar_col2:
-        # Plot bar plot for bathroom
-        fig2 = px.bar(df, x=df['bathroom'].value_counts().index, y=df['bathroom'].value_counts().values,
-                      title='Distribution of Bathrooms')
-        fig2.update_layout(height=380, width=380)  # Adjust size here
-        st.plotly_chart(fig2, use_container_width=True)
-
-    with bar_col3:
-        # Plot bar plot for balcony
-        fig3 = px.bar(df, x=df['balcony'].value_counts().index, y=df['balcony'].value_counts().values,
-                      title='Distribution of Balconies')
-        fig3.update_layout(height=380, width=380)  # Adjust size here
-        st.plotly_chart(fig3, use_container_width=True)
-
-    with bar_col4:
-        # Plot bar plot for furnishing_type
-        fig4 = px.bar(df, x=df['furnishing_type'].value_counts().index, y=df['furnishing_type'].value_counts().values,
-                      title='Distribution of Furnishing Type')
-        fig4.update_layout(height=380, width=380)  # Adjust size here
-        st.plotly_chart(fig4, use_container_width=True)
-
-
-
-def multivariate_analysis(data):
+def multivariate_analysis(figures):
     st.title("Multivariate Analysis")
     st.markdown(
         "<p style='font-size: 20px; text-align: left;'>Multivariate analysis is a statistical approach that examines data sets with multiple variables simultaneously, contrasting with univariate analysis, which focuses on single variables. By considering the relationships between two or more variables, it unveils complex data structures and patterns. In predicting house prices, multivariate analysis proves invaluable, as it delves into the interdependencies among factors like location, size, amenities, and market trends. Rather than scrutinizing variables in isolation, this method enables a comprehensive understanding of how various factors collectively influence house prices, enhancing predictive accuracy and guiding informed decision-making in real estate transactions.</p>",
@@ -145,34 +221,27 @@ def multivariate_analysis(data):
         st.markdown(
             "<p style='font-size:17px; background-color: #abdbfc; padding: 0.5rem'><strong>Question 1:</strong> What is the relationship between property type and price?</p>",
             unsafe_allow_html=True)
-        fig1 = px.box(data, x='Property_Type', y='price', title='Property Type vs Price')
-        st.plotly_chart(fig1)
+        show_figure(figures, 'q1')
 
     with col1:
         st.markdown(
             "<p style='font-size:17px; background-color: #abdbfc; padding: 0.5rem'><strong>Question 2:</strong> How does the number of bedrooms, bathrooms, and balconies collectively affect the price?</p>",
             unsafe_allow_html=True)
-        fig2 = px.scatter_3d(data, x='bedRoom', y='bathroom', z='balcony', color='price',
-                             title='Bedrooms, Bathrooms, Balconies vs Price', color_continuous_scale='viridis')
-        st.plotly_chart(fig2)
+        show_figure(figures, 'q2')
 
 
     with col1:
         st.markdown(
             "<p style='font-size:17px; background-color: #abdbfc; padding: 0.5rem'><strong>Question 3:</strong> What is the impact of the age/possession status of the property on its price when controlling for other variables?</p>",
             unsafe_allow_html=True)
-        fig3 = px.violin(data, x='agePossession', y='price', box=True, points='all',
-                         title='Age/Possession Status vs Price')
-        st.plotly_chart(fig3)
+        show_figure(figures, 'q3')
 
 
     with col1:
         st.markdown(
             "<p style='font-size:17px; background-color: #abdbfc; padding: 0.5rem'><strong>Question 4:</strong> Does built-up area influence the price differently across different property types?</p>",
             unsafe_allow_html=True)
-        fig4 = px.scatter(data, x='built_up_area', y='price', color='Property_Type', facet_col='Property_Type',
-                          title='Built-up Area vs Price by Property Type')
-        st.plotly_chart(fig4)
+        show_figure(figures, 'q4')
 
 
 
@@ -180,61 +249,45 @@ def multivariate_analysis(data):
         st.markdown(
             "<p style='font-size:17px; background-color: #abdbfc; padding: 0.5rem'><strong>Question 5:</strong> What is the combined effect of luxury category and furnishing type on the price?</p>",
             unsafe_allow_html=True)
-        fig5 = px.line(data, x='luxury_category', y='price', color='furnishing_type', markers=True,
-                       title='Luxury Category and Furnishing Type vs Price')
-        st.plotly_chart(fig5)
+        show_figure(figures, 'q5')
 
 
     with col2:
         st.markdown(
             "<p style='font-size:17px; background-color: #abdbfc; padding: 0.5rem'><strong>Question 6:</strong> How do floor categories impact house prices for different property types and built-up areas?</p>",
             unsafe_allow_html=True)
-        fig6 = px.box(data, x='floor_category', y='price', color='Property_Type',
-                      title='Floor Categories vs Price by Property Type', facet_col='Property_Type')
-        st.plotly_chart(fig6)
+        show_figure(figures, 'q6')
 
 
     with col2:
         st.markdown(
             "<p style='font-size:17px; background-color: #abdbfc; padding: 0.5rem'><strong>Question 7:</strong>Is there a significant interaction between the number of balconies and the age of the property on the price?</p>",
             unsafe_allow_html=True)
-        fig7 = px.line(data, x='balcony', y='price', color='agePossession', markers=True,
-                       title='Number of Balconies and Age of Property vs Price')
-        st.plotly_chart(fig7)
+        show_figure(figures, 'q7')
 
 
     with col2:
         st.markdown(
             "<p style='font-size:17px; background-color: #abdbfc; padding: 0.5rem'><strong>Question 8:</strong> How does the presence of a servant room influence the price across different property types and sectors?</p>",
             unsafe_allow_html=True)
-        fig8 = px.box(data, x='servant room', y='price', color='Property_Type',
-                      title='Servant Room Presence vs Price by Property Type')
-        st.plotly_chart(fig8)
-
-
-    # Get the counts of each sector
-    sector_counts = data['sector'].value_counts()
-    sectors_to_keep = sector_counts[sector_counts > 40].index
-    filtered_data = data[data['sector'].isin(sectors_to_keep)]
-    pivot_table = filtered_data.pivot_table(values='price', index='sector', columns='Property_Type',
-                                            aggfunc='mean').reset_index()
-    pivot_table = pivot_table.set_index('sector').T
-    fig = px.imshow(pivot_table, title='Sector and Property Type vs Price', aspect='auto')
-    fig.update_layout(width=1500)
-    st.plotly_chart(fig)
+        show_figure(figures, 'q8')
+
+
+    # Heatmap of the mean price per sector (more than 40 listings) and property type
+    show_figure(figures, 'sector_type_price')
 
 
 
 def visualizations():
 
-    # Calling the functions for loading the dataset and also the basic details
-    df = load_dataframe()
+    # Calling the functions for loading the figures (computed once per data version) and also the basic details
+    figures, shape, head = load_figures(data_version('Data'))
 
     # Calling the function for adding univariate analysis
-    univariate_analysis(df)
+    univariate_analysis(figures, shape, head)
 
     # Calling function fo
-    multivariate_analysis(df)
+    multivariate_analysis(figures)
 
 
 
@@ -1,3 +1,4 @@
+import os
 import streamlit as st
 import plotly.express as px
 import pandas as pd
@@ -5,6 +6,11 @@ import pickle
 import xgboost as xgb
 import warnings
 import numpy as np
+from Src.Model_Registry import get_registry
+from Src.Price_Grid import PRICE_GRID_PATH
+from Src.Sector_Aggregates import load_sector_aggregates, SECTOR_AGGREGATES_PATH
+from Src.Analytics import file_version
+from Src.Prediction_Cache import Prediction_Cache
 from sklearn.preprocessing import (
     OrdinalEncoder,
     OneHotEncoder,
@@ -26,11 +32,12 @@ st.markdown(
     unsafe_allow_html=True,
 )
 
-lat_long_df = pd.read_csv("Artifacts/latlong.csv")
 
-group_df = lat_long_df.groupby("sector").mean(numeric_only=True)[
-    ["price", "built_up_area", "latitude", "longitude"]
-]
+@st.cache_data
+def load_group_df(data_version):
+    # Precomputed per sector statistics (built by the training pipeline). data_version (checksum of the
+    # file) is only part of the cache key, so the map is reloaded when the pipeline rewrites the file
+    return load_sector_aggregates()
 
 
 property_type_dict = {"Flat": "flat", "Independent House": "Independent_house"}
@@ -149,15 +156,14 @@ sector_options = (
 
 
 @st.cache_resource
-def load_reg_pipeline():
+def load_prediction_cache():
+    # One cache shared by all the sessions, emptied when the pipeline or model artifact changes
+    return Prediction_Cache(max_entries=4096)
+
 
-    # Load the pipeline from the pickle file
-    with open(
-        "Notebook_And_Dataset/Model Building/Pipeline.pkl",
-        "rb",
-    ) as file:
-        reg_pipeline = pickle.load(file)
-        return reg_pipeline
+def load_reg_pipeline():
+    # The pipeline is loaded once per process by the model registry
+    return get_registry().get("regression_pipeline")
 
 
 def create_input_features(
@@ -207,6 +213,11 @@ def process_input(Input_df):
     This method will take the input dataframe and return a 2d numpy array (Processed data) for making prediction
     :return:
     """
+    # Fast path: the pipeline compiled into lookup tables and NumPy operations (same output as transform)
+    compiled_pipeline = get_registry().get("compiled_regression_pipeline")
+    if compiled_pipeline is not None:
+        return compiled_pipeline.transform_rows(Input_df.to_numpy(dtype=object))
+
     reg_pipeline = load_reg_pipeline()
     Input = reg_pipeline.transform(Input_df)
     return Input
@@ -218,8 +229,8 @@ def predict(Input):
     :return:
     """
 
-    # Load the model from the pickle file
-    model = xgb.Booster(model_file="Artifacts/xgboost_regressor_model.bin")
+    # Get the already loaded booster from the model registry
+    model = get_registry().get("price_model")
 
     # Assuming 'Input' is your numpy.ndarray
     data_matrix = xgb.DMatrix(Input)
@@ -227,6 +238,57 @@ def predict(Input):
     return predicted_value
 
 
+def show_sensitivity_curves(Property_Type, sector, bedRoom, bathroom, built_up_area):
+    """
+    This method will plot how the price changes with the built up area and the number of bedrooms,
+    read from the precomputed price grid instead of calling the model for every point
+    :return: None
+    """
+    # The grid is built offline (training pipelines or python -m Src.Price_Grid), the page only reads it
+    if not os.path.exists(PRICE_GRID_PATH):
+        st.caption(
+            "Price curves are not available: the price grid has not been built yet"
+        )
+        return
+    price_grid = get_registry().get("price_grid")
+    if not price_grid.is_current():
+        st.caption(
+            "Price curves are not available: the price grid was scored with a previous model"
+        )
+        return
+    sector_value = float(sector.split()[1])
+    if not price_grid.has_sector(sector_value):
+        return
+    property_type = property_type_dict[Property_Type]
+
+    area_df = price_grid.area_curve(sector_value, property_type, bedRoom, bathroom)
+    area_fig = px.line(
+        area_df,
+        x="built_up_area",
+        y="price",
+        title="Price vs Built up Area in {0} ({1} BHK, {2} bathrooms)".format(
+            sector, bedRoom, bathroom
+        ),
+    )
+    area_fig.add_vline(x=built_up_area, line_dash="dash")
+    st.plotly_chart(area_fig, use_container_width=True)
+
+    bedroom_df = price_grid.bedroom_curve(
+        sector_value, property_type, bathroom, built_up_area
+    )
+    bedroom_fig = px.line(
+        bedroom_df,
+        x="bedRoom",
+        y="price",
+        markers=True,
+        title="Price vs Bedrooms in {0} ({1} sq.ft)".format(sector, built_up_area),
+    )
+    st.plotly_chart(bedroom_fig, use_container_width=True)
+    st.caption(
+        "Curves from the precomputed price grid, the other inputs are held at their most common values"
+    )
+
+
 def Price_Prediction_Page():
 
     page_col1, page_col2 = st.columns(spec=(2, 1.5), gap="large")
@@ -342,27 +404,43 @@ def Price_Prediction_Page():
                     servant_room,
                     balcony,
                 )
-                Input = process_input(Input_df)
-                Predicted_value = predict(Input)
+                prediction_cache = load_prediction_cache()
+                Predicted_value = prediction_cache.get_or_compute(
+                    Input_df, lambda: float(predict(process_input(Input_df))[0])
+                )
                 st.write(
                     "<p style='font-size: 20px;'>The estimated Price of the property will be <strong>"
-                    + str(round(Predicted_value[0], 2))
+                    + str(round(Predicted_value, 2))
                     + "Cr</strong></p>",
                     unsafe_allow_html=True,
                 )
+                st.caption(
+                    "Prediction cache hit rate: {hit_rate:.0%} ({hits} hits, {entries} entries)".format(
+                        **prediction_cache.stats()
+                    )
+                )
 
     with page_col2:
         # Create your plotly map
+        group_df = load_group_df(file_version(SECTOR_AGGREGATES_PATH))
         fig = px.scatter_mapbox(
             group_df,
             lat="latitude",
             lon="longitude",
-            color="price",
-            size="built_up_area",
+            color="price_mean",
+            size="built_up_area_mean",
             color_continuous_scale=px.colors.cyclical.IceFire,
             zoom=10,
             mapbox_style="open-street-map",
             text=group_df.index,
+            hover_data={
+                "listings": True,
+                "price_median": ":.2f",
+                "price_p25": ":.2f",
+                "price_p75": ":.2f",
+                "built_up_area_median": ":.0f",
+            },
+            labels={"price_mean": "price", "built_up_area_mean": "built_up_area"},
         )
 
         # Adjust the height of the map
@@ -372,5 +450,11 @@ def Price_Prediction_Page():
         st.write("")
         st.plotly_chart(fig)
 
+        # What-if curves for the selected sector and property type
+        if sector is not None and Property_Type is not None:
+            show_sensitivity_curves(
+                Property_Type, sector, bedRoom, bathroom, built_up_area
+            )
+
 
 Price_Prediction_Page()
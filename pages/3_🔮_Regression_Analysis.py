@@ -1,12 +1,16 @@
 import streamlit as st
 import pickle
 import pandas as pd
+import numpy as np
 import plotly.graph_objs as go
 import plotly.express as px
 import statsmodels.api as sm
 from scipy.stats import skew,yeojohnson
 import plotly.figure_factory as ff
 import warnings
+from Src.Analytics import data_version
+from Src.Model_Registry import get_registry
+from Src.Regression_Diagnostics import regression_diagnostics
 
 
 st.markdown(
@@ -24,14 +28,38 @@ st.markdown(
 )
 
 
-@st.cache_resource
-def load_dataset():
-    df = pd.read_csv("Notebook_And_Dataset/Cleaned_datasets/Combined_CleanData_V4.csv")
-    return df
+@st.cache_data
+def load_diagnostics(data_hash, pipeline_checksum):
+    # Refitted only when the data or the processing pipeline changes (both are part of the cache key)
+    return regression_diagnostics("Data")
 
 
+# Display names of the processed features (exog columns of the OLS model)
+VARIABLE_LABELS = {
+    'built_up_area': 'Builtup Area',
+    'balcony': 'Balcony',
+    'agePossession': 'Age Possesion',
+    'luxury_category': 'Luxury Category',
+    'floor_category': 'Floor Category',
+    'Property_Type_flat': 'Property Type (flat)',
+    'Property_Type_Independent_house': 'Property Type (house)',
+    'sector': 'Sector',
+    'bedRoom': 'Bedroom',
+    'bathroom': 'Bathroom',
+    'servant room': 'Servant Room',
+    'furnishing_type': 'Furnishing Type',
+}
 
-def conduct_f_test():
+
+def format_p_value(p_value):
+    # Below half the machine epsilon the F distribution's survival function is not meaningful
+    if p_value < np.finfo(float).eps / 2:
+        return "< 1.11×10^−16"
+    return "{0:.3g}".format(p_value)
+
+
+
+def conduct_f_test(diagnostics):
     st.title("F test for Overall significance")
     st.markdown(
         "<p style='font-size: 19px; text-align: left;'>"
@@ -54,19 +82,23 @@ def conduct_f_test():
     with col2:
         st.write("")
         st.markdown(
-            "<p style='font-size: 19px; text-align: left;background-color:#abdbfc;padding:1rem;'>Degree of Freedom of model 11, and degree of freedom of residual 2892.</p>",
+            "<p style='font-size: 19px; text-align: left;background-color:#abdbfc;padding:1rem;'>Degree of Freedom of model {0:.0f}, and degree of freedom of residual {1:.0f}.</p>".format(
+                diagnostics['df_model'], diagnostics['df_resid']),
             unsafe_allow_html=True,
         )
         st.markdown(
-            "<p style='font-size: 19px; text-align: left;background-color:#abdbfc;padding:1rem;'>MSR value is 867.66 and MSE value is 1.0047</p>",
+            "<p style='font-size: 19px; text-align: left;background-color:#abdbfc;padding:1rem;'>MSR value is {0:.2f} and MSE value is {1:.4f}</p>".format(
+                diagnostics['mse_model'], diagnostics['mse_resid']),
             unsafe_allow_html=True,
         )
         st.markdown(
-            "<p style='font-size: 19px; text-align: left;background-color:#abdbfc;padding:1rem;'>F Statsitic Value 863.3</p>",
+            "<p style='font-size: 19px; text-align: left;background-color:#abdbfc;padding:1rem;'>F Statsitic Value {0:.1f}</p>".format(
+                diagnostics['fvalue']),
             unsafe_allow_html=True,
         )
         st.markdown(
-            "<p style='font-size: 19px; text-align: left;background-color:#abdbfc;padding:1rem;'>P value corresponding to F Statsitic 1.11×10^−16</p>",
+            "<p style='font-size: 19px; text-align: left;background-color:#abdbfc;padding:1rem;'>P value corresponding to F Statsitic {0}</p>".format(
+                format_p_value(diagnostics['f_pvalue'])),
             unsafe_allow_html=True,
         )
     st.write("")
@@ -74,7 +106,7 @@ def conduct_f_test():
 
 
 
-def goodness_of_fit():
+def goodness_of_fit(diagnostics):
     st.title("Evaluating the goodness of fit")
     st.markdown(
         "<p style='font-size: 19px; text-align: left;'>"
@@ -118,11 +150,27 @@ def goodness_of_fit():
         fig2 = create_bar_plot(mae_values, categories, 'MAE value Comparison Before and After Hyper-Parameter Tuning')
         st.plotly_chart(fig2)
 
+    # Residuals of the OLS model of the regression analysis
+    fig3 = go.Figure(go.Scatter(x=diagnostics['fitted'], y=diagnostics['residuals'], mode='markers',
+                                marker=dict(color='#086ccc', size=4, opacity=0.6)))
+    fig3.add_hline(y=0, line_dash='dash')
+    fig3.update_layout(
+        title='Residuals vs Fitted values (R² {0:.3f}, Adjusted R² {1:.3f})'.format(
+            diagnostics['rsquared'], diagnostics['rsquared_adj']),
+        xaxis_title='Fitted values',
+        yaxis_title='Residuals',
+        width=1700,
+    )
+    st.plotly_chart(fig3)
+    if diagnostics['dropped_rows']:
+        st.caption('{0} listings the regression pipeline could not encode were left out of the fit'.format(
+            diagnostics['dropped_rows']))
+
 
 
 
 
-def independent_variables_analysis():
+def independent_variables_analysis(diagnostics):
     st.title("Statistical significance of individual variables and confidence interval")
     st.markdown(
         "<p style='font-size: 19px; text-align: left;'>"
@@ -130,11 +178,11 @@ def independent_variables_analysis():
         unsafe_allow_html=True,
     )
 
-    # Data extracted from the regression summary
-    variables = ['const', 'Builtup Area', 'Balcony', 'Age Possesion', 'Luxury Category', 'Floor Category','Property Type', 'Property Type', 'Sector', 'Bedroom', 'Servant Room', 'Furnishing Type']
-    coefficients = [0.1585, 0.7818, 0.0804, -0.0629, 0.0011, 0.0181, 0.3633, 0.0402, 0.2036, 0.0587, -0.1049, 0.0273]
-    ci_lower = [0.134, 0.740, 0.063, -0.081, -0.011, 0.006, 0.336, -0.008, 0.158, 0.044, -0.119, 0.017]
-    ci_upper = [0.183, 0.823, 0.097, -0.045, 0.013, 0.031, 0.391, 0.089, 0.249, 0.074, -0.091, 0.038]
+    # Coefficients and 95% confidence intervals of the fitted regression analysis model
+    variables = [VARIABLE_LABELS.get(name, name) for name in diagnostics['variables']]
+    coefficients = diagnostics['coefficients']
+    ci_lower = diagnostics['ci_lower']
+    ci_upper = diagnostics['ci_upper']
 
     # Create the plot
     fig = go.Figure()
@@ -168,8 +216,8 @@ def independent_variables_analysis():
     fig.update_traces(error_y=dict(
         type='data',
         symmetric=False,
-        array=[u - c for u, c in zip(ci_upper, coefficients)],
-        arrayminus=[c - l for c, l in zip(coefficients, ci_lower)],
+        array=ci_upper - coefficients,
+        arrayminus=coefficients - ci_lower,
         thickness=1.5,
         width=5,
         color='black'
@@ -190,41 +238,41 @@ def independent_variables_analysis():
 
 
 
-def target_distribution(df):
+def target_distribution(diagnostics):
     st.title("Target Variable distribution analysis")
     st.markdown(
         "<p style='font-size: 19px; text-align: left;'>"
         "Statistical significance and confidence intervals are key concepts in regression analysis, offering insights into the reliability of estimated coefficients. By examining p-values, we determine if independent variables have a significant impact on the dependent variable. A low p-value (typically < 0.05) suggests significance, while a high one implies insignificance. Confidence intervals provide a range of likely values for population parameters, like regression coefficients. For instance, a 95% confidence interval indicates that we're 95% confident the true coefficient lies within it. Together, these tools illuminate variable relationships, aiding in informed decision-making regarding their importance and influence on the outcome..</p>",
         unsafe_allow_html=True,
     )
-    yeo_price = yeojohnson(df['price'], yeojohnson(df['price'])[1])
+    yeo_price = diagnostics['yeo_price_values']
 
     measures_col1,measures_col2 = st.columns(2, gap="small")
     with measures_col1:
         with st.expander(label="Skewness Before transformation"):
             st.markdown(
                 "<p style='font-size: 19px; text-align: left;'>"
-                "2.947</p>",
+                "{0:.3f}</p>".format(diagnostics['price']['skew']),
                 unsafe_allow_html=True,
             )
         with st.expander(label="Kurtosis Before transformation"):
             st.markdown(
                 "<p style='font-size: 19px; text-align: left;'>"
-                "10.973</p>",
+                "{0:.3f}</p>".format(diagnostics['price']['kurtosis']),
                 unsafe_allow_html=True,
             )
 
     with measures_col2:
-        with st.expander(label = "Skewness Before transformation"):
+        with st.expander(label = "Skewness After transformation"):
             st.markdown(
                 "<p style='font-size: 19px; text-align: left;'>"
-                "0.079</p>",
+                "{0:.3f}</p>".format(diagnostics['yeo_price']['skew']),
                 unsafe_allow_html=True,
             )
         with st.expander(label = "Kurtosis After transformation"):
             st.markdown(
                 "<p style='font-size: 19px; text-align: left;'>"
-                "-0.467</p>",
+                "{0:.3f}</p>".format(diagnostics['yeo_price']['kurtosis']),
                 unsafe_allow_html=True,
             )
     st.write("***")
@@ -233,17 +281,15 @@ def target_distribution(df):
     col1, col2 = st.columns(2, gap="small")
 
     with col1:
-        fig = ff.create_distplot([df['price']], ['price'], show_hist=False)
+        fig = ff.create_distplot([diagnostics['price_values']], ['price'], show_hist=False)
         st.plotly_chart(fig)
 
     with col2:
-        qq = sm.qqplot(df['price'], line='s')
-        qq_data = qq.gca().lines
-
-        x = qq_data[0].get_xdata()
-        y = qq_data[0].get_ydata()
-        line_x = qq_data[1].get_xdata()
-        line_y = qq_data[1].get_ydata()
+        qq_data = diagnostics['price_qq']
+        x = qq_data['theoretical']
+        y = qq_data['sample']
+        line_x = qq_data['line_x']
+        line_y = qq_data['line_y']
 
         fig = go.Figure()
         fig.add_trace(go.Scatter(x=x, y=y, mode='markers', name='Data'))
@@ -264,13 +310,11 @@ def target_distribution(df):
         st.plotly_chart(fig)
 
     with col4:
-        qq = sm.qqplot(yeo_price, line='s')
-        qq_data = qq.gca().lines
-
-        x = qq_data[0].get_xdata()
-        y = qq_data[0].get_ydata()
-        line_x = qq_data[1].get_xdata()
-        line_y = qq_data[1].get_ydata()
+        qq_data = diagnostics['yeo_price_qq']
+        x = qq_data['theoretical']
+        y = qq_data['sample']
+        line_x = qq_data['line_x']
+        line_y = qq_data['line_y']
 
         fig = go.Figure()
         fig.add_trace(go.Scatter(x=x, y=y, mode='markers', name='Data'))
@@ -292,8 +336,8 @@ def regression_analysis_ui():
     Guideline_text = "<p style='font-size: 20px;padding-bottom:1rem;'>Regression analysis is a statistical method used to determine the structure of a relationship between variables. It is a powerful tool for uncovering associations between variables observed in data. In the context of our AI application, regression analysis will help us to predict house prices based on various parameters such as location, size, and amenities. By analyzing the relationships between these parameters and the house price, we can identify the most significant factors that affect the price and make more accurate predictions. This will enable our application to provide users with more reliable and personalized house price estimates, ultimately enhancing the overall user experience</p>"
     st.markdown(Guideline_text, unsafe_allow_html=True)
 
-    # Calling function for loading the dataset
-    df = load_dataset()
+    # Calling function for loading the regression diagnostics (computed once per data and pipeline version)
+    diagnostics = load_diagnostics(data_version("Data"), get_registry().checksum("regression_pipeline"))
 
     col1,col2 = st.columns(spec=(1,1), gap="small")
     with col1:
@@ -325,16 +369,16 @@ def regression_analysis_ui():
 
 
     # Calling function for the F test for overall significance
-    conduct_f_test()
+    conduct_f_test(diagnostics)
 
     # Calling function for goodness of fit
-    goodness_of_fit()
+    goodness_of_fit(diagnostics)
 
     # Calling function for Independent variable significance
-    independent_variables_analysis()
+    independent_variables_analysis(diagnostics)
 
     # Target variable distribution
-    target_distribution(df)
+    target_distribution(diagnostics)
 
 
 
@@ -3,6 +3,7 @@ import pandas as pd
 import plotly.express as px
 import warnings
 import pickle
+from Src.Model_Registry import get_registry
 
 st.markdown(
     """
@@ -19,34 +20,19 @@ st.markdown(
 )
 
 
-@st.cache_resource
 def load_classification_pipeline():
-    # Load the pipeline from the pickle file
-    with open(
-        "Artifacts/Classification_pipeline.pkl",
-        "rb",
-    ) as file:
-        loan_pipeline = pickle.load(file)
-    return loan_pipeline
+    # The pipeline is loaded once per process by the model registry
+    return get_registry().get("loan_pipeline")
 
 
-@st.cache_resource
 def load_model():
-    # Load the model from the pickle file
-    with open("Artifacts/SVC.pkl", "rb") as file:
-        loan_model = pickle.load(file)
-    return loan_model
+    # The SVC model is loaded once per process by the model registry
+    return get_registry().get("loan_model")
 
 
-@st.cache_resource
 def load_coeff_sr():
-    # Load the coefficient series from the pickle file
-    with open(
-        "Artifacts/Classification_Coeff.pkl",
-        "rb",
-    ) as file:
-        coefficients_series = pickle.load(file)
-    return coefficients_series
+    # The coefficient series is loaded once per process by the model registry
+    return get_registry().get("loan_coefficients")
 
 
 Credit_History_options = {"No": 0.0, "Yes": 1.0}
@@ -6,6 +6,8 @@ from sklearn.feature_extraction.text import TfidfVectorizer
 import pickle
 import random
 import time
+from Src.Model_Registry import get_registry
+from Src.Metrics import Stage_Timer, Metrics_Sink
 
 st.markdown(
     """
@@ -22,60 +24,44 @@ st.markdown(
 )
 
 
-# Loading the facilities dataframe
-with open(
-    "Artifacts/Recommendation_Engine/Facilities_RE.pkl",
-    "rb",
-) as file:
-    Facilities_Recomm_df = pickle.load(file)
+def load_recommendation_index():
+    """
+    This method will return the memory-mapped top k neighbour index, which the model registry
+    loads once per process and shares between all sessions
+    """
+    return get_registry().get("recommendation_index")
 
-# Loading the cosine similarities
-with open(
-    "Artifacts/Recommendation_Engine/CosineSim_Prices.pkl",
-    "rb",
-) as file:
-    Cosine_Similarity_Prices = pickle.load(file)
 
-with open(
-    "Artifacts/Recommendation_Engine/CosineSim_facilities.pkl",
-    "rb",
-) as file:
-    Cosine_Similarity_Facilities = pickle.load(file)
+@st.cache_resource
+def load_metrics_sink():
+    # A single sink per process so that the latency percentiles cover every session
+    return Metrics_Sink()
 
 
 def recommend_properties_with_scores(
-    property_name, facilities_recommendation_wt, top_n=5
+    property_name, facilities_recommendation_wt, top_n=5, timer=None
 ):
     """
     This method will take the property name as an input and will return 5
-    most similar properties
+    most similar properties. If a Stage_Timer is passed, the index lookup and
+    the scoring are timed separately
     """
-    facilities_wt_normalized = facilities_recommendation_wt / 100
-    price_wt_normalized = 1 - facilities_wt_normalized
-    cosine_sim_matrix = (
-        facilities_wt_normalized * Cosine_Similarity_Facilities
-        + price_wt_normalized * Cosine_Similarity_Prices
-    )
-
-    # Get the similarity scores for the property using its name as the index
-    sim_scores = list(
-        enumerate(cosine_sim_matrix[Facilities_Recomm_df.index.get_loc(property_name)])
-    )
-
-    # Sort properties based on the similarity scores
-    sorted_scores = sorted(sim_scores, key=lambda x: x[1], reverse=True)
-
-    # Get the indices and scores of the top_n most similar properties
-    top_indices = [i[0] for i in sorted_scores[1 : top_n + 1]]
-    top_scores = [i[1] for i in sorted_scores[1 : top_n + 1]]
-
-    # Retrieve the names of the top properties using the indices
-    top_properties = Facilities_Recomm_df.index[top_indices].tolist()
-
-    # Create a dataframe with the results
-    recommendations_df = pd.DataFrame(
-        {"PropertyName": top_properties, "SimilarityScore": top_scores}
-    )
+    timer = timer or Stage_Timer()
+
+    with timer.stage("index_lookup_ms"):
+        topk_index = load_recommendation_index()
+        position = topk_index.position(property_name)
+
+    # Only the queried row of each source is blended, and the top_n are found by partial selection
+    with timer.stage("scoring_ms"):
+        facilities_wt_normalized = facilities_recommendation_wt / 100
+        price_wt_normalized = 1 - facilities_wt_normalized
+        recommendations_df = topk_index.recommend(
+            property_name,
+            {"facilities": facilities_wt_normalized, "prices": price_wt_normalized},
+            top_n=top_n,
+            position=position,
+        )
 
     return recommendations_df
 
@@ -96,7 +82,7 @@ def Recommendation_System_Page():
         with apartment_input_col:
             user_input_apartment = st.selectbox(
                 "Select any Apartment",
-                Facilities_Recomm_df.index.values,
+                load_recommendation_index().property_names.values,
                 index=None,
                 placeholder="Select Apartment for which you want to get recommendations",
                 key="user_input_apartment",
@@ -124,50 +110,65 @@ def Recommendation_System_Page():
         ):
             st.error("Please select some apartment for getting recommendations")
         else:
-            progress_text = "Finding the best place for you🔎."
-            my_bar = st.progress(0, text=progress_text)
-            for percent_complete in range(100):
-                time.sleep(0.05)
-                my_bar.progress(percent_complete + 1, text=progress_text)
-            time.sleep(1)
-            my_bar.empty()
-
-            facilities_results = recommend_properties_with_scores(
-                user_input_apartment, facilities_recommendation_wt
-            )
+            timer = Stage_Timer()
+            with st.spinner("Finding the best place for you🔎."):
+                facilities_results = recommend_properties_with_scores(
+                    user_input_apartment, facilities_recommendation_wt, timer=timer
+                )
             baseline_similarity_score = facilities_results["SimilarityScore"].iloc[4]
 
             st.markdown(
                 "<p style='font-size: 18px; padding-bottom: 1rem;'>Presenting the top five apartments meticulously curated for your consideration, derived from your selected apartment and the thoughtful configurations of our recommendation engine weights. We trust these recommendations will add value to your search and enhance your experience in finding the ideal residence.</p>",
                 unsafe_allow_html=True,
             )
-            row = st.columns(5)
-            index = 0
-            for col in row:
-                tile = col.container(height=200)  # Adjust the height as needed
-                tile.markdown(
-                    "<p style='text-align: left; font-size: 18px; '>"
-                    + str(facilities_results["PropertyName"][index])
-                    + "</p>",
-                    unsafe_allow_html=True,
-                )
-                if index == 4:
-                    tile.metric(
-                        label="Similarity Score",
-                        value=round(facilities_results["SimilarityScore"][index], 3),
-                        delta="Base line score",
-                    )
-                else:
-                    tile.metric(
-                        label="Similarity Score",
-                        value=round(facilities_results["SimilarityScore"][index], 3),
-                        delta=round(
-                            facilities_results["SimilarityScore"][index]
-                            - baseline_similarity_score,
-                            5,
-                        ),
+            with timer.stage("rendering_ms"):
+                row = st.columns(5)
+                index = 0
+                for col in row:
+                    tile = col.container(height=200)  # Adjust the height as needed
+                    tile.markdown(
+                        "<p style='text-align: left; font-size: 18px; '>"
+                        + str(facilities_results["PropertyName"][index])
+                        + "</p>",
+                        unsafe_allow_html=True,
                     )
-                index = index + 1
+                    if index == 4:
+                        tile.metric(
+                            label="Similarity Score",
+                            value=round(
+                                facilities_results["SimilarityScore"][index], 3
+                            ),
+                            delta="Base line score",
+                        )
+                    else:
+                        tile.metric(
+                            label="Similarity Score",
+                            value=round(
+                                facilities_results["SimilarityScore"][index], 3
+                            ),
+                            delta=round(
+                                facilities_results["SimilarityScore"][index]
+                                - baseline_similarity_score,
+                                5,
+                            ),
+                        )
+                    index = index + 1
+
+            # Reporting the measured latency of this request and the running percentiles
+            metrics_sink = load_metrics_sink()
+            metrics_sink.record("recommendation", timer.timings_ms)
+            percentiles = metrics_sink.percentiles("recommendation")
+            st.caption(
+                "Index lookup {0:.2f} ms · Scoring {1:.2f} ms · Rendering {2:.2f} ms · Total {3:.2f} ms "
+                "(p50 {4:.2f} ms, p99 {5:.2f} ms)".format(
+                    timer.timings_ms["index_lookup_ms"],
+                    timer.timings_ms["scoring_ms"],
+                    timer.timings_ms["rendering_ms"],
+                    timer.total_ms,
+                    percentiles["p50"],
+                    percentiles["p99"],
+                )
+            )
 
             # st.write(facilities_results)
 
@@ -0,0 +1,25 @@
+import os
+import pytest
+
+pytest.importorskip("numpy")
+pytest.importorskip("pandas")
+pytest.importorskip("xgboost")
+
+from Src.Analytics import file_version
+
+
+def test_file_version_changes_when_the_file_is_rewritten(tmp_path):
+    path = str(tmp_path / "Sector_Aggregates.parquet")
+    assert file_version(path) is None
+
+    with open(path, "wb") as file_obj:
+        file_obj.write(b"aggregates v1")
+    first = file_version(path)
+    assert file_version(path) == first
+
+    with open(path, "wb") as file_obj:
+        file_obj.write(b"aggregates v2")
+    # Moving the mtime forward, so the change is seen on file systems with a coarse mtime resolution
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    assert file_version(path) not in (None, first)
@@ -0,0 +1,73 @@
+import pickle
+import pytest
+
+np = pytest.importorskip("numpy")
+pd = pytest.importorskip("pandas")
+pytest.importorskip("sklearn")
+pytest.importorskip("category_encoders")
+pytest.importorskip("xgboost")
+
+from Src.Batch_Prediction import Batch_Prediction_Class
+from Src.Compiled_Pipeline import compile_pipeline, load_compiled_pipeline
+
+
+PIPELINE_PATH = "Notebook_And_Dataset/Model Building/Pipeline.pkl"
+DATA_PATH = "Artifacts/Data.csv"
+
+
+@pytest.fixture(scope="module")
+def reg_pipeline():
+    with open(PIPELINE_PATH, "rb") as file:
+        return pickle.load(file)
+
+
+@pytest.fixture(scope="module")
+def compiled(reg_pipeline):
+    return compile_pipeline(reg_pipeline)
+
+
+@pytest.fixture(scope="module")
+def frame():
+    return Batch_Prediction_Class.prepare_features(pd.read_csv(DATA_PATH))
+
+
+def sklearn_output(reg_pipeline, frame):
+    expected = reg_pipeline.transform(frame)
+    if hasattr(expected, "toarray"):
+        expected = expected.toarray()
+    return np.asarray(expected, dtype=np.float64)
+
+
+def test_registry_loader_compiles_the_pipeline():
+    assert load_compiled_pipeline(PIPELINE_PATH) is not None
+
+
+def test_batch_output_is_bit_identical(reg_pipeline, compiled, frame):
+    expected = sklearn_output(reg_pipeline, frame)
+    output = compiled.transform_rows(frame.to_numpy(dtype=object))
+    assert output.shape == expected.shape
+    assert np.array_equal(expected, output, equal_nan=True)
+
+
+def test_single_rows_are_bit_identical(reg_pipeline, compiled, frame):
+    sample = frame.iloc[:200]
+    expected = sklearn_output(reg_pipeline, sample)
+    output = np.vstack(
+        [compiled.transform_row(row) for row in sample.to_dict(orient="records")]
+    )
+    assert np.array_equal(expected, output, equal_nan=True)
+
+
+def test_unknown_categories_match_sklearn(reg_pipeline, compiled, frame):
+    sample = frame.iloc[:5].copy()
+    sample["balcony"] = "7"
+    sample["Property_Type"] = "villa"
+    sample["sector"] = 999.0
+    expected = sklearn_output(reg_pipeline, sample)
+    output = compiled.transform_rows(sample.to_numpy(dtype=object))
+    assert np.array_equal(expected, output, equal_nan=True)
+
+
+def test_feature_names_cover_every_output_column(compiled, frame):
+    output = compiled.transform_rows(frame.iloc[:1].to_numpy(dtype=object))
+    assert len(compiled.feature_names_out()) == output.shape[1]
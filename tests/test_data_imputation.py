@@ -0,0 +1,86 @@
+import pytest
+
+pd = pytest.importorskip("pandas")
+pytest.importorskip("zenml")
+
+from Src.Data_Imputation import (
+    UNDEFINED,
+    impute_age_possession,
+    mode_based_imputation_reference,
+    verify_parity,
+)
+
+
+def make_listings(rows):
+    """
+    :param rows: list of (sector, Property_Type, agePossession values)
+    """
+    return pd.DataFrame(
+        [
+            {"sector": sector, "Property_Type": property_type, "agePossession": age}
+            for sector, property_type, ages in rows
+            for age in ages
+        ]
+    )
+
+
+def test_group_wise_imputation_matches_the_notebook():
+    listings_df = make_listings(
+        [
+            # Filled from the mode of the sector
+            (1, "flat", ["New Property", "New Property", UNDEFINED]),
+            # Mode of the sector is Undefined: filled from the mode of the flats
+            (2, "flat", [UNDEFINED, UNDEFINED, "Old Property"]),
+            (3, "flat", ["New Property", "New Property"]),
+            # Tie between two values: the smallest one, like Series.mode()[0]
+            (1, "house", [UNDEFINED, "Moderately Old"]),
+            (2, "house", ["Relatively New", "Relatively New"]),
+        ]
+    )
+
+    report = verify_parity(listings_df)
+
+    assert report == {
+        "rows": len(listings_df),
+        "imputed_rows": 4,
+        "mismatches": 0,
+        "notebook_left_undefined": 0,
+    }
+    result = impute_age_possession(listings_df)["agePossession"]
+    assert result[listings_df["agePossession"] == UNDEFINED].tolist() == [
+        "New Property",
+        "New Property",
+        "New Property",
+        "Moderately Old",
+    ]
+
+
+def test_only_difference_is_an_undefined_property_type_mode():
+    listings_df = make_listings(
+        [
+            (1, "flat", ["New Property"] * 10),
+            (2, "flat", [UNDEFINED] * 6),
+            # Mode of the houses is Undefined: the notebook leaves these rows as they are
+            (1, "house", [UNDEFINED, UNDEFINED]),
+            (2, "house", [UNDEFINED, "Relatively New"]),
+        ]
+    )
+
+    report = verify_parity(listings_df)
+
+    assert report["mismatches"] == report["notebook_left_undefined"] == 2
+    expected = mode_based_imputation_reference(listings_df)["agePossession"]
+    result = impute_age_possession(listings_df)["agePossession"]
+    houses = listings_df["Property_Type"] == "house"
+    assert expected[houses].tolist() == [
+        UNDEFINED,
+        UNDEFINED,
+        "Relatively New",
+        "Relatively New",
+    ]
+    assert result[houses].tolist() == [
+        "New Property",
+        "New Property",
+        "Relatively New",
+        "Relatively New",
+    ]
@@ -0,0 +1,93 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+pd = pytest.importorskip("pandas")
+
+from Src.Deduplication import Listing_Deduplication_Class
+
+
+DESCRIPTION = (
+    "Uppals southend for sale kothi sector 49 gated block corner park facing plot size 320 sq yd "
+    "ground and first floor 6 bhk north facing with servant room and lift"
+)
+
+
+def make_listings(rows):
+    """
+    :param rows: list of (society, description, price), all in the same sector with the same rooms
+    """
+    return pd.DataFrame(
+        {
+            "sector": "sector 49",
+            "Property_Type": "Independent_house",
+            "bedRoom": 6,
+            "bathroom": 6,
+            "society": [society for society, _, _ in rows],
+            "description": [description for _, description, _ in rows],
+            "price": [price for _, _, price in rows],
+        }
+    )
+
+
+def test_reposted_listings_form_one_cluster():
+    listings_df = make_listings(
+        [
+            ("Uppal Southend", DESCRIPTION, 4.40),
+            ("uppal   southend", DESCRIPTION, 4.45),
+            ("Uppal Southend", DESCRIPTION.upper(), 4.42),
+            ("DLF City Plots", "corner plot near the golf course road", 4.41),
+        ]
+    )
+
+    deduplicated_df, clusters = Listing_Deduplication_Class().deduplicate(listings_df)
+
+    assert deduplicated_df.index.tolist() == [0, 3]
+    assert len(clusters) == 1
+    assert clusters.iloc[0]["merged_indices"] == "0,1,2"
+
+
+def test_placeholder_society_is_not_a_text_signal():
+    # Unrelated houses of the same block, only sharing the placeholder society
+    listings_df = make_listings(
+        [
+            ("independent", None, 4.40),
+            ("Independent", None, 4.45),
+            ("Not Applicable", None, 4.43),
+            ("independent", "builder floor near the market with park view", 4.42),
+            ("independent", "corner kothi on a 300 sq yd plot", 4.41),
+        ]
+    )
+
+    deduplicated_df, clusters = Listing_Deduplication_Class().deduplicate(listings_df)
+
+    assert len(deduplicated_df) == len(listings_df)
+    assert clusters.empty
+
+
+def test_listings_without_text_columns_only_merge_exact_duplicates():
+    listings_df = make_listings(
+        [("independent", None, 4.40)] * 2 + [("independent", None, 4.45)]
+    ).drop(columns=["society", "description"])
+
+    deduplicated_df, _ = Listing_Deduplication_Class().deduplicate(listings_df)
+
+    assert deduplicated_df.index.tolist() == [0, 2]
+
+
+def test_clusters_do_not_chain():
+    # 0 ~ 1 and 1 ~ 2, but 0 and 2 do not match: 2 is not merged into the cluster kept by 0
+    pairs = np.array([[0, 1], [1, 2]])
+    similarity = np.array([0.85, 0.95])
+
+    labels = Listing_Deduplication_Class.assign_clusters(pairs, similarity, 3)
+
+    assert labels.tolist() == [0, 0, 2]
+
+
+def test_listing_joins_the_most_similar_kept_listing():
+    pairs = np.array([[0, 2], [1, 2]])
+    similarity = np.array([0.82, 0.9])
+
+    labels = Listing_Deduplication_Class.assign_clusters(pairs, similarity, 3)
+
+    assert labels.tolist() == [0, 1, 1]
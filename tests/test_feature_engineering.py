@@ -0,0 +1,52 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+pd = pytest.importorskip("pandas")
+
+from Src.Feature_Engineering import (
+    AREA_COLUMNS,
+    SQFT_PER_SQ_M,
+    Area_Extraction_Class,
+    verify_parity,
+)
+
+
+@pytest.fixture
+def listings_df():
+    # One row per case of the notebook: every area type listed, values given in sq.m, plot areas of houses
+    # in sq.yards (ratio 9) and sq.m (ratio 11), a missing Area and a text without any area
+    return pd.DataFrame(
+        {
+            "areaWithType": [
+                "Super Built up area 1650(153.29 sq.m.)Built Up area: 1400 sq.ft. "
+                "(130.06 sq.m.)Carpet area: 1200 sq.ft. (111.48 sq.m.)",
+                "Carpet area: 150.5 (150.5 sq.m.)",
+                "Super Built up area 1420.5 (131.97 sq.m.)Carpet area: 1100 sq.ft.",
+                "Plot area 200(167.23 sq.m.)",
+                "Plot area 2000(185.81 sq.m.)",
+                "Plot area 1500(139.35 sq.m.)",
+                "Plot area 1800(167.23 sq.m.)",
+                "",
+            ],
+            "Area": [1650.0, 1620.0, 1420.0, 1800.0, 22000.0, np.nan, 1800.0, 900.0],
+        }
+    )
+
+
+def test_vectorised_extraction_matches_the_notebook(listings_df):
+    report = verify_parity(listings_df)
+    assert report["rows"] == len(listings_df)
+    for col in AREA_COLUMNS:
+        assert report[col + "_mismatches"] == 0
+
+
+def test_extracted_areas(listings_df):
+    result = Area_Extraction_Class().extract_areas(listings_df)
+    assert result.loc[0, "super_built_up_area"] == 1650.0
+    assert result.loc[1, "carpet_area"] == pytest.approx(150.5 * SQFT_PER_SQ_M)
+    assert result.loc[2, "super_built_up_area"] == pytest.approx(131.97 * SQFT_PER_SQ_M)
+    # Plot areas of houses scaled by the ratio to the listed Area
+    assert result["built_up_area"].iloc[3:7].tolist() == pytest.approx(
+        [1800.0, 21400.0, 1500.0, 1800.0]
+    )
+    assert result.loc[7, AREA_COLUMNS].isna().all()
@@ -0,0 +1,111 @@
+import asyncio
+import json
+import pytest
+
+pytest.importorskip("numpy")
+pytest.importorskip("pandas")
+pytest.importorskip("sklearn")
+pytest.importorskip("category_encoders")
+pytest.importorskip("xgboost")
+
+from Src.Inference_Server import Inference_Service, Micro_Batcher
+
+
+LOAN_ROW = {
+    "Education": "Graduate",
+    "Self_Employed": "No",
+    "Dependents": "0",
+    "Loan_Amount_Term": 360,
+    "Gender": "Male",
+    "Married": "Yes",
+    "Property_Area": "Urban",
+    "CoapplicantIncome": 0.0,
+    "LoanAmount": 120.0,
+    "ApplicantIncome": 5000,
+    "Credit_History": 1.0,
+}
+
+PRICE_ROW = {
+    "balcony": "3+",
+    "agePossession": "Relatively New",
+    "luxury_category": "Low",
+    "floor_category": "Mid Floor",
+    "Property_Type": "Flat",
+    "sector": "sector 45",
+    "built_up_area": 1800,
+    "bedRoom": 3,
+    "bathroom": 3,
+    "servant room": "No",
+    "furnishing_type": "Unfurnished",
+}
+
+
+async def handle_together(requests, max_wait_ms=50.0):
+    """
+    Sends the requests concurrently to one service, so their rows share a micro-batch
+    """
+    service = Inference_Service(max_wait_ms=max_wait_ms)
+    tasks = service.start()
+    try:
+        return await asyncio.gather(
+            *[
+                service.handle("POST", path, json.dumps(payload).encode())
+                for path, payload in requests
+            ],
+            return_exceptions=True,
+        )
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+def test_failing_row_only_fails_its_own_request():
+    def batch_fn(rows):
+        return [1 / row for row in rows]
+
+    async def run():
+        batcher = Micro_Batcher(batch_fn, max_wait_ms=50.0)
+        task = batcher.start()
+        try:
+            return await asyncio.gather(
+                batcher.submit(2), batcher.submit(0), return_exceptions=True
+            )
+        finally:
+            task.cancel()
+
+    good, bad = asyncio.run(run())
+    assert good == 0.5
+    assert isinstance(bad, ZeroDivisionError)
+
+
+@pytest.mark.parametrize(
+    "column, value",
+    [("Education", "PhD"), ("Dependents", "7"), ("Loan_Amount_Term", 24)],
+)
+def test_unknown_loan_category_is_rejected_alone(column, value):
+    good, bad = asyncio.run(
+        handle_together(
+            [
+                ("/predict/loan", LOAN_ROW),
+                ("/predict/loan", dict(LOAN_ROW, **{column: value})),
+            ]
+        )
+    )
+    assert good[0] == 200 and len(good[1]["predictions"]) == 1
+    assert isinstance(bad, ValueError) and column in str(bad)
+
+
+@pytest.mark.parametrize(
+    "column, value", [("sector", "sector 999"), ("Property_Type", "Villa")]
+)
+def test_unknown_price_category_is_rejected_alone(column, value):
+    good, bad = asyncio.run(
+        handle_together(
+            [
+                ("/predict/price", PRICE_ROW),
+                ("/predict/price", dict(PRICE_ROW, **{column: value})),
+            ]
+        )
+    )
+    assert good[0] == 200 and len(good[1]["predictions"]) == 1
+    assert isinstance(bad, ValueError) and column in str(bad)
@@ -0,0 +1,60 @@
+import os
+import pickle
+import pytest
+
+np = pytest.importorskip("numpy")
+pd = pytest.importorskip("pandas")
+pytest.importorskip("sklearn")
+pytest.importorskip("xgboost")
+
+from Src.Model_Registry import Model_Registry, object_size
+
+
+LOAN_COEFFICIENTS_PATH = "Artifacts/Classification_Coeff.pkl"
+
+
+def write_pickle(path, obj):
+    with open(path, "wb") as file:
+        pickle.dump(obj, file)
+
+
+def test_object_size_of_series_and_frame():
+    series = pd.Series(["a", "bb", "ccc"])
+    assert object_size(series) == series.memory_usage(deep=True)
+    frame = series.to_frame("col")
+    assert object_size(frame) == frame.memory_usage(deep=True).sum()
+
+
+def test_loads_a_series_artifact(tmp_path):
+    path = str(tmp_path / "coefficients.pkl")
+    write_pickle(path, pd.Series([0.5, -1.25], index=["Married", "Education"]))
+
+    registry = Model_Registry(check_interval=0.0)
+    registry.register("coefficients", path)
+    series = registry.get("coefficients")
+
+    assert series["Education"] == -1.25
+    stats = registry.stats().set_index("artifact").loc["coefficients"]
+    assert stats["loads"] == 1
+    assert stats["size_bytes"] > 0
+
+
+def test_reloads_a_series_artifact_when_its_file_changes(tmp_path):
+    path = str(tmp_path / "coefficients.pkl")
+    write_pickle(path, pd.Series([0.5]))
+    registry = Model_Registry(check_interval=0.0)
+    registry.register("coefficients", path)
+    registry.get("coefficients")
+
+    write_pickle(path, pd.Series([0.5, 1.0]))
+    # Moving the mtime forward, so the change is seen on file systems with a coarse mtime resolution
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+    assert len(registry.get("coefficients")) == 2
+
+
+def test_loads_the_loan_coefficients():
+    registry = Model_Registry()
+    registry.register("loan_coefficients", LOAN_COEFFICIENTS_PATH)
+    assert isinstance(registry.get("loan_coefficients"), pd.Series)
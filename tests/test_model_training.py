@@ -0,0 +1,90 @@
+import os
+import pickle
+from types import SimpleNamespace
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("sklearn")
+pytest.importorskip("scipy")
+pytest.importorskip("xgboost")
+pytest.importorskip("zenml")
+
+from scipy.stats import yeojohnson
+from xgboost import XGBRegressor
+import Src.Model_Training as model_training
+from Src.Model_Training import Model_training_Class, holdout_mae, load_base_model
+
+
+def make_listings(rng, rows):
+    X = rng.uniform(size=(rows, 4))
+    # Price in crore, right skewed as in the listings
+    y = np.exp(1.5 * X[:, 0] + X[:, 1]) * 0.5
+    return X, y
+
+
+@pytest.fixture
+def model_config(tmp_path, monkeypatch):
+    """
+    Artifacts of a full training: Model.pkl fitted on the Yeo-Johnson transformed price, next to the served
+    booster fitted on the raw price
+    """
+    rng = np.random.default_rng(0)
+    X_train, y_train = make_listings(rng, 400)
+
+    transformed_model = XGBRegressor(n_estimators=50, random_state=0)
+    transformed_model.fit(X_train, yeojohnson(y_train)[0])
+    model_storage_path = str(tmp_path / "Model.pkl")
+    with open(model_storage_path, "wb") as file:
+        pickle.dump(transformed_model, file)
+
+    served_model = XGBRegressor(n_estimators=50, random_state=0)
+    served_model.fit(X_train, y_train)
+    served_model_path = str(tmp_path / "xgboost_regressor_model.bin")
+    served_model.get_booster().save_model(served_model_path)
+
+    config = SimpleNamespace(
+        model_storage_path=model_storage_path,
+        served_model_path=served_model_path,
+        served_pipeline_path=str(tmp_path / "Pipeline.pkl"),
+        incremental_rounds=10,
+        incremental_learning_rate=0.05,
+        incremental_mae_tolerance=0.01,
+    )
+    monkeypatch.setattr(model_training, "ModelNameConfig", lambda: config)
+    # The price grid of the application is not rebuilt from the test models
+    monkeypatch.setattr(model_training, "refresh_price_grid", lambda **kwargs: True)
+    return config
+
+
+def test_base_model_is_the_raw_scale_served_booster(model_config):
+    rng = np.random.default_rng(1)
+    X_holdout, y_holdout = make_listings(rng, 200)
+
+    base_model, base_path = load_base_model(model_config)
+
+    assert base_path == model_config.served_model_path
+    with open(model_config.model_storage_path, "rb") as file:
+        transformed_model = pickle.load(file)
+    # Predictions of the transformed model are off on the price scale, the served booster's are not
+    assert holdout_mae(base_model, X_holdout, y_holdout) < holdout_mae(
+        transformed_model, X_holdout, y_holdout
+    )
+
+
+def test_incremental_training_leaves_the_transformed_model_alone(model_config):
+    rng = np.random.default_rng(2)
+    X_delta, y_delta = make_listings(rng, 100)
+    X_holdout, y_holdout = make_listings(rng, 200)
+    with open(model_config.model_storage_path, "rb") as file:
+        transformed_model_bytes = file.read()
+
+    trainer = Model_training_Class()
+    trainer.incremental_model_training(X_delta, X_holdout, y_delta, y_holdout)
+    report = trainer.incremental_report
+
+    assert report["base_model"] == model_config.served_model_path
+    assert report["updated_mae"] < 0.2 * np.mean(y_holdout)
+    with open(model_config.model_storage_path, "rb") as file:
+        assert file.read() == transformed_model_bytes
+    if report["accepted"]:
+        assert os.path.exists(report["previous_model"])
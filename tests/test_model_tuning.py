@@ -0,0 +1,41 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("sklearn")
+pytest.importorskip("xgboost")
+pytest.importorskip("hyperopt")
+
+from Src.Model_Info.Model_Tuning import HyperparameterTuner
+
+
+def make_tuner():
+    rng = np.random.default_rng(0)
+    X = rng.uniform(size=(200, 4))
+    y = np.log1p(np.exp(X[:, 0] + X[:, 1]))
+    return HyperparameterTuner(
+        X[:150],
+        X[150:],
+        y[:150],
+        np.expm1(y[150:]),
+        early_stopping_rounds=5,
+        rung_budgets=[30, 60],
+    )
+
+
+def test_parallel_search_reports_the_measured_serial_speedup():
+    tuner = make_tuner()
+    tuner.optimize(max_evals=4, n_workers=2, seed=0, measure_speedup=True)
+    report = tuner.tuning_report
+
+    assert report["mode"] == "parallel" and report["trials"] == 4
+    assert report["serial_wall_time_s"] > 0
+    assert report["speedup"] == pytest.approx(
+        report["serial_wall_time_s"] / report["wall_time_s"]
+    )
+
+
+def test_serial_search_reports_no_speedup():
+    tuner = make_tuner()
+    tuner.optimize(max_evals=2, n_workers=1, seed=0, measure_speedup=True)
+    assert tuner.tuning_report["mode"] == "serial"
+    assert "speedup" not in tuner.tuning_report
@@ -0,0 +1,71 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("pandas")
+pytest.importorskip("sklearn")
+pytest.importorskip("xgboost")
+
+import Src.Price_Grid as price_grid_module
+from Src.Price_Grid import Price_Grid, refresh_price_grid, source_checksum
+
+
+@pytest.fixture
+def sources(tmp_path):
+    model_path = tmp_path / "model.bin"
+    pipeline_path = tmp_path / "Pipeline.pkl"
+    model_path.write_bytes(b"booster v1")
+    pipeline_path.write_bytes(b"pipeline v1")
+    return str(model_path), str(pipeline_path)
+
+
+@pytest.fixture
+def builds(monkeypatch):
+    """
+    Replaces the scoring of the grid by a tiny grid, recording the sources of every build
+    """
+    calls = []
+
+    def fake_build(model_path, pipeline_path, **kwargs):
+        calls.append((model_path, pipeline_path))
+        return Price_Grid(
+            np.zeros((1, 2, 1, 1, 1), dtype=np.float32),
+            np.array([45.0]),
+            {"balcony": "3+"},
+            source_checksum(model_path, pipeline_path),
+        )
+
+    monkeypatch.setattr(price_grid_module, "build_price_grid", fake_build)
+    return calls
+
+
+def test_grid_is_built_once_and_rebuilt_when_a_source_changes(
+    tmp_path, sources, builds
+):
+    model_path, pipeline_path = sources
+    grid_path = str(tmp_path / "Price_Grid.npz")
+
+    assert refresh_price_grid(grid_path, model_path, pipeline_path)
+    assert not refresh_price_grid(grid_path, model_path, pipeline_path)
+    assert len(builds) == 1
+
+    with open(pipeline_path, "wb") as file_obj:
+        file_obj.write(b"pipeline v2")
+    assert not Price_Grid.load(grid_path).is_current(model_path, pipeline_path)
+    assert refresh_price_grid(grid_path, model_path, pipeline_path)
+    assert Price_Grid.load(grid_path).is_current(model_path, pipeline_path)
+
+
+def test_grid_saved_without_a_checksum_is_stale(tmp_path, sources, builds):
+    model_path, pipeline_path = sources
+    grid_path = str(tmp_path / "Price_Grid.npz")
+    # Layout of the grids saved before the checksum was stored
+    np.savez_compressed(
+        grid_path,
+        prices=np.zeros((1, 2, 1, 1, 1), dtype=np.float32),
+        sectors=np.array([45.0]),
+        fixed_columns=np.array(["balcony"]),
+        fixed_values=np.array(["3+"]),
+    )
+
+    assert Price_Grid.load(grid_path).source_checksum is None
+    assert refresh_price_grid(grid_path, model_path, pipeline_path)
@@ -0,0 +1,97 @@
+import os
+import pickle
+import pytest
+
+np = pytest.importorskip("numpy")
+pd = pytest.importorskip("pandas")
+
+from Src.Recommendation_Index import (
+    SOURCE_DIR,
+    DENSE_PICKLES,
+    FACILITIES_PICKLE,
+    TopK_Index,
+    select_top_n,
+)
+
+
+FACILITIES_WEIGHTS = (1, 25, 50, 75, 100)
+
+
+def load_pickle(name):
+    with open(os.path.join(SOURCE_DIR, name), "rb") as file:
+        return pickle.load(file)
+
+
+@pytest.fixture(scope="module")
+def property_names():
+    return load_pickle(FACILITIES_PICKLE).index
+
+
+@pytest.fixture(scope="module")
+def dense_matrices():
+    return {source: load_pickle(name) for source, name in DENSE_PICKLES.items()}
+
+
+def dense_recommendation(dense_matrices, position, facilities_wt, top_n=5):
+    """
+    Implementation of the recommendation page before the index: blend of the full matrices, sorted()
+    and the first ranked property dropped
+    """
+    facilities_wt_normalized = facilities_wt / 100
+    price_wt_normalized = 1 - facilities_wt_normalized
+    cosine_sim_matrix = (
+        facilities_wt_normalized * dense_matrices["facilities"]
+        + price_wt_normalized * dense_matrices["prices"]
+    )
+    sim_scores = list(enumerate(cosine_sim_matrix[position]))
+    sorted_scores = sorted(sim_scores, key=lambda x: x[1], reverse=True)
+    return (
+        [i[0] for i in sorted_scores[1 : top_n + 1]],
+        [i[1] for i in sorted_scores[1 : top_n + 1]],
+    )
+
+
+def test_recommendations_match_the_dense_blend(property_names, dense_matrices):
+    index = TopK_Index.build_from_dense(property_names, dense_matrices)
+    for facilities_wt in FACILITIES_WEIGHTS:
+        weights = {
+            "facilities": facilities_wt / 100,
+            "prices": 1 - facilities_wt / 100,
+        }
+        for position, property_name in enumerate(property_names):
+            expected_positions, expected_scores = dense_recommendation(
+                dense_matrices, position, facilities_wt
+            )
+            result = index.recommend(property_name, weights)
+            assert result["PropertyName"].tolist() == list(
+                property_names[expected_positions]
+            )
+            assert np.array_equal(result["SimilarityScore"], expected_scores)
+
+
+def test_truncated_index_never_estimates_a_score():
+    rng = np.random.default_rng(0)
+    features = {
+        "facilities": rng.normal(size=(60, 8)),
+        "prices": rng.normal(size=(60, 4)),
+    }
+    exact = TopK_Index.build_from_features(np.arange(60), features)
+    truncated = TopK_Index.build_from_features(np.arange(60), features, k=10)
+    weights = {"facilities": 0.3, "prices": 0.7}
+
+    for position in range(60):
+        exact_candidates, exact_scores = exact.hybrid_scores(position, weights)
+        candidates, scores = truncated.hybrid_scores(position, weights)
+        expected = dict(zip(exact_candidates, exact_scores))
+        assert np.allclose(scores, [expected[c] for c in candidates])
+
+        row = truncated.dense_row(position, "prices")
+        stored = ~np.isnan(row)
+        assert np.allclose(row[stored], exact.dense_row(position, "prices")[stored])
+
+
+def test_select_top_n_breaks_ties_by_position():
+    scores = np.array([0.5, 0.9, 0.7, 0.9, 0.7, 0.7])
+    positions, top_scores = select_top_n(scores, 3)
+    assert positions.tolist() == [1, 3, 2]
+    assert top_scores.tolist() == [0.9, 0.9, 0.7]